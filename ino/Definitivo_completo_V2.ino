@@ -53,6 +53,30 @@ const int DEADZONE = 20;        // Zona muerta para evitar vibraciones
 const int MIN_PULSO = 1000;
 const int MAX_PULSO = 2000;
 
+// --- TELEMETRÍA ---
+// 0 = texto CSV (8 campos), 1 = trama binaria de tamaño fijo con CRC
+#define TELEMETRIA_BINARIA 0
+
+const uint8_t SYNC_1 = 0xAA;
+const uint8_t SYNC_2 = 0x55;
+uint16_t secuenciaTrama = 0;
+
+// Trama de 23 bytes, little-endian, sin relleno (ver DTYPE_TRAMA en py/telemetria.py)
+struct __attribute__((packed)) TramaTelemetria {
+  uint8_t sync1;
+  uint8_t sync2;
+  uint16_t secuencia;
+  uint32_t tiempo_ms;
+  int16_t profundidad_mm;
+  uint16_t distancia_cm;
+  int16_t pitch_cd;        // centésimas de grado
+  int16_t roll_cd;
+  uint16_t bateria_mv;
+  uint16_t velocidad;
+  uint8_t flags;           // bit 0: luces, bit 1: seguridad
+  uint16_t crc;            // CRC-16/CCITT de secuencia..flags
+};
+
 void setup() {
   Serial.begin(9600);
 
@@ -247,8 +271,45 @@ void controlarLuces(int ch6) {
   estadoAnteriorCH6 = estadoActualCH6;
 }
 
+// CRC-16/CCITT-FALSE (polinomio 0x1021, valor inicial 0xFFFF)
+uint16_t crc16(const uint8_t* datos, size_t largo) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < largo; i++) {
+    crc ^= (uint16_t)datos[i] << 8;
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+// Enviar trama binaria
+void enviarTramaBinaria(int ch5) {
+  TramaTelemetria trama;
+  trama.sync1 = SYNC_1;
+  trama.sync2 = SYNC_2;
+  trama.secuencia = secuenciaTrama++;
+  trama.tiempo_ms = millis();
+  trama.profundidad_mm = (int16_t)constrain(round(profundidad * 10), -32768, 32767);
+  trama.distancia_cm = (uint16_t)constrain(distanciaActual, 0, 65535);
+  trama.pitch_cd = (int16_t)round(pitch * 100);
+  trama.roll_cd = (int16_t)round(roll * 100);
+  trama.bateria_mv = (uint16_t)constrain(round(voltajeBateria * 1000), 0, 65535);
+  trama.velocidad = (uint16_t)velocidadMotores;
+  trama.flags = 0;
+  if (!lucesEncendidas) trama.flags |= 0x01;  // mismo valor que el campo CSV
+  if (ch5 > 1500) trama.flags |= 0x02;
+
+  const uint8_t* bytes = (const uint8_t*)&trama;
+  trama.crc = crc16(bytes + 2, sizeof(trama) - 4);
+  Serial.write(bytes, sizeof(trama));
+}
+
 // Mostrar datos
 void mostrarDatos(int ch1, int ch2, int ch3, int ch4, int ch5, int ch6) {
+#if TELEMETRIA_BINARIA
+  enviarTramaBinaria(ch5);
+#else
   int prof_int = (int)round(profundidad);
   int pitch_int = (int)round(pitch);
   int roll_int = (int)round(roll);
@@ -263,4 +324,5 @@ void mostrarDatos(int ch1, int ch2, int ch3, int ch4, int ch5, int ch6) {
   Serial.print(lucesEncendidas ? "0" : "1"); Serial.print(",");
   Serial.print(velocidadMotores); Serial.print(",");
   Serial.println(ch5 > 1500 ? "1" : "0");
+#endif
 }
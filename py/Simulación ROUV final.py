@@ -1,19 +1,101 @@
+import argparse
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.widgets import Slider, Button
 from matplotlib.patches import FancyArrowPatch
+from matplotlib.transforms import Bbox
 from mpl_toolkits.mplot3d import proj3d
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from buffer_circular import HistorialDiezmado
+from dinamica_rouv import (BETA, DEFAULT_DEPTH_GAINS, DEFAULT_HEADING_GAINS, DEFAULT_PARAMS,
+                           INTEGRATORS, THETA, HoldController, ROUVParams, FixedStepSimulation,
+                           initial_state, make_inputs, reference_vectors, scaled_hold_gains,
+                           yaw_moment, run as run_headless)
+from malla_stl import hidrostatica, malla_visual, propiedades_masa, triangulos
+from trayectoria import EscritorTrayectoria, registrador, ruta_trayectoria_por_defecto
+
+
+class Arrow3D(FancyArrowPatch):
+    """Flecha entre dos puntos 3D; se crea una vez y se mueve con `set_data_3d`."""
+
+    def __init__(self, xs, ys, zs, *args, **kwargs):
+        super().__init__((0, 0), (0, 0), *args, **kwargs)
+        self._verts3d = xs, ys, zs
+
+    def set_data_3d(self, xs, ys, zs):
+        self._verts3d = xs, ys, zs
+
+    def do_3d_projection(self, renderer=None):
+        xs3d, ys3d, zs3d = self._verts3d
+        xs, ys, zs = proj3d.proj_transform(xs3d, ys3d, zs3d, self.axes.M)
+        self.set_positions((xs[0], ys[0]), (xs[1], ys[1]))
+        return min(zs)
+
+    def draw(self, renderer):
+        # Con blitting se dibuja sola (draw_artist), sin pasar por Axes3D.draw
+        self.do_3d_projection(renderer)
+        super().draw(renderer)
+
+
+class Hull3D(Poly3DCollection):
+    """Casco del ROUV: una malla diezmada en coordenadas locales que se lleva a la
+    pose actual con `set_pose`, sombreada según la orientación de cada cara."""
+
+    def __init__(self, vertices, faces, scale=1.0, color=(0.85, 0.45, 0.1), **kwargs):
+        self._local = np.asarray(vertices, dtype=np.float64)[faces] * scale
+        edges = np.diff(self._local, axis=1)
+        normals = np.cross(edges[:, 0], edges[:, 1])
+        self._normals = normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True),
+                                             1e-12)
+        self._color = np.asarray(color)
+        super().__init__(self._local, linewidths=0, **kwargs)
+
+    def set_pose(self, position, rotation):
+        """`rotation` lleva del sistema local al global (columnas = ejes locales)."""
+        self.set_verts(self._local @ rotation.T + position)
+        # Luz desde arriba: caras hacia arriba claras, hacia abajo oscuras
+        light = 0.35 + 0.65 * np.clip(self._normals @ rotation.T[:, 2], 0.0, 1.0)
+        self.set_facecolor(light[:, None] * self._color)
+
+    def draw(self, renderer):
+        # Igual que Arrow3D: con blitting hay que proyectar antes de dibujar
+        self.do_3d_projection()
+        super().draw(renderer)
+
 
 class ROUVDynamicControlSimulator:
-    def __init__(self):
+    def __init__(self, time_scale=1.0, render_fps=10, dt=0.03, asap_steps_per_frame=2000,
+                 integrator="euler", info_hz=4.0, max_history=3000, archive_history=2000,
+                 hull=None, hull_scale=1.0, hydro=None, recorder=None):
+        """`time_scale` 1.0 es tiempo real, >1 más rápido y None lo más rápido posible
+        (`asap_steps_per_frame` pasos por frame). La física avanza en pasos fijos de
+        `dt` independientemente de `render_fps`, con el integrador `integrator`. El
+        cuadro de información se redibuja a `info_hz` (el texto es lo más caro).
+
+        La trayectoria guarda cada paso de la física: los últimos `max_history`
+        completos y, de los anteriores, hasta `archive_history` diezmados (0 para
+        mostrar solo la ventana reciente).
+
+        `hull` es una malla (vértices, caras) en metros y en ejes del vehículo que se
+        dibuja en lugar del punto, agrandada `hull_scale` veces para verla a la
+        escala del entorno. `hydro` (de `malla_stl.hidrostatica`) reemplaza la masa,
+        las inercias y el empuje por los derivados de la geometría.
+
+        `recorder` (un `EscritorTrayectoria`) graba cada paso de la física con las
+        fuerzas aplicadas; tras un reset el tiempo grabado sigue corriendo."""
         # Parámetros físicos
         self.m = 10.0  # masa (kg)
         self.Iy = 2.0  # inercia pitch (kg·m²)
         self.Iz = 1.5  # inercia yaw (kg·m²)
         self.g = 9.81
-        self.b_neutral = self.m * self.g
+        self.b_neutral = self.m * self.g  # empuje en reposo (N)
+        if hydro is not None:
+            self.m, self.Iy, self.Iz = hydro["m"], hydro["Iy"], hydro["Iz"]
+            self.b_neutral = hydro["b_neutral"]
         self.Dx, self.Dz = 1.0, 1.2
         
         # Geometría
@@ -24,6 +106,26 @@ class ROUVDynamicControlSimulator:
         # Coeficientes de amortiguamiento angular (reducidos para respuesta más rápida)
         self.D_theta = 0.3  # amortiguamiento pitch
         self.D_beta = 0.3   # amortiguamiento yaw
+        self.params = ROUVParams(m=self.m, Iy=self.Iy, Iz=self.Iz, g=self.g, Dx=self.Dx,
+                                 Dz=self.Dz, d=self.d, l=self.l, phi=self.phi,
+                                 D_theta=self.D_theta, D_beta=self.D_beta)
+        
+        # Física desacoplada del render: acumulador de paso fijo
+        self.dt = dt
+        self.time_scale = time_scale
+        self.render_fps = render_fps
+        self.info_period = 1.0 / info_hz
+        self.asap_steps_per_frame = asap_steps_per_frame
+        self.sim = FixedStepSimulation(dt=dt, params=self.params, integrator=integrator)
+        
+        # Historia en buffers circulares: costo constante por paso y sin copias
+        self.max_history = max_history
+        self.history = HistorialDiezmado(max_history, archive_history, columnas=3)
+        self.orientation_history = HistorialDiezmado(max_history, archive_history, columnas=2)
+        self.last_frame_time = None
+        self.recorder = recorder
+        self._record_t0 = 0.0
+        self._step_inputs = make_inputs()
         
         # Estado inicial
         self.reset_state()
@@ -34,11 +136,7 @@ class ROUVDynamicControlSimulator:
         self._setup_environment()
         self._create_sliders()
         
-        self.history = []
-        self.max_history = 300
         self.reference_vectors = np.eye(3)
-        self.orientation_history = []
-        self.dt = 0.03  # paso de tiempo reducido para respuesta más rápida
         
         # Control tipo dron con nuevas teclas
         self.drone_control = {
@@ -50,17 +148,57 @@ class ROUVDynamicControlSimulator:
             'down': False        # F
         }
         self.max_thrust = 15.0  # Empuje máximo para control tipo dron
+        
+        # Piloto automático (tecla H): PID de profundidad y rumbo; con él activo,
+        # A/D y R/T mueven las referencias en lugar de mandar empuje. Con la masa y la
+        # inercia de la malla las ganancias por defecto se escalan a esos valores
+        depth_gains, heading_gains = DEFAULT_DEPTH_GAINS, DEFAULT_HEADING_GAINS
+        if hydro is not None:
+            depth_gains, heading_gains = scaled_hold_gains(self.params)
+        self.hold = HoldController(dt, depth_gains, heading_gains, max_thrust=20.0)
+        self.hold_active = False
+        self.heading_rate = np.deg2rad(45.0)  # cambio de rumbo de referencia (rad/s)
+        self.depth_rate = 0.5                  # cambio de profundidad de referencia (m/s)
+        
+        # Escena persistente: se construye una vez y `update` solo cambia datos
+        self._background = None
+        self._info_background = None
+        self._last_info = None
+        self.hull = hull
+        self.hull_scale = hull_scale
+        self._build_scene()
 
     def reset_state(self):
-        self.x, self.y, self.z = 0.0, 0.0, -2.0
-        self.vx, self.vy, self.vz = 0.0, 0.0, 0.0  # Velocidades en sistema local
-        self.theta, self.beta = 0.0, 0.0  # Pitch y Yaw
-        self.omega_theta, self.omega_beta = 0.0, 0.0  # Velocidades angulares
-        self.t = 0.0
+        # En la grabación el tiempo no vuelve a cero: el reset queda como un salto
+        self._record_t0 += self.sim.t
+        self.sim.reset(initial_state(0.0, 0.0, -2.0))
+        self.last_frame_time = None
+        self._sync_from_state()
         self.b = self.b_neutral
         self.F1 = self.F2 = self.F3 = self.F4 = 0.0
         self.reference_vectors = np.eye(3)
-        self.orientation_history = []
+        self.history.limpiar()
+        self.orientation_history.limpiar()
+        self._step_inputs = make_inputs()
+        self._record_history(self.sim.t, self.sim.state)
+
+    def _record_history(self, t, state):
+        """Guarda posición y orientación (yaw, pitch) tras cada paso de la física."""
+        self.history.agregar(state[:3])
+        self.orientation_history.agregar((state[BETA], state[THETA]))
+        if self.recorder is not None:
+            inputs = self._step_inputs
+            if callable(inputs):
+                inputs = inputs.last_inputs
+            self.recorder.agregar(self._record_t0 + t, state, inputs)
+
+    def _sync_from_state(self):
+        """Copia el estado del núcleo de física a los atributos que usa el dibujo."""
+        (self.x, self.y, self.z,  # Posición global
+         self.vx, self.vy, self.vz,  # Velocidades en sistema local
+         self.theta, self.beta,  # Pitch y Yaw
+         self.omega_theta, self.omega_beta) = self.sim.state.tolist()  # Velocidades angulares
+        self.t = self.sim.t
 
     def _setup_environment(self):
         self.ax.set_xlim(-5, 5)
@@ -133,6 +271,7 @@ class ROUVDynamicControlSimulator:
                        "W/X: Adelante/Atrás\n"
                        "A/D: Girar Izq/Der\n"
                        "R/T: Subir/Bajar\n"
+                       "H: Mantener prof./rumbo\n"
                        "Yaw dinámico: ΔF = l*(F1-F2)/2")
         plt.figtext(0.75, 0.5, control_info, fontsize=9,
                    bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcyan", alpha=0.8))
@@ -157,6 +296,8 @@ class ROUVDynamicControlSimulator:
             self.drone_control['up'] = True
         elif key == 't':
             self.drone_control['down'] = True
+        elif key == 'h':
+            self._toggle_hold()
             
     def _on_key_release(self, event):
         """Maneja eventos de teclas liberadas - WASD + R/F"""
@@ -203,6 +344,35 @@ class ROUVDynamicControlSimulator:
             
         return F1_drone, F2_drone, F34_drone
 
+    def _toggle_hold(self):
+        """Activa el piloto automático en la profundidad y el rumbo actuales."""
+        self.hold_active = not self.hold_active
+        if self.hold_active:
+            self.hold.depth_ref = -self.z
+            self.hold.heading_ref = self.beta
+            self.hold.reset()
+
+    def _ramp_hold_references(self, elapsed):
+        """Mueve las referencias del piloto automático con A/D y R/T según los
+        `elapsed` segundos simulados del frame (no el reloj real)."""
+        if self.drone_control['left']:
+            self.hold.heading_ref -= self.heading_rate * elapsed
+        if self.drone_control['right']:
+            self.hold.heading_ref += self.heading_rate * elapsed
+        if self.drone_control['up']:
+            self.hold.depth_ref -= self.depth_rate * elapsed
+        if self.drone_control['down']:
+            self.hold.depth_ref += self.depth_rate * elapsed
+
+    def _hold_inputs(self, F1_drone, F2_drone):
+        """Configura el piloto automático con los controles del frame y lo devuelve
+        como función de entradas: se evalúa en cada paso de la física."""
+        # El diferencial del dron se cancela: solo queda el avance
+        self.hold.forward = (self.slider_F1.val + self.slider_F2.val + F1_drone + F2_drone) / 2
+        self.hold.delta_b = self.b - self.m * self.g
+        self.hold.pitch = np.deg2rad(self.slider_pitch.val)
+        return self.hold
+
     def update(self, frame):
         # Obtener fuerzas del control tipo dron
         F1_drone, F2_drone, F34_drone = self._calculate_drone_forces()
@@ -215,86 +385,53 @@ class ROUVDynamicControlSimulator:
         self.b = self.b_neutral + self.slider_b.val
         
         # Pitch se puede controlar directamente (o también podrías hacerlo dinámico)
-        self.theta = np.deg2rad(self.slider_pitch.val)
-        
-        # Actualizar tiempo
-        self.t += self.dt
-        
-        # 1. CALCULAR MOMENTOS
-        # Momento de yaw generado por diferencia de fuerzas F1-F2
-        M_yaw = self.l * (self.F1 - self.F2) / 2
-        
-        # Momento de pitch generado por propulsores verticales (si están descentrados)
-        # Para simplificar, asumimos que F3 y F4 están en el centro, por lo que no generan momento de pitch
-        # Pero el empuje horizontal sí puede generar momento de pitch
-        M_pitch_from_horizontal = 0  # Lo dejamos en 0 por ahora
-        
-        # 2. CALCULAR ACELERACIONES ANGULARES
-        # Aceleración angular de yaw
-        alpha_beta = (M_yaw - self.D_beta * self.omega_beta) / self.Iz
-        
-        # Para pitch, si quieres que también sea dinámico, descomenta la siguiente línea:
-        # alpha_theta = (M_pitch_from_horizontal - self.D_theta * self.omega_theta) / self.Iy
-        
-        # 3. INTEGRAR VELOCIDADES ANGULARES
-        self.omega_beta += alpha_beta * self.dt
-        # self.omega_theta += alpha_theta * self.dt  # Si quieres pitch dinámico
-        
-        # 4. INTEGRAR ÁNGULOS
-        self.beta += self.omega_beta * self.dt
-        # self.theta += self.omega_theta * self.dt  # Si quieres pitch dinámico
-        
-        # 5. CALCULAR FUERZAS Y ACELERACIONES LINEALES
-        # Fuerzas en sistema local
-        F_forward_local = (self.F1 + self.F2) * np.cos(self.theta)
-        F_vertical_local = ((self.F3 + self.F4) + (self.F1 + self.F2) * np.sin(self.theta) 
-                          + (self.b - self.b_neutral))
-        
-        # Aceleraciones lineales en sistema local
-        ax_local = (F_forward_local - self.Dx * np.abs(self.vx) * self.vx) / self.m
-        ay_local = (-self.Dx * np.abs(self.vy) * self.vy) / self.m
-        az_local = (F_vertical_local - self.Dz * np.abs(self.vz) * self.vz) / self.m
-        
-        # 6. ACTUALIZAR VELOCIDADES LINEALES (en sistema local)
-        self.vx += ax_local * self.dt
-        self.vy += ay_local * self.dt
-        self.vz += az_local * self.dt
-        
-        # 7. ACTUALIZAR VECTORES DE REFERENCIA (orientación)
+        inputs = make_inputs(self.F1, self.F2, self.F3, self.F4, self.b - self.m * self.g,
+                             np.deg2rad(self.slider_pitch.val))
+        if self.hold_active:
+            inputs = self._hold_inputs(F1_drone, F2_drone)
+        
+        self._step_inputs = inputs
+        
+        # Avanzar la física según el reloj real (no un paso por frame)
+        now = time.monotonic()
+        t_before = self.sim.t
+        if self.time_scale is None:
+            self.sim.advance(self.asap_steps_per_frame * self.dt, inputs, self._record_history)
+        elif self.last_frame_time is not None:
+            self.sim.advance((now - self.last_frame_time) * self.time_scale, inputs,
+                             self._record_history)
+        self.last_frame_time = now
+        if self.hold_active:
+            self._ramp_hold_references(self.sim.t - t_before)
+        self._sync_from_state()
         self.update_reference_vectors()
-        
-        # 8. CONVERTIR VELOCIDAD LOCAL A GLOBAL PARA ACTUALIZAR POSICIÓN
-        v_global = self.local_to_global(np.array([self.vx, self.vy, self.vz]))
-        self.x += v_global[0] * self.dt
-        self.y += v_global[1] * self.dt
-        self.z += v_global[2] * self.dt
-        
-        # Guardar estado para visualización
-        self.history.append((self.x, self.y, self.z))
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
+        if self.hold_active and self.hold.last_inputs is not None:
+            # Lo que mandó el piloto automático en el último paso
+            self.F1, self.F2, self.F3, self.F4 = self.hold.last_inputs[:4]
+            inputs = self.hold.last_inputs
+        M_yaw = yaw_moment(inputs, self.params) if not callable(inputs) else 0.0
+        
+        # Actualización gráfica: solo los datos de los artistas que se mueven
+        hist = self.history.puntos()
+        self.trail_line.set_data_3d(hist[:,0], hist[:,1], hist[:,2])
             
-        self.orientation_history.append((self.beta, self.theta))
-        if len(self.orientation_history) > self.max_history:
-            self.orientation_history.pop(0)
-        
-        # Actualización gráfica
-        self.ax.clear()
-        self._setup_environment()
-        
-        # Dibujar trayectoria en 3D
-        if len(self.history) > 1:
-            hist = np.array(self.history)
-            self.ax.plot(hist[:,0], hist[:,1], hist[:,2], 'g-', alpha=0.5, label='Trayectoria')
-            
-        # Dibujar ROUV y sistema de referencia
-        self._draw_relative_system()
-        
-        # Info del estado
+        # ROUV y sistema de referencia
+        self._update_relative_system()
+        
+        # Info del estado, a `info_hz`
+        info_changed = self._last_info is None or now - self._last_info >= self.info_period
+        if not info_changed:
+            self._redraw(info_changed)
+            return
+        self._last_info = now
         active_controls = [k for k, v in self.drone_control.items() if v]
         controls_text = f"Controles activos: {', '.join(active_controls) if active_controls else 'Ninguno'}"
+        if self.hold_active:
+            controls_text += (f"\nPiloto automático: prof. {self.hold.depth_ref:.1f} m, "
+                              f"rumbo {np.rad2deg(self.hold.heading_ref):.0f}°")
         
-        info_text = (f"Tiempo: {self.t:.1f}s\n"
+        speed = "máx" if self.time_scale is None else f"x{self.time_scale:g}"
+        info_text = (f"Tiempo: {self.t:.1f}s ({speed})\n"
                     f"Posición Global: ({self.x:.2f}, {self.y:.2f}, {self.z:.2f})\n"
                     f"Velocidad Local: ({self.vx:.2f}, {self.vy:.2f}, {self.vz:.2f}) m/s\n"
                     f"Orientación: Pitch={np.rad2deg(self.theta):.1f}°, Yaw={np.rad2deg(self.beta):.1f}°\n"
@@ -302,29 +439,12 @@ class ROUVDynamicControlSimulator:
                     f"Momento Yaw: {M_yaw:.2f} N·m\n"
                     f"Fuerzas Totales: F1={self.F1:.1f}N, F2={self.F2:.1f}N, ΔF={self.F1-self.F2:.1f}N\n"
                     f"{controls_text}")
-        self.ax.text2D(0.02, 0.95, info_text, transform=self.ax.transAxes, 
-                      bbox=dict(facecolor='white', alpha=0.85), fontsize=8)
-        self.ax.legend()
+        self.info_box.set_text(info_text)
+        self._redraw(info_changed)
 
     def update_reference_vectors(self):
-        """Actualiza los vectores de referencia del sistema local"""
-        # Matriz de rotación para yaw (eje Z)
-        R_yaw = np.array([
-            [np.cos(self.beta), -np.sin(self.beta), 0],
-            [np.sin(self.beta), np.cos(self.beta), 0],
-            [0, 0, 1]
-        ])
-        
-        # Matriz de rotación para pitch (eje Y)
-        R_pitch = np.array([
-            [np.cos(self.theta), 0, np.sin(self.theta)],
-            [0, 1, 0],
-            [-np.sin(self.theta), 0, np.cos(self.theta)]
-        ])
-        
-        # Rotación combinada (primero yaw, luego pitch)
-        R_combined = np.dot(R_pitch, R_yaw)
-        self.reference_vectors = R_combined.T
+        """Actualiza los vectores de referencia del sistema local (yaw y luego pitch)"""
+        self.reference_vectors = reference_vectors(self.sim.state)
 
     def local_to_global(self, local_vector):
         """Convierte un vector del sistema local al global"""
@@ -334,57 +454,91 @@ class ROUVDynamicControlSimulator:
         """Convierte un vector del sistema global al local"""
         return np.dot(self.reference_vectors.T, global_vector)
 
-    def _draw_relative_system(self):
-        """Dibuja el ROV y su sistema de referencia local"""
-        # Dibujar el ROV
-        self.ax.scatter(self.x, self.y, self.z, color='red', s=100, label='ROUV')
+    def _build_scene(self):
+        """Crea una sola vez la trayectoria, el ROUV, los ejes locales y el cuadro de
+        información; ejes, límites y leyenda quedan fijos."""
+        self.trail_line, = self.ax.plot([], [], [], 'g-', alpha=0.5, label='Trayectoria')
+        self.rouv_marker, = self.ax.plot([self.x], [self.y], [self.z], 'o', color='red',
+                                         markersize=10, label='ROUV')
+        self.hull_artist = None
+        if self.hull is not None:
+            # El punto queda como centro de empuje, encima del casco
+            self.rouv_marker.set_markersize(4)
+            self.hull_artist = Hull3D(*self.hull, scale=self.hull_scale)
+            self.ax.add_collection3d(self.hull_artist)
+        
+        # Eje X (Forward - Rojo), Eje Y (Starboard - Verde), Eje Z (Down - Azul)
+        self.axis_arrows = []
+        for color, label in (("r", 'Frente'), ("g", 'Lateral'), ("b", 'Eje Z')):
+            arrow = Arrow3D([0, 0], [0, 0], [0, 0], mutation_scale=15, lw=2,
+                            arrowstyle="-|>", color=color, label=label)
+            self.ax.add_artist(arrow)
+            self.axis_arrows.append(arrow)
+        
+        self.info_box = self.ax.text2D(0.02, 0.95, "", transform=self.ax.transAxes,
+                                       bbox=dict(facecolor='white', alpha=0.85), fontsize=8)
+        self.ax.legend()
+        self._update_relative_system()
+        
+        # Con blitting los artistas que se mueven quedan fuera del dibujo normal: se
+        # guarda el fondo estático después de cada dibujo completo (inicio, rotación
+        # con el mouse, sliders, cambio de tamaño) y por frame solo se redibujan ellos
+        self._moving = [self.trail_line, self.rouv_marker, *self.axis_arrows]
+        if self.hull_artist is not None:
+            self._moving.insert(1, self.hull_artist)
+        self._animated = [self.info_box, *self._moving]
+        self._blit = self.fig.canvas.supports_blit
+        self._draw_cid = None
+        if self._blit:
+            for artist in self._animated:
+                artist.set_animated(True)
+            self._draw_cid = self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _update_relative_system(self):
+        """Mueve el ROV y su sistema de referencia local a la pose actual"""
+        self.rouv_marker.set_data_3d([self.x], [self.y], [self.z])
+        if self.hull_artist is not None:
+            self.hull_artist.set_pose((self.x, self.y, self.z), self.reference_vectors)
         
         # Longitud de los ejes de referencia
         axis_length = 1.0
         
-        # Dibujar ejes del sistema local
-        x_axis = self.local_to_global(np.array([axis_length, 0, 0]))
-        y_axis = self.local_to_global(np.array([0, axis_length, 0]))
-        z_axis = self.local_to_global(np.array([0, 0, axis_length]))
-        
-        # Flechas para los ejes locales
-        class Arrow3D(FancyArrowPatch):
-            def __init__(self, xs, ys, zs, *args, **kwargs):
-                super().__init__((0,0), (0,0), *args, **kwargs)
-                self._verts3d = xs, ys, zs
-
-            def do_3d_projection(self, renderer=None):
-                xs3d, ys3d, zs3d = self._verts3d
-                xs, ys, zs = proj3d.proj_transform(xs3d, ys3d, zs3d, self.axes.M)
-                self.set_positions((xs[0],ys[0]),(xs[1],ys[1]))
-                return min(zs)
-        
-        # Eje X (Forward - Rojo)
-        arrow_x = Arrow3D(
-            [self.x, self.x + x_axis[0]],
-            [self.y, self.y + x_axis[1]],
-            [self.z, self.z + x_axis[2]],
-            mutation_scale=15, lw=2, arrowstyle="-|>", color="r", label='Frente'
-        )
-        self.ax.add_artist(arrow_x)
-        
-        # Eje Y (Starboard - Verde)
-        arrow_y = Arrow3D(
-            [self.x, self.x + y_axis[0]],
-            [self.y, self.y + y_axis[1]],
-            [self.z, self.z + z_axis[2]],
-            mutation_scale=15, lw=2, arrowstyle="-|>", color="g", label='Lateral'
-        )
-        self.ax.add_artist(arrow_y)
-        
-        # Eje Z (Down - Azul)
-        arrow_z = Arrow3D(
-            [self.x, self.x + z_axis[0]],
-            [self.y, self.y + z_axis[1]],
-            [self.z, self.z + z_axis[2]],
-            mutation_scale=15, lw=2, arrowstyle="-|>", color="b", label='Eje Z'
-        )
-        self.ax.add_artist(arrow_z)
+        # Ejes del sistema local (columnas de la rotación) desde la posición del ROUV
+        for arrow, axis in zip(self.axis_arrows, self.reference_vectors.T * axis_length):
+            arrow.set_data_3d([self.x, self.x + axis[0]],
+                              [self.y, self.y + axis[1]],
+                              [self.z, self.z + axis[2]])
+
+    def _on_draw(self, event):
+        """Tras un dibujo completo guarda el fondo y dibuja encima lo animado."""
+        # Los ejes y, hacia arriba, hasta el borde: el cuadro de información sobresale
+        box = self.ax.bbox
+        self._region = Bbox.from_extents(box.x0, box.y0, box.x1, self.fig.bbox.y1)
+        self._background = self.fig.canvas.copy_from_bbox(self._region)
+        self._info_background = None
+        for artist in self._animated:
+            self.ax.draw_artist(artist)
+
+    def _redraw(self, info_changed):
+        """Redibuja solo lo que cambió; sin blitting (o antes del primer dibujo) pide
+        un dibujo completo.
+
+        Hay dos capas guardadas: el fondo estático y el fondo con el cuadro de
+        información, que solo se rehace cuando cambia el texto. Por frame se restaura
+        la segunda y se dibujan encima la trayectoria, el ROUV y sus ejes."""
+        canvas = self.fig.canvas
+        if not self._blit or self._background is None:
+            canvas.draw_idle()
+            return
+        if info_changed or self._info_background is None:
+            canvas.restore_region(self._background)
+            self.ax.draw_artist(self.info_box)
+            self._info_background = canvas.copy_from_bbox(self._region)
+        else:
+            canvas.restore_region(self._info_background)
+        for artist in self._moving:
+            self.ax.draw_artist(artist)
+        canvas.blit(self._region)
 
     def _reset_simulation(self, event):
         self.reset_state()
@@ -393,18 +547,113 @@ class ROUVDynamicControlSimulator:
         self.slider_F34.reset()
         self.slider_b.reset()
         self.slider_pitch.reset()
-        self.history = []
-        self.orientation_history = []
+        self.hold_active = False
         # Resetear también los controles del dron
         for key in self.drone_control:
             self.drone_control[key] = False
 
     def run(self):
-        self.ani = FuncAnimation(self.fig, self.update, frames=200,
-                               interval=100, blit=False)
+        # Un timer en lugar de FuncAnimation, que con blit=False redibuja toda la
+        # figura (sliders y botones incluidos) en cada frame
+        self.timer = self.fig.canvas.new_timer(interval=1000 / self.render_fps)
+        self.timer.add_callback(self.update, None)
+        self.timer.start()
         plt.show()
 
 # Ejecutar simulación
 if __name__ == "__main__":
-    sim_dynamic = ROUVDynamicControlSimulator()
-    sim_dynamic.run()
+    parser = argparse.ArgumentParser(description="Simulador dinámico del ROUV")
+    parser.add_argument("--velocidad", default="1",
+                        help="factor respecto del tiempo real, o 'max' (lo más rápido posible)")
+    parser.add_argument("--fps-render", type=float, default=10, help="frames dibujados por segundo")
+    parser.add_argument("--dt", type=float, default=0.03, help="paso fijo de la física (s)")
+    parser.add_argument("--integrador", choices=INTEGRATORS, default="euler",
+                        help="rk4 o rk45 permiten un --dt mucho mayor con la misma precisión")
+    parser.add_argument("--historia", type=int, default=3000,
+                        help="pasos recientes de la trayectoria guardados completos")
+    parser.add_argument("--archivo-historia", type=int, default=2000,
+                        help="puntos diezmados del recorrido anterior (0: solo la ventana)")
+    parser.add_argument("--malla", help="STL del casco: se dibuja en lugar del punto")
+    parser.add_argument("--ejes-malla", default="x,y,z",
+                        help="eje del STL para x (frente), y, z del vehículo, p. ej. y,-x,z")
+    parser.add_argument("--escala-malla", type=float, default=1e-3,
+                        help="unidades del STL -> m (1e-3 para mm)")
+    parser.add_argument("--caras-malla", type=int, default=1500,
+                        help="caras de la malla diezmada que se dibuja")
+    parser.add_argument("--agrandar-malla", type=float, default=1.0,
+                        help="factor visual del casco respecto del entorno")
+    parser.add_argument("--geometria", action="store_true",
+                        help="masa, inercias y empuje a partir de --malla")
+    parser.add_argument("--masa", type=float,
+                        help="kg, con --geometria (por defecto, flotabilidad neutra)")
+    parser.add_argument("--grabar", nargs="?", const="",
+                        help="grabar la trayectoria (sin ruta: trayectorias/ con fecha y hora)")
+    parser.add_argument("--comprimir", action="store_true", help="comprimir la grabación")
+    parser.add_argument("--sin-grafica", action="store_true",
+                        help="correr solo la física, sin ventana")
+    parser.add_argument("--duracion", type=float, default=60.0,
+                        help="segundos simulados en modo sin gráfica")
+    parser.add_argument("--F1", type=float, default=0.0)
+    parser.add_argument("--F2", type=float, default=0.0)
+    parser.add_argument("--F34", type=float, default=0.0)
+    parser.add_argument("--flotabilidad", type=float, default=0.0)
+    parser.add_argument("--pitch", type=float, default=0.0, help="grados")
+    args = parser.parse_args()
+    time_scale = None if args.velocidad == "max" else float(args.velocidad)
+
+    hydro = None
+    if args.geometria:
+        if not args.malla:
+            parser.error("--geometria necesita --malla")
+        hydro = hidrostatica(propiedades_masa(triangulos(args.malla, args.escala_malla,
+                                                         args.ejes_malla)), args.masa)
+        print(f"Desde la malla: m={hydro['m']:.2f} kg, Iy={hydro['Iy']:.4f} kg·m², "
+              f"Iz={hydro['Iz']:.4f} kg·m², empuje {hydro['b_neutral']:.1f} N "
+              f"(neto {hydro['buoyancy_offset']:+.1f} N)")
+
+    recorder = None
+    if args.grabar is not None:
+        ruta = args.grabar or ruta_trayectoria_por_defecto()
+        # Los bloques también se vacían por tiempo: en tiempo real, a 33 pasos/s, un
+        # bloque lleno tardaría más de media hora en llegar al disco
+        recorder = EscritorTrayectoria(ruta, comprimir=args.comprimir,
+                                       metadatos={"dt": args.dt, "integrador": args.integrador,
+                                                  "malla": args.malla, "geometria": hydro},
+                                       intervalo_vaciado=2.0)
+        print(f"Grabando la trayectoria en {ruta}")
+
+    # Lo grabado se cierra aunque la simulación termine con una excepción
+    try:
+        if args.sin_grafica:
+            params = DEFAULT_PARAMS
+            delta_b = args.flotabilidad
+            if hydro is not None:
+                params = params._replace(m=hydro["m"], Iy=hydro["Iy"], Iz=hydro["Iz"])
+                delta_b += hydro["buoyancy_offset"]
+            sim = FixedStepSimulation(dt=args.dt, params=params, integrator=args.integrador)
+            inputs = make_inputs(args.F1, args.F2, args.F34 / 2, args.F34 / 2, delta_b,
+                                 np.deg2rad(args.pitch))
+            inicio = time.perf_counter()
+            run_headless(sim, args.duracion, inputs, time_scale=time_scale,
+                         on_step=registrador(recorder, inputs) if recorder else None)
+            real = time.perf_counter() - inicio
+            x, y, z = sim.state[:3]
+            print(f"{sim.steps} pasos, {sim.t:.1f} s simulados en {real:.3f} s reales "
+                  f"(x{sim.t / real:.0f})")
+            print(f"Posición final: ({x:.2f}, {y:.2f}, {z:.2f})")
+        else:
+            hull = None
+            if args.malla:
+                hull = malla_visual(args.malla, args.caras_malla, args.escala_malla,
+                                    args.ejes_malla)
+            sim_dynamic = ROUVDynamicControlSimulator(time_scale=time_scale,
+                                                      render_fps=args.fps_render, dt=args.dt,
+                                                      integrator=args.integrador,
+                                                      max_history=args.historia,
+                                                      archive_history=args.archivo_historia,
+                                                      hull=hull, hull_scale=args.agrandar_malla,
+                                                      hydro=hydro, recorder=recorder)
+            sim_dynamic.run()
+    finally:
+        if recorder is not None:
+            recorder.cerrar()
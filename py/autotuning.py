@@ -0,0 +1,244 @@
+"""Ajuste automático de los PID de profundidad y rumbo del ROUV.
+
+Evalúa miles de juegos de ganancias a la vez: cada candidato es un vehículo de un
+lote que responde a un escalón de referencia (profundidad o rumbo) con
+`HoldController`, y los lotes se reparten en un pool de procesos. De cada uno se
+mide el sobrepaso, el tiempo de establecimiento y el esfuerzo de los
+propulsores; el resultado son las mejores ganancias y el frente de Pareto.
+Con `--malla` el vehículo usa la masa y la inercia calculadas desde el STL.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from dinamica_rouv import (BETA, DEFAULT_PARAMS, F1, F2, F3, Z, FixedStepSimulation,
+                           HoldController, PIDGains, initial_state)
+from malla_stl import hidrostatica, propiedades_masa, triangulos
+
+
+LAZOS = ("profundidad", "rumbo")
+OBJETIVOS = ("sobrepaso", "establecimiento", "esfuerzo")
+
+# Rangos de búsqueda (log-uniformes) de kp, ki y kd por lazo
+RANGOS = {
+    "profundidad": ((0.5, 200.0), (0.01, 50.0), (0.1, 200.0)),
+    "rumbo": ((0.1, 100.0), (0.001, 20.0), (0.05, 50.0)),
+}
+
+
+class PruebaEscalon(NamedTuple):
+    """Respuesta al escalón con la que se califica cada juego de ganancias."""
+    duracion: float = 30.0
+    dt: float = 0.05
+    profundidad_inicial: float = 2.0    # m
+    escalon_profundidad: float = 3.0    # m hacia abajo
+    escalon_rumbo: float = 90.0         # grados
+    avance: float = 5.0                 # empuje de F1 y F2 durante la prueba (N)
+    flotabilidad: float = 2.0           # perturbación: flotabilidad neta positiva (N)
+    banda: float = 0.05                 # establecimiento: dentro del ±5 % del escalón
+    max_thrust: float = 20.0
+
+
+def muestrear(n, lazo, rng=None):
+    """`n` juegos (kp, ki, kd) log-uniformes dentro de `RANGOS[lazo]` -> (n, 3)."""
+    rng = np.random.default_rng(rng)
+    bajos, altos = np.log(np.array(RANGOS[lazo])).T
+    return np.exp(rng.uniform(bajos, altos, (n, 3)))
+
+
+def evaluar(ganancias, lazo, prueba=PruebaEscalon(), params=DEFAULT_PARAMS):
+    """Sobrepaso (% del escalón), establecimiento (s; inf si no se establece) y
+    esfuerzo (∫|u| dt en N·s) de cada juego de ganancias (k, 3)."""
+    ganancias = np.asarray(ganancias, dtype=np.float64)
+    k = len(ganancias)
+    pid = PIDGains(*ganancias.T)
+    inicio = -prueba.profundidad_inicial
+    if lazo == "profundidad":
+        controlador = HoldController(prueba.dt, depth_gains=pid,
+                                     depth_ref=prueba.profundidad_inicial + prueba.escalon_profundidad)
+        escalon = prueba.escalon_profundidad
+    else:
+        controlador = HoldController(prueba.dt, heading_gains=pid,
+                                     heading_ref=math.radians(prueba.escalon_rumbo))
+        escalon = math.radians(prueba.escalon_rumbo)
+    controlador.forward = prueba.avance
+    controlador.delta_b = prueba.flotabilidad
+    controlador.max_thrust = prueba.max_thrust
+    if lazo == "rumbo":
+        # Sin lazo de profundidad la flotabilidad lo sacaría del agua: que no afecte
+        controlador.delta_b = 0.0
+
+    maximo = np.zeros(k)
+    ultimo_fuera = np.zeros(k)
+    esfuerzo = np.zeros(k)
+
+    def registrar(t, state):
+        if lazo == "profundidad":
+            avance = (inicio - state[:, Z]) / escalon
+            u = 2 * controlador.last_inputs[:, F3]
+        else:
+            avance = state[:, BETA] / escalon
+            u = controlador.last_inputs[:, F1] - controlador.last_inputs[:, F2]
+        np.maximum(maximo, avance, out=maximo)
+        ultimo_fuera[np.abs(avance - 1.0) > prueba.banda] = t
+        esfuerzo[:] += np.abs(u) * prueba.dt
+
+    estado = np.tile(initial_state(z=inicio), (k, 1))
+    sim = FixedStepSimulation(estado, prueba.dt, params, max_substeps=10**9)
+    with np.errstate(all="ignore"):
+        sim.advance(round(prueba.duracion / prueba.dt) * prueba.dt, controlador, registrar)
+
+    sobrepaso = 100 * np.maximum(maximo - 1.0, 0.0)
+    establecimiento = np.where(ultimo_fuera >= prueba.duracion - prueba.dt / 2, np.inf,
+                               ultimo_fuera)
+    invalidos = ~np.isfinite(sim.state).all(axis=1)
+    sobrepaso[invalidos] = establecimiento[invalidos] = esfuerzo[invalidos] = np.inf
+    return {"sobrepaso": sobrepaso, "establecimiento": establecimiento, "esfuerzo": esfuerzo}
+
+
+def evaluar_en_paralelo(ganancias, lazo, prueba=PruebaEscalon(), params=DEFAULT_PARAMS,
+                        procesos=None):
+    """`evaluar` repartido en bloques entre procesos (por defecto, uno por núcleo)."""
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        return evaluar(ganancias, lazo, prueba, params)
+    bloques = np.array_split(ganancias, procesos)
+    with ProcessPoolExecutor(procesos) as pool:
+        partes = list(pool.map(evaluar, bloques, [lazo] * procesos, [prueba] * procesos,
+                               [params] * procesos))
+    return {nombre: np.concatenate([p[nombre] for p in partes]) for nombre in OBJETIVOS}
+
+
+def frente_pareto(objetivos, bloque=1024):
+    """Máscara de los puntos no dominados de `objetivos` (n, m), todos a minimizar."""
+    objetivos = np.asarray(objetivos, dtype=np.float64)
+    no_dominado = np.isfinite(objetivos).all(axis=1)
+    candidatos = objetivos[no_dominado]
+    for inicio in range(0, len(objetivos), bloque):
+        filas = objetivos[inicio:inicio + bloque, None, :]
+        dominado = ((candidatos <= filas).all(axis=2) & (candidatos < filas).any(axis=2)).any(axis=1)
+        no_dominado[inicio:inicio + bloque] &= ~dominado
+    return no_dominado
+
+
+def elegir(resultados, max_sobrepaso=5.0, max_esfuerzo=None):
+    """Índice del candidato que se establece antes con sobrepaso y esfuerzo acotados;
+    si ninguno cumple, el de menor sobrepaso."""
+    validos = resultados["sobrepaso"] <= max_sobrepaso
+    if max_esfuerzo is not None:
+        validos &= resultados["esfuerzo"] <= max_esfuerzo
+    validos &= np.isfinite(resultados["establecimiento"])
+    if not validos.any():
+        return int(np.argmin(resultados["sobrepaso"]))
+    establecimiento = np.where(validos, resultados["establecimiento"], np.inf)
+    mejor = establecimiento.min()
+    # Entre los que empatan (mismo paso de tiempo), el de menor esfuerzo
+    empatados = establecimiento <= mejor + 1e-9
+    return int(np.argmin(np.where(empatados, resultados["esfuerzo"], np.inf)))
+
+
+def graficar_pareto(salidas, archivo):
+    """Establecimiento vs esfuerzo de cada lazo, coloreado por sobrepaso."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ejes = plt.subplots(1, len(salidas), figsize=(6 * len(salidas), 4.5), squeeze=False)
+    for ax, (lazo, s) in zip(ejes[0], salidas.items()):
+        r, frente, mejor = s["resultados"], s["frente"], s["mejor"]
+        finitos = np.isfinite(r["establecimiento"]) & np.isfinite(r["esfuerzo"])
+        ax.scatter(r["esfuerzo"][finitos], r["establecimiento"][finitos], s=4,
+                   color="lightgray", label="candidatos")
+        orden = np.argsort(r["esfuerzo"][frente])
+        puntos = ax.scatter(r["esfuerzo"][frente][orden], r["establecimiento"][frente][orden],
+                            c=np.minimum(r["sobrepaso"][frente][orden], 50), s=14,
+                            cmap="viridis", label="frente de Pareto")
+        ax.plot(r["esfuerzo"][mejor], r["establecimiento"][mejor], "r*", markersize=14,
+                label="elegido")
+        fig.colorbar(puntos, ax=ax, label="sobrepaso (%)")
+        ax.set_xscale("log")
+        ax.set_xlabel("esfuerzo (N·s)")
+        ax.set_ylabel("establecimiento (s)")
+        ax.set_title(f"Lazo de {lazo}")
+        ax.legend(loc="upper right", fontsize=8)
+    fig.tight_layout()
+    fig.savefig(archivo, dpi=120)
+    plt.close(fig)
+
+
+def fila_json(salida, resultados, i):
+    """Ganancias y objetivos del candidato `i` de un lazo, para el JSON de salida."""
+    kp, ki, kd = (float(g) for g in salida["ganancias"][i])
+    return {"kp": kp, "ki": ki, "kd": kd, **{o: float(resultados[o][i]) for o in OBJETIVOS}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidatos", type=int, default=4000, help="por lazo")
+    parser.add_argument("--lazos", default=",".join(LAZOS))
+    parser.add_argument("--duracion", type=float, default=PruebaEscalon().duracion)
+    parser.add_argument("--dt", type=float, default=PruebaEscalon().dt)
+    parser.add_argument("--max-sobrepaso", type=float, default=5.0, help="%%")
+    parser.add_argument("--max-esfuerzo", type=float, help="N·s")
+    parser.add_argument("--procesos", type=int, help="por defecto, uno por núcleo")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="guardar ganancias elegidas y frentes en JSON")
+    parser.add_argument("--grafica", help="guardar las curvas de Pareto en PNG")
+    parser.add_argument("--malla", help="STL binario: masa e inercia desde la geometría")
+    parser.add_argument("--ejes-malla", default="x,y,z",
+                        help="eje del STL para x, y, z del vehículo, p. ej. y,-x,z")
+    parser.add_argument("--escala-malla", type=float, default=1e-3,
+                        help="unidades del STL -> m")
+    parser.add_argument("--masa", type=float,
+                        help="kg, con --malla (por defecto, flotabilidad neutra)")
+    args = parser.parse_args()
+
+    prueba = PruebaEscalon(duracion=args.duracion, dt=args.dt)
+    params = DEFAULT_PARAMS
+    if args.malla:
+        hydro = hidrostatica(propiedades_masa(triangulos(args.malla, args.escala_malla,
+                                                         args.ejes_malla)), args.masa)
+        params = params._replace(m=hydro["m"], Iy=hydro["Iy"], Iz=hydro["Iz"],
+                                 buoyancy_offset=hydro["buoyancy_offset"])
+        print(f"Desde la malla: m={params.m:.2f} kg, Iy={params.Iy:.4f} kg·m², "
+              f"Iz={params.Iz:.4f} kg·m²")
+    salidas = {}
+    for n, lazo in enumerate(args.lazos.split(",")):
+        ganancias = muestrear(args.candidatos, lazo, args.semilla + n)
+        inicio = time.perf_counter()
+        r = evaluar_en_paralelo(ganancias, lazo, prueba, params, args.procesos)
+        segundos = time.perf_counter() - inicio
+        frente = frente_pareto(np.column_stack([r[o] for o in OBJETIVOS]))
+        mejor = elegir(r, args.max_sobrepaso, args.max_esfuerzo)
+        salidas[lazo] = {"ganancias": ganancias, "resultados": r, "frente": frente,
+                         "mejor": mejor}
+
+        kp, ki, kd = ganancias[mejor]
+        print(f"{lazo}: {len(ganancias)} candidatos en {segundos:.1f} s, "
+              f"{frente.sum()} en el frente de Pareto")
+        print(f"  mejor: kp={kp:.4g} ki={ki:.4g} kd={kd:.4g} -> sobrepaso "
+              f"{r['sobrepaso'][mejor]:.1f} %, establecimiento "
+              f"{r['establecimiento'][mejor]:.2f} s, esfuerzo {r['esfuerzo'][mejor]:.0f} N·s")
+
+    if args.salida:
+        datos = {}
+        for lazo, s in salidas.items():
+            r = s["resultados"]
+            datos[lazo] = {"mejor": fila_json(s, r, s["mejor"]),
+                           "frente": [fila_json(s, r, i) for i in np.flatnonzero(s["frente"])]}
+        datos["prueba"] = prueba._asdict()
+        datos["params"] = {"m": params.m, "Iy": params.Iy, "Iz": params.Iz}
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, indent=2)
+    if args.grafica:
+        graficar_pareto(salidas, args.grafica)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Barridos de la envolvente operativa del ROUV en un pool de procesos.
+
+Simula una grilla de comandos (F1, F2, F3+F4, flotabilidad extra y pitch) con la
+física de `dinamica_rouv` y, para cada uno, mide la velocidad y la tasa de giro
+en régimen, el tiempo hasta una profundidad objetivo y la región alcanzada dentro
+de la envolvente de `rango de operación.py` (300 m de radio, 10 m de profundidad).
+
+Los resultados se guardan en disco por hash de los parámetros físicos y de los
+ajustes de la simulación: un estudio repetido solo simula los comandos nuevos.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from dinamica_rouv import (DEFAULT_PARAMS, INPUT_SIZE, OMEGA_BETA, VX, VZ, X, Y, Z,
+                           FixedStepSimulation, ROUVParams, initial_state)
+
+
+# Columnas de un comando: como `make_inputs` pero con F3 + F4 juntos
+COLUMNAS = ("F1", "F2", "F34", "flotabilidad", "pitch")
+METRICAS = ("velocidad", "giro", "tiempo_profundidad", "tiempo_envolvente", "alcance")
+
+
+class AjustesBarrido(NamedTuple):
+    """Cómo se simula cada comando; forman parte de la clave de la caché."""
+    duracion: float = 120.0             # s simulados por comando
+    dt: float = 0.05
+    profundidad_inicial: float = 2.0    # m
+    profundidad_objetivo: float = 5.0   # m, para `tiempo_profundidad`
+    radio: float = 300.0                # envolvente: distancia máxima a la costa (m)
+    profundidad_max: float = 10.0       # envolvente: profundidad máxima (m)
+    celda_distancia: float = 10.0       # resolución de la región alcanzada (m)
+    celda_profundidad: float = 0.5
+
+
+def grilla(F1, F2, F34=(0.0,), flotabilidad=(0.0,), pitch=(0.0,)):
+    """Producto cartesiano de los valores dados -> comandos (M, 5); pitch en rad."""
+    ejes = np.meshgrid(*(np.atleast_1d(np.asarray(v, dtype=np.float64))
+                         for v in (F1, F2, F34, flotabilidad, pitch)), indexing="ij")
+    return np.stack([e.ravel() for e in ejes], axis=1)
+
+
+def clave_cache(params=DEFAULT_PARAMS, ajustes=AjustesBarrido()):
+    """Hash corto de los parámetros físicos (m, Iz, Dx, Dz, l, phi y el resto de
+    `ROUVParams`) y de los ajustes de simulación."""
+    datos = {"params": {k: float(v) for k, v in params._asdict().items()},
+             "ajustes": ajustes._asdict()}
+    texto = json.dumps(datos, sort_keys=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def forma_region(ajustes):
+    """(celdas de distancia, celdas de profundidad) de la región alcanzada."""
+    return (math.ceil(ajustes.radio / ajustes.celda_distancia),
+            math.ceil(ajustes.profundidad_max / ajustes.celda_profundidad))
+
+
+def simular_bloque(comandos, params=DEFAULT_PARAMS, ajustes=AjustesBarrido()):
+    """Simula un bloque de comandos (k, 5) como un lote y devuelve sus métricas.
+
+    - velocidad: rapidez final (m/s), en régimen si `duracion` alcanza.
+    - giro: tasa de giro final (°/s).
+    - tiempo_profundidad: s hasta llegar a `profundidad_objetivo` (NaN si nunca).
+    - tiempo_envolvente: s hasta salir de la envolvente (`duracion` si no sale).
+    - alcance: distancia máxima a la costa sin haber salido (m).
+    - region: celdas (distancia, profundidad) visitadas sin haber salido.
+    """
+    comandos = np.asarray(comandos, dtype=np.float64)
+    k = len(comandos)
+    inputs = np.empty((k, INPUT_SIZE))
+    inputs[:, 0], inputs[:, 1] = comandos[:, 0], comandos[:, 1]
+    inputs[:, 2] = inputs[:, 3] = comandos[:, 2] / 2
+    inputs[:, 4], inputs[:, 5] = comandos[:, 3], comandos[:, 4]
+
+    n_r, n_z = forma_region(ajustes)
+    tiempo_profundidad = np.full(k, np.nan)
+    tiempo_envolvente = np.full(k, ajustes.duracion)
+    adentro = np.ones(k, dtype=bool)
+    alcance = np.zeros(k)
+    region = np.zeros((k, n_r, n_z), dtype=bool)
+    filas = np.arange(k)
+
+    def registrar(t, state):
+        x, y, z = state[:, X], state[:, Y], state[:, Z]
+        r = np.hypot(x, y)
+        # Salir una vez cuenta como salir: lo que siga ya no es alcanzable
+        sigue = adentro & (r <= ajustes.radio) & (z <= 0.0) & (z >= -ajustes.profundidad_max)
+        tiempo_envolvente[adentro & ~sigue] = t
+        adentro[:] = sigue
+        np.maximum(alcance, np.where(adentro, r, 0.0), out=alcance)
+        i_r = np.minimum((r / ajustes.celda_distancia).astype(np.intp), n_r - 1)
+        i_z = np.clip((-z / ajustes.celda_profundidad).astype(np.intp), 0, n_z - 1)
+        region[filas[adentro], i_r[adentro], i_z[adentro]] = True
+        llego = np.isnan(tiempo_profundidad) & (z <= -ajustes.profundidad_objetivo)
+        tiempo_profundidad[llego] = t
+
+    estado = np.tile(initial_state(z=-ajustes.profundidad_inicial), (k, 1))
+    sim = FixedStepSimulation(estado, ajustes.dt, params, max_substeps=10**9)
+    registrar(0.0, sim.state)
+    sim.advance(round(ajustes.duracion / ajustes.dt) * ajustes.dt, inputs, registrar)
+
+    return {"velocidad": np.linalg.norm(sim.state[:, VX:VZ + 1], axis=1),
+            "giro": np.rad2deg(sim.state[:, OMEGA_BETA]),
+            "tiempo_profundidad": tiempo_profundidad,
+            "tiempo_envolvente": tiempo_envolvente,
+            "alcance": alcance,
+            "region": region}
+
+
+def _cargar_cache(ruta):
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta) as datos:
+        return {nombre: datos[nombre] for nombre in datos.files}
+
+
+def _guardar_cache(ruta, resultados):
+    """Escritura atómica: un estudio interrumpido no deja la caché a medias."""
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = ruta + ".tmp.npz"
+    np.savez_compressed(temporal, **resultados)
+    os.replace(temporal, ruta)
+
+
+def _llaves(comandos):
+    return [tuple(fila) for fila in np.round(comandos, 9)]
+
+
+def barrer(comandos, params=DEFAULT_PARAMS, ajustes=AjustesBarrido(), procesos=None,
+           carpeta_cache="cache_barridos", bloque=None):
+    """Métricas de cada comando (M, 5), simulando solo los que no estén en caché.
+
+    Los comandos faltantes se reparten en bloques entre `procesos` procesos (por
+    defecto, uno por núcleo); cada bloque se simula vectorizado. Devuelve un dict
+    con `comandos`, las `METRICAS` y `region` en el mismo orden de `comandos`, y
+    `simulados` (cuántos no estaban en caché).
+    """
+    comandos = np.atleast_2d(np.asarray(comandos, dtype=np.float64))
+    ruta = None
+    guardados = None
+    if carpeta_cache:
+        ruta = os.path.join(carpeta_cache, clave_cache(params, ajustes) + ".npz")
+        guardados = _cargar_cache(ruta)
+
+    indice = {}
+    if guardados is not None:
+        indice = {llave: i for i, llave in enumerate(_llaves(guardados["comandos"]))}
+    llaves = _llaves(comandos)
+    faltan, vistas = [], set()
+    for i, llave in enumerate(llaves):
+        if llave not in indice and llave not in vistas:
+            vistas.add(llave)
+            faltan.append(i)
+
+    nuevos = None
+    if faltan:
+        pendientes = comandos[faltan]
+        procesos = procesos or os.cpu_count() or 1
+        bloque = bloque or max(16, math.ceil(len(pendientes) / (4 * procesos)))
+        bloques = [pendientes[i:i + bloque] for i in range(0, len(pendientes), bloque)]
+        if procesos == 1 or len(bloques) == 1:
+            partes = [simular_bloque(b, params, ajustes) for b in bloques]
+        else:
+            with ProcessPoolExecutor(procesos) as pool:
+                partes = list(pool.map(simular_bloque, bloques, [params] * len(bloques),
+                                       [ajustes] * len(bloques)))
+        nuevos = {nombre: np.concatenate([p[nombre] for p in partes])
+                  for nombre in (*METRICAS, "region")}
+        nuevos["comandos"] = pendientes
+
+        if guardados is None:
+            guardados = nuevos
+        else:
+            guardados = {nombre: np.concatenate((guardados[nombre], nuevos[nombre]))
+                         for nombre in guardados}
+        if ruta is not None:
+            _guardar_cache(ruta, guardados)
+        indice = {llave: i for i, llave in enumerate(_llaves(guardados["comandos"]))}
+
+    orden = np.array([indice[llave] for llave in llaves], dtype=np.intp)
+    resultados = {nombre: guardados[nombre][orden] for nombre in (*METRICAS, "region")}
+    resultados["comandos"] = comandos
+    resultados["simulados"] = len(faltan)
+    return resultados
+
+
+def graficar_region(resultados, ajustes, archivo):
+    """Vista lateral (distancia vs profundidad) de cuántos comandos alcanzan cada celda."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    # Escala logarítmica: la celda de partida la alcanzan todos; las no alcanzadas en blanco
+    cuenta = np.ma.masked_equal(resultados["region"].sum(axis=0), 0)
+    fig, ax = plt.subplots(figsize=(12, 4))
+    imagen = ax.imshow(cuenta.T, origin="upper", aspect="auto", cmap="viridis", norm=LogNorm(),
+                       extent=(0, ajustes.radio, -ajustes.profundidad_max, 0))
+    fig.colorbar(imagen, ax=ax, label="comandos que la alcanzan")
+    ax.set_xlabel("Distancia desde costa (m)")
+    ax.set_ylabel("Profundidad (m)")
+    ax.set_title(f"Región alcanzable ({len(resultados['comandos'])} comandos, "
+                 f"{ajustes.duracion:g} s)")
+    fig.tight_layout()
+    fig.savefig(archivo, dpi=120)
+    plt.close(fig)
+
+
+def _valores(texto):
+    """'0,5,10' o 'inicio:fin:n' (n valores equiespaciados)."""
+    if ":" in texto:
+        inicio, fin, n = texto.split(":")
+        return np.linspace(float(inicio), float(fin), int(n))
+    return np.array([float(v) for v in texto.split(",")])
+
+
+def main():
+    defecto = AjustesBarrido()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--F1", default="-20:20:9",
+                        help="N; lista o inicio:fin:n (negativos con =, p. ej. --F1=-20:20:9)")
+    parser.add_argument("--F2", default="-20:20:9")
+    parser.add_argument("--F34", default="-20:20:5")
+    parser.add_argument("--flotabilidad", default="-4:4:3", help="N")
+    parser.add_argument("--pitch", default="-30:30:5", help="grados")
+    parser.add_argument("--duracion", type=float, default=defecto.duracion)
+    parser.add_argument("--dt", type=float, default=defecto.dt)
+    parser.add_argument("--objetivo", type=float, default=defecto.profundidad_objetivo,
+                        help="profundidad para medir el tiempo de descenso (m)")
+    for nombre in ("m", "Iz", "Dx", "Dz", "l"):
+        parser.add_argument(f"--{nombre}", type=float, default=getattr(DEFAULT_PARAMS, nombre))
+    parser.add_argument("--phi", type=float, default=np.rad2deg(DEFAULT_PARAMS.phi),
+                        help="grados")
+    parser.add_argument("--procesos", type=int, help="por defecto, uno por núcleo")
+    parser.add_argument("--cache", default="cache_barridos",
+                        help="carpeta de la caché ('' para no usarla)")
+    parser.add_argument("--salida", help="guardar las métricas por comando en CSV")
+    parser.add_argument("--grafica", help="guardar la región alcanzable en PNG")
+    args = parser.parse_args()
+
+    params = ROUVParams(m=args.m, Iz=args.Iz, Dx=args.Dx, Dz=args.Dz, l=args.l,
+                        phi=np.deg2rad(args.phi))
+    ajustes = AjustesBarrido(duracion=args.duracion, dt=args.dt,
+                             profundidad_objetivo=args.objetivo)
+    comandos = grilla(_valores(args.F1), _valores(args.F2), _valores(args.F34),
+                      _valores(args.flotabilidad), np.deg2rad(_valores(args.pitch)))
+
+    inicio = time.perf_counter()
+    r = barrer(comandos, params, ajustes, args.procesos, args.cache)
+    segundos = time.perf_counter() - inicio
+    print(f"{len(comandos)} comandos, {r['simulados']} simulados en {segundos:.1f} s "
+          f"(caché {clave_cache(params, ajustes)})")
+
+    giro = np.abs(r["giro"])
+    llegan = ~np.isnan(r["tiempo_profundidad"])
+    quedan = r["tiempo_envolvente"] >= ajustes.duracion
+    print(f"Velocidad máxima: {r['velocidad'].max():.2f} m/s")
+    print(f"Giro máximo: {giro.max():.1f} °/s")
+    if llegan.any():
+        print(f"Descenso a {ajustes.profundidad_objetivo:g} m: {llegan.sum()} comandos, "
+              f"el más rápido en {np.nanmin(r['tiempo_profundidad']):.1f} s")
+    print(f"Alcance máximo dentro de la envolvente: {r['alcance'].max():.0f} m; "
+          f"{quedan.sum()} comandos no salen en {ajustes.duracion:g} s")
+    print(f"Celdas alcanzables: {r['region'].any(axis=0).mean():.0%} de la envolvente")
+
+    if args.salida:
+        tabla = np.column_stack([r["comandos"][:, :4], np.rad2deg(r["comandos"][:, 4])]
+                                + [r[m] for m in METRICAS])
+        np.savetxt(args.salida, tabla, delimiter=",", fmt="%.6g",
+                   header=",".join(COLUMNAS + METRICAS), comments="")
+    if args.grafica:
+        graficar_region(r, ajustes, args.grafica)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Benchmark del texto del HUD: putText en cada frame vs máscaras cacheadas vs atlas de glifos.
+
+Simula los textos de `dibujar_interfaz` (reloj, temporizador, ocho datos y FPS) con
+dos ritmos de cambio: el realista (reloj y FPS a 1 Hz, telemetría a 5 Hz, video a
+30 FPS) y el peor caso, en el que todos los valores cambian en cada frame.
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from hud import TextoCacheado, avance_texto
+
+
+RESOLUCIONES = {"720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+FUENTE = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class AtlasGlifos:
+    """Glifos rasterizados una vez por fuente/escala/grosor, para componer texto sin putText.
+
+    Cada glifo se guarda como coordenadas (dy, dx) de sus píxeles respecto del origen
+    y un avance fraccionario; un texto se arma concatenando glifos desplazados, con
+    operaciones vectorizadas. Los dígitos, unidades y signos se prerenderizan al
+    crear el atlas y cualquier otro carácter la primera vez que aparece. Las
+    posiciones de los glifos se redondean al píxel, así que puede haber diferencias de
+    un píxel con putText, que posiciona con precisión subpíxel.
+
+    Los glifos son máscaras binarizadas, no alfa, y el resultado no es idéntico al
+    de putText. Queda solo como alternativa medida: no es más rápido que putText en
+    cada frame (OpenCV 4.x con LINE_8).
+    """
+
+    PRECARGADOS = "0123456789 .,:-+%/cmVs"
+    _atlas = {}
+
+    @classmethod
+    def obtener(cls, fuente, escala, grosor=1):
+        """Atlas compartido para esa combinación de fuente, escala y grosor."""
+        clave = (fuente, escala, grosor)
+        atlas = cls._atlas.get(clave)
+        if atlas is None:
+            atlas = cls._atlas[clave] = cls(fuente, escala, grosor)
+        return atlas
+
+    def __init__(self, fuente, escala, grosor=1):
+        self.fuente = fuente
+        self.escala = escala
+        self.grosor = grosor
+        self.glifos = {}
+        self._tablas = {}
+        for caracter in self.PRECARGADOS:
+            self._glifo(caracter)
+
+    def _glifo(self, caracter):
+        glifo = self.glifos.get(caracter)
+        if glifo is None:
+            # Avance medido sobre muchas repeticiones: getTextSize redondea al píxel
+            avance = avance_texto(caracter * 64, self.fuente, self.escala, self.grosor) / 64
+            (w, h), base = cv2.getTextSize(caracter, self.fuente, self.escala, self.grosor)
+            margen = self.grosor + 2
+            mascara = np.zeros((h + base + 2 * margen, w + 2 * margen), dtype=np.uint8)
+            cv2.putText(mascara, caracter, (margen, h + margen), self.fuente, self.escala,
+                        255, self.grosor)
+            ys, xs = np.nonzero(mascara >= 128)
+            glifo = self.glifos[caracter] = (ys - h - margen, xs - margen, avance)
+        return glifo
+
+    def _desplazamientos(self, ancho):
+        """Por glifo: desplazamientos planos de sus píxeles en un frame de `ancho`,
+        avance y caja (dy mínimo, dy máximo, dx mínimo, dx máximo)."""
+        tabla = self._tablas.get(ancho)
+        if tabla is None or len(tabla) != len(self.glifos):
+            tabla = self._tablas[ancho] = {
+                c: (ys * ancho + xs, avance, ys.min(initial=0), ys.max(initial=0),
+                    xs.min(initial=0), xs.max(initial=0))
+                for c, (ys, xs, avance) in self.glifos.items()}
+        return tabla
+
+    def indices(self, texto, org, forma):
+        """Índices planos de `texto` en `org`, equivalentes a `indices_texto`."""
+        alto, ancho = forma
+        for c in texto:
+            if c not in self.glifos:
+                self._glifo(c)
+        tabla = self._desplazamientos(ancho)
+        glifos = [tabla[c] for c in texto]
+        if not glifos:
+            return np.empty(0, dtype=np.intp)
+
+        # Origen de cada glifo: avance acumulado redondeado al píxel
+        acumulado = np.cumsum([0.0] + [g[1] for g in glifos[:-1]])
+        xs0 = org[0] + np.rint(acumulado).astype(np.intp)
+        cantidades = [len(g[0]) for g in glifos]
+
+        dentro = (org[1] + min(g[2] for g in glifos) >= 0
+                  and org[1] + max(g[3] for g in glifos) < alto
+                  and xs0[0] + glifos[0][4] >= 0
+                  and max(x + g[5] for x, g in zip(xs0.tolist(), glifos)) < ancho)
+        if dentro:
+            return (np.concatenate([g[0] for g in glifos])
+                    + np.repeat(org[1] * ancho + xs0, cantidades))
+
+        # El texto toca un borde: recortar píxel a píxel
+        ys = np.concatenate([self.glifos[c][0] for c in texto]) + org[1]
+        xs = np.concatenate([self.glifos[c][1] for c in texto]) + np.repeat(xs0, cantidades)
+        visibles = (ys >= 0) & (ys < alto) & (xs >= 0) & (xs < ancho)
+        return ys[visibles] * ancho + xs[visibles]
+
+
+class TextoAtlas(TextoCacheado):
+    """`TextoCacheado` que arma la máscara con `AtlasGlifos` en lugar de putText."""
+
+    def __init__(self, fuente, escala, grosor=1):
+        super().__init__(fuente, escala, grosor)
+        self.atlas = AtlasGlifos.obtener(fuente, escala, grosor)
+
+    def preparar(self, texto, org, forma):
+        if texto == self.texto and org == self.org and forma == self.forma:
+            return
+        self.texto, self.org, self.forma = texto, org, forma
+        self.indices = self.atlas.indices(texto, org, forma)
+        self.rasterizados += 1
+
+
+def textos_del_frame(i, ancho, alto, peor_caso):
+    """(nombre, texto, origen, escala) de un frame `i` a 30 FPS."""
+    segundo = i if peor_caso else i // 30
+    muestra = i if peor_caso else i // 6
+    return [
+        ("tiempo", f"Tiempo: 0:{segundo // 60 % 60:02d}:{segundo % 60:02d}", (20, 30), 0.7),
+        ("hora", f"12:{segundo // 60 % 60:02d}:{segundo % 60:02d}", (ancho - 120, 30), 0.7),
+        ("Profundidad", f"{100 + muestra % 50} cm", (160, alto - 120), 0.6),
+        ("Distancia", f"{30 + muestra % 20} cm", (140, alto - 95), 0.6),
+        ("Pitch", f"{muestra % 7 - 3}.{muestra % 10}", (100, alto - 70), 0.6),
+        ("Roll", f"{muestra % 5 - 2}.{muestra % 10}", (90, alto - 45), 0.6),
+        ("Seguridad", "On" if muestra % 2 else "Off", (ancho // 2 + 140, alto - 120), 0.6),
+        ("Velocidad", f"{1500 + muestra % 10}%", (ancho // 2 + 140, alto - 95), 0.6),
+        ("Luces", "Off", (ancho // 2 + 100, alto - 70), 0.6),
+        ("Bateria", f"{11 + muestra % 10 / 10:.1f}V", (ancho // 2 + 120, alto - 45), 0.6),
+        ("fps", f"FPS: {29 + segundo % 2}", (ancho - 100, alto - 20), 0.5),
+    ]
+
+
+def medir(modo, ancho, alto, frames, peor_caso):
+    """Milisegundos por frame dibujando solo el texto, con el modo dado."""
+    frame = np.zeros((alto, ancho, 3), dtype=np.uint8)
+    campos = {}
+    tiempos = np.empty(frames)
+    for i in range(frames):
+        textos = textos_del_frame(i, ancho, alto, peor_caso)
+        inicio = time.perf_counter_ns()
+        for nombre, texto, org, escala in textos:
+            if modo == "putText":
+                cv2.putText(frame, texto, org, FUENTE, escala, (255, 255, 255), 1)
+                continue
+            campo = campos.get(nombre)
+            if campo is None:
+                clase = TextoAtlas if modo == "atlas" else TextoCacheado
+                campo = campos[nombre] = clase(FUENTE, escala)
+            campo.dibujar(frame, texto, org, (255, 255, 255))
+        tiempos[i] = (time.perf_counter_ns() - inicio) / 1e6
+    return {"p50": float(np.percentile(tiempos, 50)), "p95": float(np.percentile(tiempos, 95)),
+            "media": float(tiempos.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resoluciones", default="720p,1080p,4K")
+    parser.add_argument("--frames", type=int, default=900)
+    parser.add_argument("--salida", help="guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    resultados = []
+    for nombre in args.resoluciones.split(","):
+        ancho, alto = RESOLUCIONES[nombre]
+        for peor_caso in (False, True):
+            for modo in ("putText", "mascaras", "atlas"):
+                r = medir(modo, ancho, alto, args.frames, peor_caso)
+                r.update(resolucion=nombre, modo=modo,
+                         cambios="todos los frames" if peor_caso else "realista")
+                resultados.append(r)
+                print(f"{nombre:6} {r['cambios']:17} {modo:9} p50 {r['p50']:.3f} ms  "
+                      f"p95 {r['p95']:.3f} ms  media {r['media']:.3f} ms")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
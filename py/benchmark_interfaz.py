@@ -0,0 +1,171 @@
+"""Benchmark sin ventana del overlay de cámara.
+
+Usa una fuente de video sintética y un enlace serie local (pty en Linux/macOS,
+`loop://` en otros sistemas) al que se escribe telemetría con el formato de
+`mostrarDatos`. Mide throughput y latencias por etapa para varias resoluciones
+y tasas de telemetría, y guarda el resultado en JSON.
+"""
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from fuentes import FuenteSintetica
+from interfaz_bonita import BluetoothCameraOverlay
+
+
+RESOLUCIONES = {"720p": (1280, 720), "1080p": (1920, 1080), "4K": (3840, 2160)}
+TASAS_HZ = (5, 20, 50, 100, 200)
+ETAPAS = ("lectura_camara", "captura", "telemetria", "dibujo", "frame",
+          "latencia", "edad_telemetria")
+
+
+class EmisorTelemetria:
+    """Escribe líneas de telemetría a una tasa fija (plazos absolutos)."""
+
+    def __init__(self, escribir, tasa_hz):
+        self.escribir = escribir
+        self.periodo = 1.0 / tasa_hz
+        self.enviadas = 0
+        self.activo = False
+        self.hilo = None
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle, daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        self.activo = False
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
+
+    def _bucle(self):
+        proximo = time.monotonic()
+        while self.activo:
+            i = self.enviadas
+            linea = (f"{100 + i % 50},{30 + i % 20},{i % 7 - 3},{i % 5 - 2},"
+                     f"{11 - (i // 100) % 3},{i // 50 % 2},{1500 + i % 10},0\r\n")
+            if self.escribir(linea.encode("ascii")):
+                self.enviadas += 1
+            proximo += self.periodo
+            espera = proximo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                proximo = time.monotonic()
+
+
+def abrir_enlace(sistema_ref):
+    """Devuelve (puerto, escribir, cerrar) para alimentar al overlay con telemetría."""
+    if os.name == "posix":
+        import tty
+        maestro, esclavo = os.openpty()
+        tty.setraw(esclavo)
+        nombre = os.ttyname(esclavo)
+
+        def escribir(datos):
+            os.write(maestro, datos)
+            return True
+
+        def cerrar():
+            os.close(maestro)
+            os.close(esclavo)
+        return nombre, escribir, cerrar
+
+    # loop:// devuelve lo escrito en el mismo objeto que abrió el overlay
+    def escribir(datos):
+        sistema = sistema_ref[0]
+        if sistema is None or sistema.bt is None or not sistema.bt.is_open:
+            return False
+        sistema.bt.write(datos)
+        return True
+    return "loop://", escribir, lambda: None
+
+
+def medir_caso(nombre, resolucion, tasa_hz, duracion, fps_camara=None):
+    """Ejecuta el overlay sin ventana durante `duracion` segundos y resume los tiempos."""
+    sistema_ref = [None]
+    puerto, escribir, cerrar = abrir_enlace(sistema_ref)
+    fuente = FuenteSintetica(*resolucion, fps=fps_camara)
+    sistema = BluetoothCameraOverlay(puerto=puerto, fuente_video=fuente, resolucion=resolucion,
+                                     mostrar_ventana=False, fps_objetivo=1000)
+    sistema_ref[0] = sistema
+
+    # Esperar la conexión antes de medir
+    limite = time.monotonic() + 5.0
+    while not sistema.lector.conectado and time.monotonic() < limite:
+        time.sleep(0.05)
+
+    emisor = EmisorTelemetria(escribir, tasa_hz)
+    emisor.iniciar()
+    try:
+        inicio = time.monotonic()
+        sistema.iniciar(duracion=duracion)
+        transcurrido = time.monotonic() - inicio
+    finally:
+        emisor.detener()
+        cerrar()
+
+    resumen = sistema.medidor.resumen()
+    return {
+        "resolucion": nombre,
+        "ancho": resolucion[0],
+        "alto": resolucion[1],
+        "tasa_telemetria_hz": tasa_hz,
+        "fps": sistema.frames_mostrados / transcurrido,
+        "frames_mostrados": sistema.frames_mostrados,
+        "frames_descartados_captura": sistema.captura.frames_descartados,
+        "lineas_enviadas": emisor.enviadas,
+        "lineas_validas": sistema.lector.lineas_validas,
+        "errores_parseo": sistema.lector.errores_parseo,
+        "etapas_ms": {etapa: resumen[etapa] for etapa in ETAPAS if etapa in resumen},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resoluciones", default="720p,1080p,4K",
+                        help=f"subconjunto de {','.join(RESOLUCIONES)}")
+    parser.add_argument("--tasas", default=",".join(map(str, TASAS_HZ)),
+                        help="tasas de telemetría en Hz, separadas por comas")
+    parser.add_argument("--duracion", type=float, default=5.0, help="segundos por caso")
+    parser.add_argument("--fps-camara", type=float, default=None,
+                        help="ritmo de la cámara sintética (por defecto, sin límite)")
+    parser.add_argument("--salida", default="reportes/benchmark_interfaz.json")
+    args = parser.parse_args()
+
+    casos = []
+    for nombre in args.resoluciones.split(","):
+        for tasa in (float(t) for t in args.tasas.split(",")):
+            print(f"== {nombre} @ {tasa:g} Hz")
+            caso = medir_caso(nombre, RESOLUCIONES[nombre], tasa, args.duracion, args.fps_camara)
+            dibujo = caso["etapas_ms"].get("dibujo", {})
+            print(f"   {caso['fps']:.1f} FPS, dibujo p50 {dibujo.get('p50', 0):.2f} ms, "
+                  f"p99 {dibujo.get('p99', 0):.2f} ms")
+            casos.append(caso)
+
+    resultado = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "plataforma": platform.platform(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "duracion_por_caso_s": args.duracion,
+        "casos": casos,
+    }
+    carpeta = os.path.dirname(args.salida)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo, indent=2)
+    print(f"Resultados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
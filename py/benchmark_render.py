@@ -0,0 +1,109 @@
+"""Benchmark del render 3D del simulador: tiempo por frame de `update`.
+
+Corre sin ventana (backend Agg) con la física al máximo y mide cada frame de tres
+formas: con blitting (solo se redibujan la trayectoria, el ROUV, los ejes locales
+y el cuadro de información), con un dibujo completo de la figura, que es lo que
+pasa al rotar la vista con el mouse o mover un slider, y limpiando y
+reconstruyendo la escena en cada frame con el cuadro de información siempre al
+día, como hacía el simulador antes de la escena persistente. Con `--malla` el
+ROUV se dibuja con el casco diezmado del STL.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+
+def cargar_simulador():
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Simulación ROUV final.py")
+    spec = importlib.util.spec_from_file_location("simulacion_rouv", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+MODOS = ("blitting", "dibujo completo", "limpiar y reconstruir")
+
+
+def reconstruir(sim):
+    """Escena rehecha desde cero sin blitting: ejes limpios, entorno, trayectoria,
+    ROUV, flechas, cuadro de información y leyenda nuevos."""
+    sim.ax.clear()
+    sim._setup_environment()
+    sim._build_scene()
+    if sim._draw_cid is not None:
+        sim.fig.canvas.mpl_disconnect(sim._draw_cid)
+    sim._blit = False
+    for artista in sim._animated:
+        artista.set_animated(False)
+
+
+def medir(modulo, frames, modo="blitting", descartar=50, casco=None):
+    """Milisegundos por frame (p50, p95, media) tras `descartar` frames de
+    calentamiento (a lo sumo la mitad de `frames`)."""
+    sim = modulo.ROUVDynamicControlSimulator(time_scale=None, asap_steps_per_frame=3,
+                                             hull=casco)
+    sim.slider_F1.set_val(10)
+    sim.slider_F2.set_val(6)
+    if modo == "limpiar y reconstruir":
+        sim.info_period = 0.0
+        reconstruir(sim)
+    sim.fig.canvas.draw()
+    tiempos = np.empty(frames)
+    for i in range(frames):
+        inicio = time.perf_counter()
+        if modo == "limpiar y reconstruir":
+            reconstruir(sim)
+        # Sin blitting `update` ya pide el dibujo completo (en Agg, draw_idle dibuja)
+        sim.update(i)
+        if modo == "dibujo completo":
+            sim.fig.canvas.draw()
+        tiempos[i] = (time.perf_counter() - inicio) * 1000
+    tiempos = tiempos[min(descartar, frames // 2):]
+    matplotlib.pyplot.close(sim.fig)
+    return {"p50": float(np.percentile(tiempos, 50)), "p95": float(np.percentile(tiempos, 95)),
+            "media": float(tiempos.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=400)
+    parser.add_argument("--modos", default=",".join(MODOS))
+    parser.add_argument("--malla", help="STL del casco")
+    parser.add_argument("--caras", type=int, default=1500, help="caras de la malla diezmada")
+    parser.add_argument("--ejes-malla", default="x,y,z")
+    parser.add_argument("--salida", help="guardar los resultados en JSON")
+    args = parser.parse_args()
+    if args.frames < 1:
+        parser.error("--frames tiene que ser al menos 1")
+    modos = args.modos.split(",")
+    for modo in modos:
+        if modo not in MODOS:
+            parser.error(f"modo desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+
+    modulo = cargar_simulador()
+    casco = None
+    if args.malla:
+        from malla_stl import malla_visual
+        casco = malla_visual(args.malla, args.caras, ejes=args.ejes_malla)
+        print(f"Casco: {len(casco[1])} caras")
+    resultados = []
+    for modo in modos:
+        r = medir(modulo, args.frames, modo, casco=casco)
+        r["modo"] = modo
+        resultados.append(r)
+        print(f"{modo:22} p50 {r['p50']:7.2f} ms  p95 {r['p95']:7.2f} ms  "
+              f"({1000 / r['media']:.0f} FPS)")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
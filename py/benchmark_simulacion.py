@@ -0,0 +1,131 @@
+"""Benchmark del núcleo de física del ROUV: paso escalar vs lote vectorizado.
+
+Mide vehículo-segundos simulados por segundo de reloj para distintos tamaños de
+lote, con parámetros muestreados como en un Monte Carlo. Con `--precision`
+compara en cambio los integradores (Euler semi-implícito, RK4 y RK45 adaptativo):
+error contra una solución de referencia vs costo de reloj por segundo simulado.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from dinamica_rouv import (DormandPrince, FixedStepSimulation, X, Z, initial_state,
+                           make_inputs, sample_params)
+
+
+PERIODO_MANIOBRA = 6.0  # múltiplo de todos los dt probados: todos ven las mismas entradas
+
+
+def medir_escalar(segundos, dt):
+    """Un vehículo con `step` (Python puro)."""
+    sim = FixedStepSimulation(dt=dt, max_substeps=10**9)
+    inputs = make_inputs(10, 8, 2, 2, 0, 0.1)
+    inicio = time.perf_counter()
+    sim.advance(round(segundos / dt) * dt, inputs)
+    return sim.t / (time.perf_counter() - inicio)
+
+
+def medir_lote(n, segundos, dt, semilla=0):
+    """N vehículos con `step_batch`."""
+    sim = FixedStepSimulation(np.tile(initial_state(), (n, 1)), dt, sample_params(n, semilla),
+                              max_substeps=10**9)
+    inputs = make_inputs(10, 8, 2, 2, 0, 0.1)
+    inicio = time.perf_counter()
+    sim.advance(round(segundos / dt) * dt, inputs)
+    return n * sim.t / (time.perf_counter() - inicio)
+
+
+def mision(duracion, semilla=0):
+    """Entradas por tramos: una maniobra al azar cada `PERIODO_MANIOBRA` segundos,
+    con empujes altos (velocidad terminal de varios m/s)."""
+    rng = np.random.default_rng(semilla)
+    n = int(duracion / PERIODO_MANIOBRA) + 1
+    tabla = np.column_stack([rng.uniform(-5, 30, (n, 2)), rng.uniform(-20, 20, (n, 2)),
+                             np.zeros(n), rng.uniform(-0.4, 0.4, n)])
+    return lambda t, state: tabla[int(t / PERIODO_MANIOBRA + 1e-6)]
+
+
+def trayectoria(integrador, dt, duracion, entradas):
+    """Posiciones al final de cada maniobra y segundos de reloj que llevó simularlas."""
+    sim = FixedStepSimulation(dt=dt, integrator=integrador, max_substeps=10**9)
+    posiciones = []
+    inicio = time.perf_counter()
+    with np.errstate(all="ignore"):
+        for _ in range(int(duracion / PERIODO_MANIOBRA)):
+            sim.advance(PERIODO_MANIOBRA, entradas)
+            posiciones.append(sim.state[X:Z + 1].copy())
+    return np.array(posiciones), time.perf_counter() - inicio
+
+
+def medir_precision(dts, tolerancias, duracion, dt_rk45):
+    """Error máximo de posición contra RK45 con tolerancia 1e-11, por integrador."""
+    entradas = mision(duracion)
+    referencia, _ = trayectoria(DormandPrince(rtol=1e-11, atol=1e-11), dt_rk45, duracion,
+                                entradas)
+    casos = [("euler", dt, "euler") for dt in dts] + [("rk4", dt, "rk4") for dt in dts]
+    casos += [(f"rk45 rtol={tol:g}", dt_rk45, DormandPrince(rtol=tol, atol=tol * 1e-2))
+              for tol in tolerancias]
+
+    resultados = []
+    for nombre, dt, integrador in casos:
+        posiciones, segundos = trayectoria(integrador, dt, duracion, entradas)
+        error = float(np.max(np.linalg.norm(posiciones - referencia, axis=1)))
+        if not np.isfinite(error):
+            error = float("inf")
+        r = {"integrador": nombre, "dt": dt, "error_max_m": error,
+             "ms_por_s_simulado": 1000 * segundos / duracion}
+        if isinstance(integrador, DormandPrince):
+            r["pasos_internos"] = integrador.accepted
+            r["rechazados"] = integrador.rejected
+        resultados.append(r)
+        print(f"{nombre:16} dt={dt:<5g} error {error:10.3g} m  "
+              f"{r['ms_por_s_simulado']:8.3f} ms por s simulado")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lotes", default="1,100,1000,10000,100000")
+    parser.add_argument("--pasos", type=int, default=300_000,
+                        help="vehículo-pasos por medición (se reparte entre el lote)")
+    parser.add_argument("--dt", type=float, default=0.03)
+    parser.add_argument("--salida", help="guardar los resultados en JSON")
+    parser.add_argument("--precision", action="store_true",
+                        help="comparar integradores en lugar de medir el lote")
+    parser.add_argument("--dts", default="0.01,0.03,0.1,0.3,1,2",
+                        help="pasos de Euler y RK4 para --precision")
+    parser.add_argument("--tolerancias", default="1e-3,1e-5,1e-7,1e-9",
+                        help="rtol de RK45 para --precision")
+    parser.add_argument("--mision", type=float, default=120.0,
+                        help="segundos simulados en --precision")
+    args = parser.parse_args()
+
+    if args.precision:
+        resultados = medir_precision([float(v) for v in args.dts.split(",")],
+                                     [float(v) for v in args.tolerancias.split(",")],
+                                     args.mision, dt_rk45=2.0)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as archivo:
+                json.dump(resultados, archivo, indent=2)
+        return
+
+    resultados = []
+    velocidad = medir_escalar(min(args.pasos, 100_000) * args.dt, args.dt)
+    print(f"escalar        {velocidad:12.0f} vehículo-s/s")
+    resultados.append({"modo": "escalar", "n": 1, "vehiculo_s_por_s": velocidad})
+
+    for n in (int(v) for v in args.lotes.split(",")):
+        pasos = max(args.pasos // n, 20)
+        velocidad = medir_lote(n, pasos * args.dt, args.dt)
+        print(f"lote N={n:<7} {velocidad:12.0f} vehículo-s/s")
+        resultados.append({"modo": "lote", "n": n, "vehiculo_s_por_s": velocidad})
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
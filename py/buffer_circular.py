@@ -0,0 +1,116 @@
+import numpy as np
+
+
+class BufferCircular:
+    """Ventana de tamaño fijo con las últimas muestras numéricas.
+
+    Cada valor se escribe dos veces (en `i` y en `i + capacidad`), así las últimas
+    muestras siempre forman un tramo contiguo y `ultimos()` devuelve una vista en
+    orden cronológico sin copiar. Con `columnas` cada muestra es un vector.
+    """
+
+    def __init__(self, capacidad, dtype=np.float64, columnas=None):
+        forma = (2 * capacidad,) if columnas is None else (2 * capacidad, columnas)
+        self.datos = np.zeros(forma, dtype=dtype)
+        self.capacidad = capacidad
+        self.total = 0
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+    def agregar(self, valor):
+        i = self.total % self.capacidad
+        self.datos[i] = valor
+        self.datos[i + self.capacidad] = valor
+        self.total += 1
+
+    def agregar_lote(self, valores):
+        """Agrega varias muestras de una vez (solo se conservan las últimas `capacidad`)."""
+        valores = np.asarray(valores, dtype=self.datos.dtype)
+        n = len(valores)
+        if n > self.capacidad:
+            valores = valores[-self.capacidad:]
+            self.total += n - self.capacidad
+            n = self.capacidad
+        posiciones = (self.total + np.arange(n)) % self.capacidad
+        self.datos[posiciones] = valores
+        self.datos[posiciones + self.capacidad] = valores
+        self.total += n
+
+    def ultimos(self, n=None):
+        """Vista (sin copia) de las últimas `n` muestras, la más reciente al final."""
+        disponibles = len(self)
+        n = disponibles if n is None else min(n, disponibles)
+        fin = self.total
+        if fin >= self.capacidad:
+            fin = fin % self.capacidad + self.capacidad
+        return self.datos[fin - n:fin]
+
+    def ultimo(self):
+        if not self.total:
+            return None
+        return self.datos[(self.total - 1) % self.capacidad]
+
+    def limpiar(self):
+        self.total = 0
+
+
+class HistorialDiezmado:
+    """Recorrido completo de una serie larga con memoria acotada.
+
+    Las últimas `reciente` muestras se guardan todas en un `BufferCircular`; de las
+    anteriores queda un archivo de hasta `capacidad` muestras, una cada `paso`.
+    Cuando el archivo se llena se descarta una de cada dos y `paso` se duplica, así
+    una corrida de cualquier duración se puede dibujar entera. El costo por muestra
+    es constante (amortizado: cada compactación copia media `capacidad` y ocurre
+    cada vez más de tarde en tarde). Con `capacidad` 0 solo queda la ventana.
+    """
+
+    def __init__(self, reciente, capacidad=0, dtype=np.float64, columnas=None):
+        self.reciente = BufferCircular(reciente, dtype, columnas)
+        forma = (capacidad,) if columnas is None else (capacidad, columnas)
+        self.archivo = np.zeros(forma, dtype=dtype)
+        self.capacidad = capacidad
+        self.paso = 1
+        self.archivados = 0
+
+    @property
+    def total(self):
+        return self.reciente.total
+
+    def __len__(self):
+        return len(self.reciente) + self._anteriores()
+
+    def agregar(self, valor):
+        # El archivo guarda las muestras de índice múltiplo de `paso`
+        indice = self.reciente.total
+        if self.capacidad and indice % self.paso == 0:
+            if self.archivados == self.capacidad:
+                mitad = (self.capacidad + 1) // 2
+                self.archivo[:mitad] = self.archivo[::2]
+                self.archivados = mitad
+                self.paso *= 2
+            if indice % self.paso == 0:
+                self.archivo[self.archivados] = valor
+                self.archivados += 1
+        self.reciente.agregar(valor)
+
+    def _anteriores(self):
+        """Muestras del archivo más viejas que la ventana reciente."""
+        inicio = self.reciente.total - len(self.reciente)
+        return min(-(-inicio // self.paso), self.archivados)
+
+    def puntos(self):
+        """Recorrido en orden cronológico: el archivo diezmado y luego la ventana.
+
+        Mientras no haya muestras fuera de la ventana es una vista sin copia."""
+        recientes = self.reciente.ultimos()
+        anteriores = self._anteriores()
+        if not anteriores:
+            return recientes
+        return np.concatenate((self.archivo[:anteriores], recientes))
+
+    def limpiar(self):
+        self.reciente.limpiar()
+        self.archivados = 0
+        self.paso = 1
@@ -0,0 +1,215 @@
+import threading
+import time
+
+import cv2
+
+
+class BufferUltimoFrame:
+    """Buffer de un solo elemento que conserva únicamente el frame más reciente."""
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._frame = None
+        self._marca = None
+        self._cerrado = False
+
+        # Contadores
+        self.publicados = 0
+        self.consumidos = 0
+        self.descartados = 0
+
+    def publicar(self, frame, marca=None):
+        """Reemplaza el frame pendiente. Si nadie lo consumió, se cuenta como descartado."""
+        with self._condicion:
+            if self._frame is not None:
+                self.descartados += 1
+            self._frame = frame
+            self._marca = time.monotonic() if marca is None else marca
+            self.publicados += 1
+            self._condicion.notify_all()
+
+    def tomar(self, timeout=None):
+        """Entrega (frame, marca) más reciente, o (None, None) si no llega a tiempo."""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._frame is not None or self._cerrado,
+                                     timeout)
+            frame, marca = self._frame, self._marca
+            if frame is None:
+                return None, None
+            self._frame = None
+            self.consumidos += 1
+            return frame, marca
+
+    def cerrar(self):
+        """Despierta a los consumidores en espera; no se publicarán más frames."""
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+
+    @property
+    def cerrado(self):
+        return self._cerrado
+
+
+class CapturaCamara:
+    """Etapa productora: lee la cámara en su propio hilo y publica solo el último frame."""
+
+    def __init__(self, cap, medidor=None):
+        self.cap = cap
+        self.medidor = medidor
+        self.buffer = BufferUltimoFrame()
+        self.activo = False
+        self.fallo = False
+        self.hilo = None
+        self._resolucion_pedida = None
+
+    def iniciar(self):
+        """Arranca el hilo de captura."""
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle_captura, daemon=True)
+        self.hilo.start()
+
+    def _bucle_captura(self):
+        """Lee frames tan rápido como los entrega el driver, sin esperar al render."""
+        try:
+            while self.activo:
+                if self._resolucion_pedida is not None:
+                    self._aplicar_resolucion()
+                inicio = time.perf_counter_ns()
+                ret, frame = self.cap.read()
+                if self.medidor is not None:
+                    self.medidor.registrar("lectura_camara", inicio)
+                if not ret:
+                    self.fallo = True
+                    break
+                self.buffer.publicar(frame)
+        finally:
+            self.activo = False
+            self.buffer.cerrar()
+
+    def cambiar_resolucion(self, ancho, alto):
+        """Pide un cambio de resolución; se aplica en el hilo de captura entre lecturas."""
+        self._resolucion_pedida = (ancho, alto)
+
+    def _aplicar_resolucion(self):
+        ancho, alto = self._resolucion_pedida
+        self._resolucion_pedida = None
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, alto)
+
+    def obtener_frame(self, timeout=None):
+        """Toma el frame más reciente; el llamador pasa a ser su dueño."""
+        return self.buffer.tomar(timeout)
+
+    def detener(self):
+        """Detiene el hilo de captura antes de liberar la cámara."""
+        self.activo = False
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
+
+    @property
+    def frames_capturados(self):
+        return self.buffer.publicados
+
+    @property
+    def frames_descartados(self):
+        return self.buffer.descartados
+
+
+class MarcapasosFrames:
+    """Marca el ritmo del bucle con plazos absolutos (reloj monotónico).
+
+    Si una iteración se atrasa más de un periodo, los plazos perdidos se saltan en
+    lugar de acumular retraso o intentar recuperarlos en ráfaga.
+    """
+
+    def __init__(self, fps=30):
+        self.periodo = 1.0 / fps
+        self.proximo = None
+        self.frames_saltados = 0
+
+    def esperar(self):
+        """Duerme hasta el próximo plazo y programa el siguiente."""
+        ahora = time.monotonic()
+        if self.proximo is None:
+            self.proximo = ahora + self.periodo
+            return
+
+        atraso = ahora - self.proximo
+        if atraso < 0:
+            time.sleep(-atraso)
+            self.proximo += self.periodo
+        else:
+            perdidos = int(atraso // self.periodo)
+            self.frames_saltados += perdidos
+            self.proximo += (perdidos + 1) * self.periodo
+
+
+class ResolucionAdaptativa:
+    """Baja la resolución de captura cuando el tiempo de frame supera el presupuesto de
+    forma sostenida, y la vuelve a subir cuando sobra margen.
+
+    Para subir se estima el tiempo en el escalón superior escalando por la cantidad
+    de píxeles, así no oscila entre dos resoluciones.
+    """
+
+    ESCALONES = ((1280, 720), (960, 540), (640, 360))
+
+    def __init__(self, presupuesto_ms, escalones=ESCALONES, suavizado=0.05,
+                 segundos_bajar=2.0, segundos_subir=5.0, margen_subir=0.6):
+        self.presupuesto_ms = presupuesto_ms
+        self.escalones = escalones
+        self.suavizado = suavizado
+        self.segundos_bajar = segundos_bajar
+        self.segundos_subir = segundos_subir
+        self.margen_subir = margen_subir
+
+        self.nivel = 0
+        self.promedio_ms = None
+        self._desde_exceso = None
+        self._desde_holgura = None
+        self.cambios = 0
+
+    @property
+    def resolucion(self):
+        return self.escalones[self.nivel]
+
+    def actualizar(self, ms_frame):
+        """Agrega un tiempo de frame; devuelve la nueva resolución si hay que cambiarla."""
+        if self.promedio_ms is None:
+            self.promedio_ms = ms_frame
+        else:
+            self.promedio_ms += self.suavizado * (ms_frame - self.promedio_ms)
+        ahora = time.monotonic()
+
+        if self.promedio_ms > self.presupuesto_ms:
+            self._desde_holgura = None
+            if self._desde_exceso is None:
+                self._desde_exceso = ahora
+            elif (ahora - self._desde_exceso >= self.segundos_bajar
+                  and self.nivel < len(self.escalones) - 1):
+                return self._cambiar(self.nivel + 1)
+        elif (self.nivel > 0 and self.promedio_ms * self._relacion_pixeles(self.nivel - 1)
+              < self.presupuesto_ms * self.margen_subir):
+            self._desde_exceso = None
+            if self._desde_holgura is None:
+                self._desde_holgura = ahora
+            elif ahora - self._desde_holgura >= self.segundos_subir:
+                return self._cambiar(self.nivel - 1)
+        else:
+            self._desde_exceso = self._desde_holgura = None
+        return None
+
+    def _relacion_pixeles(self, nivel):
+        """Píxeles del escalón `nivel` respecto del actual."""
+        ancho, alto = self.escalones[nivel]
+        ancho_actual, alto_actual = self.escalones[self.nivel]
+        return (ancho * alto) / (ancho_actual * alto_actual)
+
+    def _cambiar(self, nivel):
+        self.nivel = nivel
+        self.cambios += 1
+        # Tras un cambio, empezar a medir de nuevo
+        self.promedio_ms = None
+        self._desde_exceso = self._desde_holgura = None
+        return self.resolucion
@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+
+import serial
+from serial.tools import list_ports
+
+
+def puertos_candidatos(puertos, escanear=False):
+    """URLs a probar: las dadas (lista o separadas por comas) y, con `escanear`,
+    los puertos serie que el sistema reporta, sin repetir."""
+    if isinstance(puertos, str):
+        puertos = [p.strip() for p in puertos.split(",") if p.strip()]
+    candidatos = list(puertos)
+    if escanear:
+        for info in list_ports.comports():
+            if info.device not in candidatos:
+                candidatos.append(info.device)
+    return candidatos
+
+
+class GestorConexion:
+    """Mantiene abierto el enlace serie: detecta caídas y reconecta con backoff.
+
+    Una caída se detecta por error de E/S (el lector llama a `notificar_caida`) o
+    por silencio: si no llegan bytes en `silencio_max` segundos el puerto se cierra
+    y se reabre. El hilo espera eventos en lugar de dormir un tiempo fijo, así una
+    caída se atiende de inmediato. Cada pasada prueba todos los candidatos empezando
+    por el último que funcionó; entre pasadas fallidas la espera crece de forma
+    exponencial con jitter, hasta `espera_max`.
+    """
+
+    def __init__(self, puertos, baudrate=9600, silencio_max=1.5, espera_inicial=0.1,
+                 espera_max=5.0, timeout_lectura=0.1, medidor=None):
+        self.puertos = puertos_candidatos(puertos)
+        self.baudrate = baudrate
+        self.silencio_max = silencio_max
+        self.espera_inicial = espera_inicial
+        self.espera_max = espera_max
+        self.timeout_lectura = timeout_lectura
+        self.medidor = medidor
+
+        self.puerto = None
+        self.url = None
+        self.estado = "Desconectado"
+        self.ultimo_error = None
+        self.ultimo_dato = None
+        self.activo = False
+        self.hilo = None
+        self._evento = threading.Event()
+        self._caido = None
+        self._intento = 0
+
+        # Métricas del enlace
+        self.conexiones = 0
+        self.caidas = {"error": 0, "silencio": 0}
+        self.ultima_reconexion_s = None
+        self._inicio = time.monotonic()
+        self._desde_conexion = None
+        self._desde_caida = self._inicio
+        self._tiempo_enlace_previo = 0.0
+
+    def obtener_puerto(self):
+        """Puerto abierto actual, o None mientras se reconecta."""
+        return self.puerto
+
+    def iniciar(self):
+        """Arranca el hilo de conexión."""
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle_conexion, daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        self.activo = False
+        self._evento.set()
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
+        self._cerrar(None)
+
+    def notificar_datos(self):
+        """Llamado por el lector cada vez que llegan bytes."""
+        self.ultimo_dato = time.monotonic()
+
+    def notificar_caida(self, puerto, error=None):
+        """Llamado por el lector ante un error de E/S; despierta al hilo de conexión."""
+        if puerto is self.puerto:
+            self._caido = puerto
+            self.ultimo_error = None if error is None else str(error)
+            self._evento.set()
+
+    def _bucle_conexion(self):
+        while self.activo:
+            if self.puerto is None:
+                self._conectar()
+                continue
+
+            # Conectado: esperar una caída notificada o que venza el plazo de silencio
+            limite = self.ultimo_dato + self.silencio_max
+            if self._evento.wait(max(limite - time.monotonic(), 0.0)):
+                self._evento.clear()
+                if self._caido is self.puerto and self.puerto is not None:
+                    self._cerrar("error")
+            elif time.monotonic() - self.ultimo_dato >= self.silencio_max:
+                self._cerrar("silencio")
+
+    def _conectar(self):
+        """Recorre los candidatos hasta abrir uno; entre pasadas espera con backoff."""
+        while self.activo:
+            for url in self._orden_candidatos():
+                self.estado = f"Conectando {url}..."
+                try:
+                    puerto = serial.serial_for_url(url, self.baudrate,
+                                                   timeout=self.timeout_lectura)
+                except (serial.SerialException, OSError, ValueError) as e:
+                    self.ultimo_error = str(e)
+                    continue
+                self._conectado(puerto, url)
+                return
+
+            espera = min(self.espera_max, self.espera_inicial * 2 ** self._intento)
+            espera *= random.uniform(0.5, 1.0)
+            self._intento += 1
+            self.estado = f"Reintento en {espera:.1f} s"
+            if self._evento.wait(espera):
+                self._evento.clear()
+
+    def _orden_candidatos(self):
+        if self.url in self.puertos:
+            return [self.url] + [p for p in self.puertos if p != self.url]
+        return self.puertos
+
+    def _conectado(self, puerto, url):
+        ahora = time.monotonic()
+        self.ultima_reconexion_s = ahora - self._desde_caida
+        if self.conexiones and self.medidor is not None:
+            self.medidor.agregar("reconexion", self.ultima_reconexion_s * 1000)
+        self.conexiones += 1
+        self.url = url
+        self.ultimo_dato = ahora
+        self._desde_conexion = ahora
+        self._caido = None
+        self._evento.clear()
+        self.puerto = puerto
+        self.estado = f"Conectado ({url})"
+        print(f"Conectado a {url} en {self.ultima_reconexion_s * 1000:.0f} ms")
+
+    def _cerrar(self, motivo):
+        """Cierra el puerto actual; `motivo` ("error"/"silencio") cuenta como caída."""
+        puerto, self.puerto = self.puerto, None
+        if puerto is None:
+            return
+        ahora = time.monotonic()
+        self._tiempo_enlace_previo += ahora - self._desde_conexion
+        # El backoff solo se reinicia si el enlace llegó a entregar datos
+        if self.ultimo_dato > self._desde_conexion:
+            self._intento = 0
+        self._desde_conexion = None
+        self._desde_caida = ahora
+        try:
+            puerto.close()
+        except Exception:
+            pass
+        if motivo is not None:
+            self.caidas[motivo] += 1
+            self.estado = "Reconectando..."
+            print(f"Enlace perdido ({motivo}) en {self.url}")
+
+    @property
+    def conectado(self):
+        return self.puerto is not None
+
+    def tiempo_enlace(self):
+        """Segundos que lleva abierto el enlace actual (0 si está caído)."""
+        if self._desde_conexion is None:
+            return 0.0
+        return time.monotonic() - self._desde_conexion
+
+    def disponibilidad(self):
+        """Fracción del tiempo desde el inicio con el enlace abierto."""
+        total = time.monotonic() - self._inicio
+        return (self._tiempo_enlace_previo + self.tiempo_enlace()) / total if total else 0.0
+
+    def metricas(self):
+        return {
+            "url": self.url,
+            "conexiones": self.conexiones,
+            "caidas_error": self.caidas["error"],
+            "caidas_silencio": self.caidas["silencio"],
+            "ultima_reconexion_s": self.ultima_reconexion_s,
+            "tiempo_enlace_s": self.tiempo_enlace(),
+            "disponibilidad": self.disponibilidad(),
+        }
@@ -0,0 +1,544 @@
+import math
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+
+# Índices del vector de estado
+X, Y, Z, VX, VY, VZ, THETA, BETA, OMEGA_THETA, OMEGA_BETA = range(10)
+STATE_SIZE = 10
+
+# Índices del vector de entradas: propulsores, flotabilidad extra y pitch impuesto
+F1, F2, F3, F4, DELTA_B, THETA_REF = range(6)
+INPUT_SIZE = 6
+
+
+class ROUVParams(NamedTuple):
+    """Parámetros físicos y geométricos del ROUV."""
+    m: float = 10.0         # masa (kg)
+    Iy: float = 2.0         # inercia pitch (kg·m²)
+    Iz: float = 1.5         # inercia yaw (kg·m²)
+    g: float = 9.81
+    Dx: float = 1.0         # arrastre cuadrático horizontal
+    Dz: float = 1.2         # arrastre cuadrático vertical
+    d: float = 0.5          # distancia del centro de masa a propulsores verticales
+    l: float = 0.3          # distancia del centro de masa a propulsores horizontales
+    phi: float = np.deg2rad(39.4)
+    D_theta: float = 0.3    # amortiguamiento pitch
+    D_beta: float = 0.3     # amortiguamiento yaw
+    max_thrust: float = math.inf    # saturación de cada propulsor (N)
+    buoyancy_offset: float = 0.0    # flotabilidad neta extra, p. ej. por carga (N)
+
+    @property
+    def b_neutral(self):
+        return self.m * self.g
+
+
+DEFAULT_PARAMS = ROUVParams()
+
+
+def initial_state(x=0.0, y=0.0, z=-2.0):
+    """Estado en reposo en la posición dada."""
+    state = np.zeros(STATE_SIZE)
+    state[X], state[Y], state[Z] = x, y, z
+    return state
+
+
+def make_inputs(F1=0.0, F2=0.0, F3=0.0, F4=0.0, delta_b=0.0, theta=0.0):
+    """Vector de entradas; `theta` es el pitch impuesto (rad)."""
+    return np.array([F1, F2, F3, F4, delta_b, theta], dtype=np.float64)
+
+
+def yaw_moment(inputs, params=DEFAULT_PARAMS):
+    """Momento de yaw generado por la diferencia F1 - F2."""
+    return params.l * (inputs[F1] - inputs[F2]) / 2
+
+
+def step(state, inputs, dt, params=DEFAULT_PARAMS):
+    """Avanza un paso de `dt` y devuelve el estado nuevo (no modifica `state`).
+
+    Es la misma dinámica que tenía `update` en el simulador: Euler semi-implícito,
+    pitch impuesto por la entrada, yaw dinámico por el diferencial F1 - F2 y
+    velocidades lineales en el sistema local.
+    """
+    x, y, z, vx, vy, vz, _, beta, omega_theta, omega_beta = state
+    f1, f2, f3, f4, delta_b, theta = inputs
+    if params.max_thrust != math.inf:
+        limit = params.max_thrust
+        f1, f2, f3, f4 = (min(max(f, -limit), limit) for f in (f1, f2, f3, f4))
+    delta_b += params.buoyancy_offset
+
+    # Yaw: momento, aceleración angular, velocidad y ángulo
+    M_yaw = params.l * (f1 - f2) / 2
+    alpha_beta = (M_yaw - params.D_beta * omega_beta) / params.Iz
+    omega_beta += alpha_beta * dt
+    beta += omega_beta * dt
+
+    # Fuerzas y aceleraciones lineales en el sistema local
+    sin_t, cos_t = math.sin(theta), math.cos(theta)
+    F_forward_local = (f1 + f2) * cos_t
+    F_vertical_local = (f3 + f4) + (f1 + f2) * sin_t + delta_b
+    vx += (F_forward_local - params.Dx * abs(vx) * vx) / params.m * dt
+    vy += (-params.Dx * abs(vy) * vy) / params.m * dt
+    vz += (F_vertical_local - params.Dz * abs(vz) * vz) / params.m * dt
+
+    # Velocidad local -> global: (R_pitch · R_yaw)^T · v
+    sin_b, cos_b = math.sin(beta), math.cos(beta)
+    u = cos_t * vx - sin_t * vz
+    w = sin_t * vx + cos_t * vz
+    x += (cos_b * u + sin_b * vy) * dt
+    y += (-sin_b * u + cos_b * vy) * dt
+    z += w * dt
+
+    return np.array([x, y, z, vx, vy, vz, theta, beta, omega_theta, omega_beta])
+
+
+def step_batch(state, inputs, dt, params=DEFAULT_PARAMS, out=None):
+    """Versión vectorizada de `step` para N vehículos a la vez.
+
+    `state` es (N, 10) e `inputs` (N, 6) o (6,) para todos; cada campo de `params`
+    puede ser escalar o un arreglo (N,) (ver `batch_params`). Devuelve el estado
+    nuevo en `out` (o en un arreglo nuevo); `out` puede ser el mismo `state`.
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if out is None:
+        out = np.empty_like(state)
+    limit = params.max_thrust
+    f1, f2, f3, f4 = (np.clip(inputs[..., i], -limit, limit) for i in (F1, F2, F3, F4))
+    delta_b = inputs[..., DELTA_B] + params.buoyancy_offset
+    theta = inputs[..., THETA_REF]
+
+    # Yaw
+    omega_beta = state[:, OMEGA_BETA]
+    omega_beta = omega_beta + (params.l * (f1 - f2) / 2 - params.D_beta * omega_beta) \
+        / params.Iz * dt
+    beta = state[:, BETA] + omega_beta * dt
+
+    # Empuje y arrastre en el sistema local, para todos los vehículos
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+    thrust = f1 + f2
+    vx, vy, vz = state[:, VX], state[:, VY], state[:, VZ]
+    dt_m = dt / params.m
+    vx = vx + (thrust * cos_t - params.Dx * np.abs(vx) * vx) * dt_m
+    vy = vy - params.Dx * np.abs(vy) * vy * dt_m
+    vz = vz + ((f3 + f4) + thrust * sin_t + delta_b - params.Dz * np.abs(vz) * vz) * dt_m
+
+    # Rotación local -> global sin matrices: (R_pitch · R_yaw)^T · v
+    sin_b, cos_b = np.sin(beta), np.cos(beta)
+    u = cos_t * vx - sin_t * vz
+    w = sin_t * vx + cos_t * vz
+    out[:, X] = state[:, X] + (cos_b * u + sin_b * vy) * dt
+    out[:, Y] = state[:, Y] + (cos_b * vy - sin_b * u) * dt
+    out[:, Z] = state[:, Z] + w * dt
+    out[:, VX], out[:, VY], out[:, VZ] = vx, vy, vz
+    out[:, THETA] = theta
+    out[:, BETA] = beta
+    out[:, OMEGA_THETA] = state[:, OMEGA_THETA]
+    out[:, OMEGA_BETA] = omega_beta
+    return out
+
+
+def derivatives(state, inputs, params=DEFAULT_PARAMS):
+    """d(state)/dt del modelo continuo, para un estado (10,) o un lote (N, 10).
+
+    Es la misma física que `step`: el pitch lo impone la entrada, así que θ y ω_θ
+    tienen derivada 0 y los integradores fijan θ = θ_ref al final del paso.
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    limit = params.max_thrust
+    f1, f2, f3, f4 = (np.clip(inputs[..., i], -limit, limit) for i in (F1, F2, F3, F4))
+    delta_b = inputs[..., DELTA_B] + params.buoyancy_offset
+    theta = inputs[..., THETA_REF]
+
+    vx, vy, vz = state[..., VX], state[..., VY], state[..., VZ]
+    omega_beta = state[..., OMEGA_BETA]
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+    sin_b, cos_b = np.sin(state[..., BETA]), np.cos(state[..., BETA])
+    thrust = f1 + f2
+    u = cos_t * vx - sin_t * vz
+
+    d = np.zeros_like(state)
+    d[..., X] = cos_b * u + sin_b * vy
+    d[..., Y] = cos_b * vy - sin_b * u
+    d[..., Z] = sin_t * vx + cos_t * vz
+    d[..., VX] = (thrust * cos_t - params.Dx * np.abs(vx) * vx) / params.m
+    d[..., VY] = -params.Dx * np.abs(vy) * vy / params.m
+    d[..., VZ] = ((f3 + f4) + thrust * sin_t + delta_b - params.Dz * np.abs(vz) * vz) / params.m
+    d[..., BETA] = omega_beta
+    d[..., OMEGA_BETA] = (params.l * (f1 - f2) / 2 - params.D_beta * omega_beta) / params.Iz
+    return d
+
+
+def semi_implicit_euler(state, inputs, dt, params=DEFAULT_PARAMS):
+    """Euler semi-implícito (simpléctico): velocidades primero y posiciones con las
+    velocidades nuevas. Es `step` o `step_batch` según la forma del estado."""
+    if np.ndim(state) == 2:
+        return step_batch(state, inputs, dt, params)
+    return step(state, inputs, dt, params)
+
+
+def rk4_step(state, inputs, dt, params=DEFAULT_PARAMS):
+    """Runge-Kutta clásico de orden 4 con las entradas fijas durante el paso."""
+    inputs = np.asarray(inputs, dtype=np.float64)
+    k1 = derivatives(state, inputs, params)
+    k2 = derivatives(state + 0.5 * dt * k1, inputs, params)
+    k3 = derivatives(state + 0.5 * dt * k2, inputs, params)
+    k4 = derivatives(state + dt * k3, inputs, params)
+    new = state + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    new[..., THETA] = inputs[..., THETA_REF]
+    return new
+
+
+# Tablero de Butcher de Dormand-Prince 5(4); la última fila de A es la solución de
+# orden 5, así que su derivada es la primera etapa del paso siguiente (FSAL)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# Orden 5 menos orden 4: estimación del error local
+_DP_E = (35 / 384 - 5179 / 57600, 0.0, 500 / 1113 - 7571 / 16695, 125 / 192 - 393 / 640,
+         -2187 / 6784 + 92097 / 339200, 11 / 84 - 187 / 2100, -1 / 40)
+
+
+class DormandPrince:
+    """Integrador adaptativo Dormand-Prince 5(4) con control del error local.
+
+    Cada llamada avanza exactamente `dt` (el paso fijo de la simulación) en uno o
+    más pasos internos, cuyo tamaño se ajusta para que el error estimado quede por
+    debajo de `atol + rtol·|y|`; el último tamaño aceptado se recuerda para la
+    llamada siguiente. En un lote el paso es común y lo decide el peor vehículo.
+    """
+
+    def __init__(self, rtol=1e-6, atol=1e-8, h_min=1e-6):
+        self.rtol = rtol
+        self.atol = atol
+        self.h_min = h_min
+        self.h = None
+        self.accepted = 0
+        self.rejected = 0
+
+    def reset(self):
+        self.h = None
+
+    def __call__(self, state, inputs, dt, params=DEFAULT_PARAMS):
+        inputs = np.asarray(inputs, dtype=np.float64)
+        y = np.array(state, dtype=np.float64)
+        k = [derivatives(y, inputs, params)]
+        h_next = dt if self.h is None else min(self.h, dt)
+        t = 0.0
+        while dt - t > 1e-12 * dt:
+            h = min(h_next, dt - t)
+            del k[1:]
+            for row in _DP_A[1:]:
+                k.append(derivatives(y + h * sum(a * kj for a, kj in zip(row, k) if a),
+                                     inputs, params))
+            # La etapa 7 se evaluó en la solución de orden 5
+            y_new = y + h * sum(a * kj for a, kj in zip(_DP_A[-1], k) if a)
+            error = h * sum(e * kj for e, kj in zip(_DP_E, k) if e)
+            scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(y_new))
+            norm = float(np.max(np.sqrt(np.mean((error / scale) ** 2, axis=-1))))
+            if not math.isfinite(norm):
+                norm = math.inf
+
+            factor = min(max(0.9 * norm ** -0.2, 0.2), 5.0) if norm > 0 else 5.0
+            if norm <= 1.0:
+                t += h
+                y = y_new
+                k = [k[-1]]
+                self.accepted += 1
+                # Un paso recortado para llegar justo a `dt` no debe achicar el siguiente
+                h_next = max(h * factor, h_next) if h < h_next else h * factor
+            else:
+                self.rejected += 1
+                h_next = h * factor
+                if h_next < self.h_min:
+                    raise FloatingPointError(
+                        f"DormandPrince: paso {h_next:.2e} s menor que h_min; "
+                        "el sistema es demasiado rígido para estas tolerancias")
+        self.h = h_next
+        y[..., THETA] = inputs[..., THETA_REF]
+        return y
+
+
+INTEGRATORS = ("euler", "rk4", "rk45")
+
+
+def make_integrator(name="euler", **options):
+    """Integrador por nombre: "euler" (semi-implícito), "rk4" o "rk45" (adaptativo;
+    `options` son `rtol`, `atol` y `h_min` de `DormandPrince`)."""
+    if name == "euler":
+        return semi_implicit_euler
+    if name == "rk4":
+        return rk4_step
+    if name == "rk45":
+        return DormandPrince(**options)
+    raise ValueError(f"Integrador desconocido: {name!r} (opciones: {', '.join(INTEGRATORS)})")
+
+
+def batch_params(n, base=DEFAULT_PARAMS, **fields):
+    """`ROUVParams` con cada campo dado convertido en un arreglo (N,); el resto queda
+    escalar (numpy los difunde igual)."""
+    arrays = {name: np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+              for name, value in fields.items()}
+    return base._replace(**arrays)
+
+
+def sample_params(n, rng=None, base=DEFAULT_PARAMS, mass_sd=0.05, drag_sd=0.10,
+                  inertia_sd=0.10, thrust_sd=0.08, buoyancy_sd=2.0, max_thrust=20.0):
+    """Parámetros aleatorios para Monte Carlo: variación de fabricación y de carga.
+
+    Masa, arrastre, inercia de yaw y empuje máximo varían en forma relativa (desvío
+    estándar dado como fracción del nominal); la flotabilidad neta extra en N.
+    """
+    rng = np.random.default_rng(rng)
+    return batch_params(
+        n, base,
+        m=base.m * (1 + mass_sd * rng.standard_normal(n)),
+        Dx=base.Dx * (1 + drag_sd * rng.standard_normal(n)),
+        Dz=base.Dz * (1 + drag_sd * rng.standard_normal(n)),
+        Iz=base.Iz * (1 + inertia_sd * rng.standard_normal(n)),
+        max_thrust=max_thrust * (1 + thrust_sd * rng.standard_normal(n)),
+        buoyancy_offset=base.buoyancy_offset + buoyancy_sd * rng.standard_normal(n))
+
+
+def monte_carlo(n, duration, inputs, dt=0.03, params=None, rng=None, state=None,
+                integrator="euler"):
+    """Simula N vehículos durante `duration` s y devuelve (estados finales, params).
+
+    `inputs` es un vector (6,) o (N, 6) fijo, o una función `inputs(t, state)` que
+    devuelve uno de esos para todo el lote en cada paso.
+    """
+    if params is None:
+        params = sample_params(n, rng)
+    if state is None:
+        state = np.tile(initial_state(), (n, 1))
+    sim = FixedStepSimulation(state, dt, params, integrator=integrator)
+    sim.advance(round(duration / dt) * dt, inputs)
+    return sim.state, params
+
+
+class PIDGains(NamedTuple):
+    """Ganancias de un PID; cada una escalar o un arreglo (N,) para un lote."""
+    kp: float = 0.0
+    ki: float = 0.0
+    kd: float = 0.0
+
+
+# Ganancias elegidas por `autotuning.py` (4000 candidatos por lazo, semilla 0):
+# escalón de 3 m / 90° con sobrepaso ≤ 5 %, establecimiento ~1.3 s
+DEFAULT_DEPTH_GAINS = PIDGains(kp=180.0, ki=0.015, kd=58.0)
+DEFAULT_HEADING_GAINS = PIDGains(kp=77.0, ki=0.52, kd=34.0)
+
+
+def scaled_hold_gains(params, reference=DEFAULT_PARAMS):
+    """Ganancias por defecto llevadas a otra masa e inercia (p. ej. las de la malla).
+
+    Las de arriba se ajustaron para `reference`; escalarlas por m y por Iz mantiene
+    la misma aceleración por unidad de error. Con una inercia mucho menor las
+    originales hacen oscilar el rumbo sin establecerse."""
+    depth = PIDGains(*(gain * params.m / reference.m for gain in DEFAULT_DEPTH_GAINS))
+    heading = PIDGains(*(gain * params.Iz / reference.Iz for gain in DEFAULT_HEADING_GAINS))
+    return depth, heading
+
+
+def wrap_angle(angle):
+    """Ángulo llevado a [-π, π)."""
+    return np.mod(np.add(angle, math.pi), 2 * math.pi) - math.pi
+
+
+class HoldController:
+    """Mantiene profundidad (con F3 + F4) y rumbo (con F1 - F2) con dos PID.
+
+    Es una función `inputs(t, state)` para `FixedStepSimulation.advance` y sirve
+    para un vehículo o un lote: las ganancias pueden ser arreglos (N,), p. ej. para
+    evaluar miles de candidatos a la vez. La derivada se toma de la medición
+    (velocidad vertical y ω_β), así un cambio de referencia no da un salto, y la
+    integral se congela mientras el actuador satura empujando hacia la referencia
+    (anti-windup). Un lazo con ganancias None queda abierto (sin empuje).
+    """
+
+    def __init__(self, dt, depth_gains=None, heading_gains=None, depth_ref=2.0,
+                 heading_ref=0.0, forward=0.0, pitch=0.0, delta_b=0.0, max_thrust=20.0):
+        self.dt = dt
+        self.depth_gains = depth_gains
+        self.heading_gains = heading_gains
+        self.depth_ref = depth_ref          # m, positivo hacia abajo
+        self.heading_ref = heading_ref      # rad
+        self.forward = forward              # empuje de avance de F1 y F2 (N)
+        self.pitch = pitch
+        self.delta_b = delta_b
+        self.max_thrust = max_thrust        # por propulsor (N)
+        self.last_inputs = None
+        self.reset()
+
+    def reset(self):
+        self.depth_integral = 0.0
+        self.heading_integral = 0.0
+
+    def _pid(self, gains, error, error_rate, integral, limit):
+        candidate = integral + error * self.dt
+        u = gains.kp * error + gains.ki * candidate + gains.kd * error_rate
+        windup = (np.abs(u) > limit) & (np.sign(u) == np.sign(error))
+        integral = np.where(windup, integral, candidate)
+        u = gains.kp * error + gains.ki * integral + gains.kd * error_rate
+        return np.clip(u, -limit, limit), integral
+
+    def __call__(self, t, state):
+        limit = self.max_thrust
+        vertical = differential = 0.0
+        if self.depth_gains is not None:
+            # Error en z (hacia arriba): z_ref - z; su derivada es -dz/dt
+            error = -self.depth_ref - state[..., Z]
+            rate = math.sin(self.pitch) * state[..., VX] + math.cos(self.pitch) * state[..., VZ]
+            vertical, self.depth_integral = self._pid(
+                self.depth_gains, error, -rate, self.depth_integral, 2 * limit)
+        if self.heading_gains is not None:
+            error = wrap_angle(self.heading_ref - state[..., BETA])
+            differential, self.heading_integral = self._pid(
+                self.heading_gains, error, -state[..., OMEGA_BETA], self.heading_integral,
+                2 * max(limit - abs(self.forward), 0.0))
+
+        inputs = np.empty(state.shape[:-1] + (INPUT_SIZE,))
+        inputs[..., F1] = np.clip(self.forward + differential / 2, -limit, limit)
+        inputs[..., F2] = np.clip(self.forward - differential / 2, -limit, limit)
+        inputs[..., F3] = inputs[..., F4] = vertical / 2
+        inputs[..., DELTA_B] = self.delta_b
+        inputs[..., THETA_REF] = self.pitch
+        self.last_inputs = inputs
+        return inputs
+
+
+def reference_vectors(state):
+    """Ejes del sistema local expresados en el global (columnas), como en el simulador."""
+    theta, beta = state[THETA], state[BETA]
+    R_yaw = np.array([[np.cos(beta), -np.sin(beta), 0],
+                      [np.sin(beta), np.cos(beta), 0],
+                      [0, 0, 1]])
+    R_pitch = np.array([[np.cos(theta), 0, np.sin(theta)],
+                        [0, 1, 0],
+                        [-np.sin(theta), 0, np.cos(theta)]])
+    return (R_pitch @ R_yaw).T
+
+
+def _as_state(state):
+    """Estado float64; un lote (N, 10) se guarda en orden Fortran para que cada
+    variable (columna) sea contigua en memoria y las operaciones vectorizadas la
+    recorran sin saltos."""
+    if state is None:
+        return initial_state()
+    state = np.asarray(state, dtype=np.float64)
+    return np.asfortranarray(state) if state.ndim == 2 else state.copy()
+
+
+class FixedStepSimulation:
+    """Acumulador de paso fijo: desacopla la física del render.
+
+    `advance(elapsed, inputs)` consume tiempo simulado en pasos exactos de `dt` y
+    guarda el resto para la próxima llamada, así el resultado no depende de cuántos
+    frames se dibujen. Si en una llamada harían falta más de `max_substeps` pasos,
+    el exceso se descarta (y se cuenta) en lugar de atrasarse cada vez más.
+
+    Con un estado (N, 10) simula el lote completo. `integrator` es un nombre de
+    `INTEGRATORS` o una función `integrator(state, inputs, dt, params)`; las
+    entradas se mantienen fijas durante cada paso de `dt`.
+    """
+
+    def __init__(self, state=None, dt=0.03, params=DEFAULT_PARAMS, max_substeps=10_000,
+                 integrator="euler"):
+        self.state = _as_state(state)
+        self.dt = dt
+        self.params = params
+        self.integrator = (make_integrator(integrator) if isinstance(integrator, str)
+                           else integrator)
+        self.max_substeps = max_substeps
+        self.t = 0.0
+        self.steps = 0
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    def reset(self, state=None):
+        self.state = _as_state(state)
+        self.t = 0.0
+        self.steps = 0
+        self.accumulator = 0.0
+        if hasattr(self.integrator, "reset"):
+            self.integrator.reset()
+
+    def advance(self, elapsed, inputs, on_step=None):
+        """Avanza `elapsed` segundos simulados; devuelve cuántos pasos ejecutó.
+
+        `inputs` es un vector fijo o una función `inputs(t, state)` evaluada en cada
+        paso; `on_step(t, state)` se llama tras cada paso (p. ej. para la historia).
+        En modo lote `state` es un buffer que se reutiliza: copiarlo si se guarda.
+        """
+        self.accumulator += elapsed
+        n = int(self.accumulator / self.dt + 1e-9)
+        if n > self.max_substeps:
+            self.dropped_time += (n - self.max_substeps) * self.dt
+            self.accumulator -= (n - self.max_substeps) * self.dt
+            n = self.max_substeps
+        self.accumulator = max(self.accumulator - n * self.dt, 0.0)
+
+        state, dt, params, integrator = self.state, self.dt, self.params, self.integrator
+        batch = state.ndim == 2 and integrator is semi_implicit_euler
+        if batch:
+            # Doble buffer: sin asignar arreglos nuevos en cada paso
+            spare = np.empty_like(state)
+        for _ in range(n):
+            u = inputs(self.t, state) if callable(inputs) else inputs
+            if batch:
+                state, spare = step_batch(state, u, dt, params, out=spare), state
+            else:
+                state = integrator(state, u, dt, params)
+            self.steps += 1
+            self.t = self.steps * dt
+            if on_step is not None:
+                on_step(self.t, state)
+        self.state = state
+        return n
+
+    @property
+    def alpha(self):
+        """Fracción de paso pendiente, para interpolar el render entre dos estados."""
+        return self.accumulator / self.dt
+
+
+def run(sim, duration, inputs, time_scale=1.0, on_frame=None, frame_rate=30.0,
+        on_step=None):
+    """Corre `duration` segundos simulados sin interfaz gráfica.
+
+    `time_scale` 1.0 es tiempo real, 10.0 diez veces más rápido y None lo más
+    rápido posible. `on_frame(sim)` (opcional) se llama a `frame_rate` Hz de reloj
+    real; entre frames la física avanza en pasos fijos, así que la trayectoria es
+    la misma en cualquier modo.
+    """
+    frame_period = 1.0 / frame_rate
+    total_steps = sim.steps + int(round(duration / sim.dt))
+    start = time.monotonic()
+    start_steps = sim.steps
+    next_frame = start
+
+    while sim.steps < total_steps:
+        if time_scale is None:
+            # Lo más rápido posible: bloques de pasos hasta el próximo frame
+            deadline = time.monotonic() + frame_period
+            while sim.steps < total_steps and time.monotonic() < deadline:
+                pending = min(256, total_steps - sim.steps)
+                sim.advance(pending * sim.dt, inputs, on_step)
+        else:
+            next_frame += frame_period
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            target = start_steps + int((time.monotonic() - start) * time_scale / sim.dt)
+            pending = min(target, total_steps) - sim.steps
+            sim.advance(pending * sim.dt, inputs, on_step)
+        if on_frame is not None:
+            on_frame(sim)
+    return sim
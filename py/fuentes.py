@@ -0,0 +1,129 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class FuenteSintetica:
+    """Fuente de video sintética con la interfaz de `cv2.VideoCapture`.
+
+    Genera una escena con ruido y gradiente que se desplaza, para probar el
+    overlay sin cámara. Con `fps` entrega frames a ese ritmo; sin él, lo más
+    rápido posible.
+    """
+
+    def __init__(self, ancho=1280, alto=720, fps=None, variantes=8, semilla=0):
+        self.fps = fps
+        self.variantes = variantes
+        self.semilla = semilla
+        self.abierta = True
+        self.indice = 0
+        self._proximo = None
+        self._generar(ancho, alto)
+
+    def _generar(self, ancho, alto):
+        """Precalcula unas pocas variantes; read() solo copia una."""
+        rng = np.random.default_rng(self.semilla)
+        x = np.linspace(0, 255, ancho, dtype=np.float32)
+        y = np.linspace(0, 255, alto, dtype=np.float32)[:, None]
+        base = np.empty((alto, ancho, 3), dtype=np.uint8)
+        base[..., 0] = (x * 0.6 + y * 0.2).astype(np.uint8)
+        base[..., 1] = (y * 0.7 + 40).astype(np.uint8)
+        base[..., 2] = 60
+        ruido = rng.integers(0, 40, (alto, ancho, 3), dtype=np.uint8)
+        paso = max(ancho // self.variantes, 1)
+        self.frames = [cv2.add(np.roll(base, i * paso, axis=1), ruido)
+                       for i in range(self.variantes)]
+        self.ancho, self.alto = ancho, alto
+
+    def read(self):
+        if not self.abierta:
+            return False, None
+        if self.fps:
+            ahora = time.monotonic()
+            if self._proximo is not None and self._proximo > ahora:
+                time.sleep(self._proximo - ahora)
+            self._proximo = max((self._proximo or ahora) + 1.0 / self.fps, ahora)
+        frame = self.frames[self.indice % self.variantes].copy()
+        self.indice += 1
+        return True, frame
+
+    def set(self, propiedad, valor):
+        if propiedad == cv2.CAP_PROP_FRAME_WIDTH and int(valor) != self.ancho:
+            self._generar(int(valor), self.alto)
+        elif propiedad == cv2.CAP_PROP_FRAME_HEIGHT and int(valor) != self.alto:
+            self._generar(self.ancho, int(valor))
+        return True
+
+    def get(self, propiedad):
+        if propiedad == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.ancho)
+        if propiedad == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.alto)
+        if propiedad == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        return 0.0
+
+    def isOpened(self):
+        return self.abierta
+
+    def release(self):
+        self.abierta = False
+
+
+class FuenteArchivo:
+    """Reproduce un archivo de video como si fuera la cámara (en bucle si `repetir`).
+
+    Con `tiempo_real` respeta el FPS del archivo; si no, entrega lo más rápido posible.
+    """
+
+    def __init__(self, ruta, repetir=True, tiempo_real=True):
+        self.ruta = ruta
+        self.repetir = repetir
+        self.cap = cv2.VideoCapture(ruta)
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.periodo = 1.0 / fps if (tiempo_real and fps > 0) else 0.0
+        self._proximo = None
+        self._tamano = None
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.repetir:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+
+        if self.periodo:
+            ahora = time.monotonic()
+            if self._proximo is not None and self._proximo > ahora:
+                time.sleep(self._proximo - ahora)
+            self._proximo = max((self._proximo or ahora) + self.periodo, ahora)
+        if self._tamano is not None:
+            frame = cv2.resize(frame, self._tamano)
+        return True, frame
+
+    def set(self, propiedad, valor):
+        # Un archivo no cambia de resolución: se escala al tamaño pedido
+        ancho = int(self.get(cv2.CAP_PROP_FRAME_WIDTH))
+        alto = int(self.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if self._tamano is not None:
+            ancho, alto = self._tamano
+        if propiedad == cv2.CAP_PROP_FRAME_WIDTH:
+            self._tamano = (int(valor), alto)
+        elif propiedad == cv2.CAP_PROP_FRAME_HEIGHT:
+            self._tamano = (ancho, int(valor))
+        return True
+
+    def get(self, propiedad):
+        if self._tamano is not None and propiedad == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._tamano[0])
+        if self._tamano is not None and propiedad == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._tamano[1])
+        return self.cap.get(propiedad)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
@@ -0,0 +1,107 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+def _proceso_codificador(nombre_memoria, forma, ranuras, cola_llenos, cola_libres,
+                         carpeta, fps, duracion_segmento, fourcc, extension):
+    """Proceso aparte: toma frames del anillo compartido y los codifica en segmentos."""
+    memoria = shared_memory.SharedMemory(name=nombre_memoria)
+    anillo = np.ndarray((ranuras,) + forma, dtype=np.uint8, buffer=memoria.buf)
+    alto, ancho = forma[:2]
+
+    escritor = None
+    inicio_segmento = 0.0
+    segmento = 0
+    try:
+        while True:
+            elemento = cola_llenos.get()
+            if elemento is None:
+                break
+            ranura, marca = elemento
+
+            # Cortar en segmentos por tiempo de captura
+            if escritor is None or marca - inicio_segmento >= duracion_segmento:
+                if escritor is not None:
+                    escritor.release()
+                segmento += 1
+                nombre = time.strftime(f"inmersion_%Y%m%d_%H%M%S_{segmento:03d}.{extension}")
+                escritor = cv2.VideoWriter(os.path.join(carpeta, nombre),
+                                           cv2.VideoWriter_fourcc(*fourcc), fps, (ancho, alto))
+                inicio_segmento = marca
+
+            escritor.write(anillo[ranura])
+            cola_libres.put(ranura)
+    finally:
+        if escritor is not None:
+            escritor.release()
+        del anillo
+        memoria.close()
+
+
+class GrabadorVideo:
+    """Graba el video anotado en otro proceso a través de un anillo en memoria compartida.
+
+    `escribir` nunca bloquea: si el codificador no alcanza y no hay ranura libre,
+    el frame se descarta de la grabación (no de la pantalla) y se cuenta.
+    """
+
+    def __init__(self, carpeta="grabaciones", ancho=1280, alto=720, fps=30,
+                 duracion_segmento=300, ranuras=8, fourcc="mp4v", extension="mp4"):
+        os.makedirs(carpeta, exist_ok=True)
+        self.forma = (alto, ancho, 3)
+        self.ranuras = ranuras
+
+        tamano = ranuras * alto * ancho * 3
+        self.memoria = shared_memory.SharedMemory(create=True, size=tamano)
+        self.anillo = np.ndarray((ranuras,) + self.forma, dtype=np.uint8,
+                                 buffer=self.memoria.buf)
+
+        contexto = mp.get_context("spawn")
+        self.cola_llenos = contexto.Queue()
+        self.cola_libres = contexto.Queue()
+        for ranura in range(ranuras):
+            self.cola_libres.put(ranura)
+
+        self.proceso = contexto.Process(
+            target=_proceso_codificador,
+            args=(self.memoria.name, self.forma, ranuras, self.cola_llenos, self.cola_libres,
+                  carpeta, fps, duracion_segmento, fourcc, extension),
+            daemon=True)
+        self.proceso.start()
+
+        # Contadores
+        self.frames_grabados = 0
+        self.frames_descartados = 0
+
+    def escribir(self, frame, marca=None):
+        """Copia el frame a una ranura libre; si no hay, lo descarta. No bloquea."""
+        try:
+            ranura = self.cola_libres.get_nowait()
+        except queue.Empty:
+            self.frames_descartados += 1
+            return False
+
+        destino = self.anillo[ranura]
+        if frame.shape == self.forma:
+            np.copyto(destino, frame)
+        else:
+            cv2.resize(frame, (self.forma[1], self.forma[0]), dst=destino)
+        self.cola_llenos.put((ranura, time.monotonic() if marca is None else marca))
+        self.frames_grabados += 1
+        return True
+
+    def cerrar(self, timeout=10.0):
+        """Termina de codificar lo pendiente y libera la memoria compartida."""
+        self.cola_llenos.put(None)
+        self.proceso.join(timeout)
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+        del self.anillo
+        self.memoria.close()
+        self.memoria.unlink()
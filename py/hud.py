@@ -0,0 +1,221 @@
+import cv2
+import numpy as np
+
+
+BLANCO = (255, 255, 255)
+
+
+def avance_texto(texto, fuente, escala, grosor=1):
+    """Desplazamiento horizontal exacto que putText aplica tras dibujar `texto`."""
+    referencia = cv2.getTextSize("0", fuente, escala, grosor)[0][0]
+    return cv2.getTextSize(texto + "0", fuente, escala, grosor)[0][0] - referencia
+
+
+def indices_texto(texto, org, forma, fuente, escala, grosor=1):
+    """Índices planos (sobre un frame de `forma`) de los píxeles que pintaría putText.
+
+    La máscara se binariza: si la versión de OpenCV suaviza el texto, los bordes con
+    cobertura menor a la mitad se descartan y el resto se pinta con color sólido.
+    """
+    alto, ancho = forma
+    (w, h), base = cv2.getTextSize(texto, fuente, escala, grosor)
+    margen = grosor + 2
+
+    mascara = np.zeros((h + base + 2 * margen, w + 2 * margen), dtype=np.uint8)
+    cv2.putText(mascara, texto, (margen, h + margen), fuente, escala, 255, grosor)
+
+    ys, xs = np.nonzero(mascara >= 128)
+    ys += org[1] - h - margen
+    xs += org[0] - margen
+    dentro = (ys >= 0) & (ys < alto) & (xs >= 0) & (xs < ancho)
+    return ys[dentro] * ancho + xs[dentro]
+
+
+def pintar_indices(frame, indices, color):
+    """Pinta de `color` los píxeles dados por índices planos."""
+    if frame.flags.c_contiguous:
+        frame.reshape(-1, 3)[indices] = color
+    else:
+        ancho = frame.shape[1]
+        frame[indices // ancho, indices % ancho] = color
+
+
+class TextoCacheado:
+    """Texto rasterizado una vez como máscara; solo se vuelve a rasterizar si cambia."""
+
+    def __init__(self, fuente, escala, grosor=1):
+        self.fuente = fuente
+        self.escala = escala
+        self.grosor = grosor
+        self.texto = None
+        self.org = None
+        self.forma = None
+        self.indices = np.empty(0, dtype=np.intp)
+        self.rasterizados = 0
+
+    def preparar(self, texto, org, forma):
+        """Rasteriza de nuevo solo si cambió el texto, la posición o la resolución."""
+        if texto == self.texto and org == self.org and forma == self.forma:
+            return
+        self.texto, self.org, self.forma = texto, org, forma
+        self.indices = indices_texto(texto, org, forma, self.fuente, self.escala,
+                                     self.grosor)
+        self.rasterizados += 1
+
+    def dibujar(self, frame, texto, org, color):
+        self.preparar(texto, org, frame.shape[:2])
+        pintar_indices(frame, self.indices, color)
+
+
+class CapaHUD:
+    """Partes estáticas del HUD (panel, título y etiquetas) prerenderizadas por resolución.
+
+    Los valores (y los demás textos que cambian) van con putText en cada frame: con
+    OpenCV 4.x y LINE_8 es más barato que cachear su máscara (`benchmark_hud.py`).
+    """
+
+    ALTO_PANEL = 150
+    ALFA_PANEL = 0.7
+    FUENTE_DATOS = cv2.FONT_HERSHEY_SIMPLEX
+    ESCALA_DATOS = 0.6
+
+    def __init__(self, ancho, alto, titulo, pos_titulo, posiciones_datos):
+        self.forma = (alto, ancho)
+        self.y_panel = max(alto - self.ALTO_PANEL, 0)
+
+        # Título (fijo)
+        indices_titulo = indices_texto(titulo, pos_titulo, self.forma,
+                                       cv2.FONT_HERSHEY_COMPLEX, 1.5, 3)
+
+        # Etiquetas "Clave: " fijas; el valor se dibuja a continuación
+        self.indices_etiquetas = {}
+        self.pos_valores = {}
+        for clave, pos in posiciones_datos:
+            etiqueta = f"{clave}: "
+            self.indices_etiquetas[clave] = indices_texto(
+                etiqueta, pos, self.forma, self.FUENTE_DATOS, self.ESCALA_DATOS)
+            desplazamiento = avance_texto(etiqueta, self.FUENTE_DATOS, self.ESCALA_DATOS)
+            self.pos_valores[clave] = (pos[0] + desplazamiento, pos[1])
+
+        # Todas las etiquetas (blancas) se pintan con una sola asignación
+        self.indices_titulo = indices_titulo
+        self.indices_etiquetas_todas = np.concatenate(list(self.indices_etiquetas.values()))
+
+    def oscurecer_panel(self, frame):
+        """Mezcla el panel negro con alfa fijo: equivale a escalar la franja inferior."""
+        panel = frame[self.y_panel:]
+        cv2.convertScaleAbs(panel, dst=panel, alpha=1.0 - self.ALFA_PANEL)
+
+    def dibujar_titulo(self, frame, color):
+        pintar_indices(frame, self.indices_titulo, color)
+
+    def dibujar_etiquetas(self, frame):
+        pintar_indices(frame, self.indices_etiquetas_todas, BLANCO)
+
+    def dibujar_dato(self, frame, clave, valor, color=BLANCO):
+        """Dibuja el valor de un dato; si el color no es el por defecto, recolorea su etiqueta."""
+        if color != BLANCO:
+            pintar_indices(frame, self.indices_etiquetas[clave], color)
+        cv2.putText(frame, valor, self.pos_valores[clave], self.FUENTE_DATOS,
+                    self.ESCALA_DATOS, color, 1)
+
+
+class Sparkline:
+    """Mini gráfico con la historia reciente de un dato.
+
+    El trazo se rasteriza (en una máscara del tamaño del gráfico) solo cuando cambia
+    `version`, es decir cuando llega una muestra nueva; el resto de los frames solo
+    se pintan sus índices. La escala vertical se ajusta al mínimo y máximo visibles.
+    """
+
+    def __init__(self, org, ancho=120, alto=18, grosor=1):
+        self.org = org
+        self.ancho = ancho
+        self.alto = alto
+        self.grosor = grosor
+        self.version = None
+        self.forma = None
+        self.indices = np.empty(0, dtype=np.intp)
+        self.rasterizados = 0
+
+    def preparar(self, valores, version, forma):
+        if version == self.version and forma == self.forma:
+            return
+        self.version, self.forma = version, forma
+        self.rasterizados += 1
+        if len(valores) < 2:
+            self.indices = np.empty(0, dtype=np.intp)
+            return
+
+        # Polilínea vectorizada: x uniforme, y normalizada al rango visible
+        minimo, maximo = float(valores.min()), float(valores.max())
+        rango = (maximo - minimo) or 1.0
+        puntos = np.empty((len(valores), 2), dtype=np.int32)
+        puntos[:, 0] = np.linspace(0, self.ancho - 1, len(valores))
+        puntos[:, 1] = np.rint((self.alto - 1) * (maximo - valores) / rango)
+
+        mascara = np.zeros((self.alto, self.ancho), dtype=np.uint8)
+        cv2.polylines(mascara, [puntos], False, 255, self.grosor, cv2.LINE_8)
+        ys, xs = np.nonzero(mascara)
+        alto, ancho = forma
+        ys += self.org[1]
+        xs += self.org[0]
+        dentro = (ys >= 0) & (ys < alto) & (xs >= 0) & (xs < ancho)
+        self.indices = ys[dentro] * ancho + xs[dentro]
+
+    def dibujar(self, frame, valores, version, color):
+        """`version` identifica el contenido (p. ej. el total de muestras del buffer)."""
+        self.preparar(valores, version, frame.shape[:2])
+        pintar_indices(frame, self.indices, color)
+
+
+def mezclar_region(frame, region, fondo, alfa):
+    """Mezcla `fondo` sobre `region` = (y0, y1, x0, x1) del frame, en su lugar."""
+    y0, y1, x0, x1 = region
+    roi = frame[y0:y1, x0:x1]
+    cv2.addWeighted(roi, 1.0 - alfa, fondo, alfa, 0, dst=roi)
+
+
+class BannerAlerta:
+    """Aviso centrado (caja semitransparente + texto) compuesto solo sobre su ROI.
+
+    El tamaño del texto se calcula una vez y la geometría de la caja una vez por
+    resolución, así que el costo no depende del tamaño del frame.
+    """
+
+    def __init__(self, texto, color_texto=(0, 0, 255), color_fondo=(0, 0, 100),
+                 alfa=0.5, escala=1, grosor=2, margen=10):
+        self.texto = texto
+        self.color_texto = color_texto
+        self.color_fondo = color_fondo
+        self.alfa = alfa
+        self.margen = margen
+        self.tamano = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, escala, grosor)[0]
+        self.campo = TextoCacheado(cv2.FONT_HERSHEY_SIMPLEX, escala, grosor)
+
+        self.forma = None
+        self.region = None
+        self.org = None
+        self.fondo = None
+
+    def _geometria(self, forma):
+        """Caja y posición del texto para una resolución (recortadas al frame)."""
+        alto, ancho = forma
+        tw, th = self.tamano
+        x0 = max(ancho//2 - tw//2 - self.margen, 0)
+        y0 = max(alto//2 - th//2 - self.margen, 0)
+        x1 = min(ancho//2 + tw//2 + self.margen + 1, ancho)
+        y1 = min(alto//2 + th//2 + self.margen + 1, alto)
+
+        self.forma = forma
+        self.region = (y0, y1, x0, x1)
+        self.org = (ancho//2 - tw//2, alto//2 + th//2)
+        self.fondo = np.empty((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        self.fondo[:] = self.color_fondo
+
+    def dibujar(self, frame):
+        forma = frame.shape[:2]
+        if forma != self.forma:
+            self._geometria(forma)
+        mezclar_region(frame, self.region, self.fondo, self.alfa)
+        self.campo.dibujar(frame, self.texto, self.org, self.color_texto)
@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+
+PERCENTILES = (50, 95, 99)
+
+
+class HistogramaLatencia:
+    """Ventana circular de duraciones en ms; los percentiles se calculan bajo demanda."""
+
+    def __init__(self, capacidad=1024):
+        self.muestras = np.zeros(capacidad, dtype=np.float64)
+        self.capacidad = capacidad
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def agregar(self, ms):
+        self.muestras[self.total % self.capacidad] = ms
+        self.total += 1
+        self.suma += ms
+        if ms > self.maximo:
+            self.maximo = ms
+
+    def ventana(self):
+        return self.muestras[:min(self.total, self.capacidad)]
+
+    def resumen(self):
+        """p50/p95/p99 de la ventana reciente, más media y máximo históricos."""
+        ventana = self.ventana()
+        if not len(ventana):
+            return None
+        p = np.percentile(ventana, PERCENTILES)
+        resumen = {f"p{q}": float(v) for q, v in zip(PERCENTILES, p)}
+        resumen["media"] = self.suma / self.total
+        resumen["max"] = self.maximo
+        resumen["n"] = self.total
+        return resumen
+
+
+class MedidorEtapas:
+    """Cronómetros por etapa con reloj monotónico de alta resolución.
+
+    Uso: `t = medidor.marca()` al iniciar y `t = medidor.registrar("etapa", t)` al
+    terminar cada etapa; devuelve la marca nueva para encadenar la siguiente.
+    Cada etapa debe registrarse siempre desde el mismo hilo.
+    """
+
+    def __init__(self, capacidad=1024):
+        self.capacidad = capacidad
+        self.etapas = {}
+
+    @staticmethod
+    def marca():
+        return time.perf_counter_ns()
+
+    def histograma(self, etapa):
+        histograma = self.etapas.get(etapa)
+        if histograma is None:
+            histograma = self.etapas[etapa] = HistogramaLatencia(self.capacidad)
+        return histograma
+
+    def registrar(self, etapa, inicio):
+        """Registra el tiempo desde `inicio` y devuelve la marca actual."""
+        ahora = time.perf_counter_ns()
+        self.histograma(etapa).agregar((ahora - inicio) / 1e6)
+        return ahora
+
+    def agregar(self, etapa, ms):
+        """Registra una duración ya medida (por ejemplo una latencia)."""
+        self.histograma(etapa).agregar(ms)
+
+    def resumen(self):
+        return {etapa: h.resumen() for etapa, h in list(self.etapas.items()) if h.total}
+
+    def texto_hud(self, etapas):
+        """Línea corta 'etapa p50/p95' para el HUD de depuración."""
+        partes = []
+        for etapa in etapas:
+            histograma = self.etapas.get(etapa)
+            if histograma is None or not histograma.total:
+                continue
+            p50, p95 = np.percentile(histograma.ventana(), (50, 95))
+            partes.append(f"{etapa} {p50:.1f}/{p95:.1f}")
+        return " | ".join(partes) + " ms (p50/p95)"
+
+    def guardar_reporte(self, ruta_base, extra=None):
+        """Escribe `ruta_base`.json y `ruta_base`.csv con el resumen por etapa."""
+        carpeta = os.path.dirname(ruta_base)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        resumen = self.resumen()
+
+        with open(ruta_base + ".json", "w", encoding="utf-8") as archivo:
+            json.dump({"etapas": resumen, **(extra or {})}, archivo, indent=2)
+
+        columnas = ["etapa", *(f"p{q}" for q in PERCENTILES), "media", "max", "n"]
+        with open(ruta_base + ".csv", "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(columnas)
+            for etapa, datos in resumen.items():
+                escritor.writerow([etapa] + [datos[c] for c in columnas[1:]])
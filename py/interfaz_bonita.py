@@ -1,16 +1,50 @@
+import argparse
 import cv2
-import serial
 import time
-import threading
 from datetime import datetime, timedelta
-import numpy as np
+
+from captura import CapturaCamara, MarcapasosFrames, ResolucionAdaptativa
+from telemetria import LectorTelemetria
+from conexion import GestorConexion, puertos_candidatos
+from hud import CapaHUD, BannerAlerta, Sparkline
+from buffer_circular import BufferCircular
+from registro_vuelo import RegistroTelemetria, FuenteReplay, ruta_registro_por_defecto
+from grabacion import GrabadorVideo
+from realce import RealceSubmarino, EtapaRealce
+from transmision import ServidorMJPEG
+from instrumentacion import MedidorEtapas
+from fuentes import FuenteSintetica, FuenteArchivo
 
 class BluetoothCameraOverlay:
-    def __init__(self, puerto="COM24", baudrate=9600):
-        """Inicializa la cámara y la conexión Bluetooth."""
+    def __init__(self, puerto="COM24", baudrate=9600, formato_telemetria="auto",
+                 registro=None, replay=None, velocidad_replay=1.0,
+                 carpeta_grabacion="grabaciones", reporte_rendimiento=None,
+                 fps_objetivo=30, resolucion_adaptativa=False,
+                 fuente_video=None, resolucion=(1280, 720), mostrar_ventana=True,
+                 escanear_puertos=False, silencio_max=1.5, realce=False,
+                 transmision=None, calidad_transmision=70, escala_transmision=1.0):
+        """Inicializa la cámara y la conexión Bluetooth.
+
+        `registro` es la ruta de la caja negra de telemetría (None para no grabar),
+        `replay` la de un registro a reproducir en lugar del puerto serie y
+        `reporte_rendimiento` la ruta base (sin extensión) del reporte de tiempos.
+        Con `resolucion_adaptativa` la captura baja de resolución si no se alcanza
+        `fps_objetivo` de forma sostenida.
+
+        `fuente_video` es cualquier objeto con la interfaz de cv2.VideoCapture (por
+        defecto la cámara 0) y `puerto` cualquier URL que acepte
+        serial.serial_for_url ("COM24", "/dev/pts/3", "loop://", "socket://...").
+        Se aceptan varios candidatos (lista o separados por comas); con
+        `escanear_puertos` también se prueban los puertos serie del sistema. Sin
+        bytes durante `silencio_max` segundos el enlace se da por caído.
+
+        Con `realce` los frames pasan por el realce submarino (tecla 'e') en un hilo
+        aparte antes de dibujar el HUD. Con `transmision` (puerto TCP) el video
+        anotado se sirve por HTTP/MJPEG en la red local.
+        """
         self.puerto = puerto
         self.baudrate = baudrate
-        self.bt = None
+        self.conexion = None
         self.start_time = datetime.now()
         self.frame_count = 0
         self.fps = 0
@@ -34,36 +68,85 @@ class BluetoothCameraOverlay:
         self.ultimo_parpadeo = datetime.now()
         self.mostrar_alerta = True
         self.estado_conexion = "Desconectado"
+        self.datos_vencidos = True
+
+        # Instrumentación por etapa (tecla 'd' muestra la línea de depuración)
+        self.medidor = MedidorEtapas()
+        self.reporte_rendimiento = reporte_rendimiento
+        self.mostrar_depuracion = False
+        self.texto_depuracion = ""
+        self.ultima_depuracion = 0.0
+
+        # HUD: partes estáticas cacheadas por resolución
+        self.hud = None
+        self.graficos = {}
+
+        # Historia reciente (últimas 300 muestras) para los mini gráficos del panel
+        self.historial = {clave: BufferCircular(300)
+                          for clave in ("Profundidad", "Pitch", "Roll", "Bateria")}
+        self.banner_bateria = BannerAlerta("!ALERTA! BATERIA BAJA")
 
         # Configuración de cámara
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        self.mostrar_ventana = mostrar_ventana
+        self.cap = cv2.VideoCapture(0) if fuente_video is None else fuente_video
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolucion[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolucion[1])
+        self.cap.set(cv2.CAP_PROP_FPS, fps_objetivo)
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
+
+        # Ritmo del bucle con plazos absolutos y, opcionalmente, resolución adaptativa
+        self.marcapasos = MarcapasosFrames(fps_objetivo)
+        self.adaptativa = (ResolucionAdaptativa(1000.0 / fps_objetivo)
+                           if resolucion_adaptativa else None)
         
         if not self.cap.isOpened():
-            print("Error: No se pudo abrir la cámara")
-            exit()
-
-        # Hilo Bluetooth
-        self.conectando_bt = True
-        self.hilo_bt = threading.Thread(target=self.gestionar_bluetooth, daemon=True)
-        self.hilo_bt.start()
-
-    def gestionar_bluetooth(self):
-        """Hilo para gestión de Bluetooth."""
-        while self.conectando_bt:
-            try:
-                if not self.bt or not self.bt.is_open:
-                    self.estado_conexion = "Conectando..."
-                    self.bt = serial.Serial(self.puerto, self.baudrate, timeout=0.1)
-                    self.estado_conexion = "Conectado"
-                    print(f"Conectado a {self.puerto}")
-                time.sleep(1)
-            except Exception as e:
-                self.estado_conexion = f"Error: {str(e)}"
-                time.sleep(2)
+            raise RuntimeError("No se pudo abrir la cámara")
+
+        # Hilo de captura: siempre conserva solo el frame más reciente
+        self.captura = CapturaCamara(self.cap, self.medidor)
+
+        # Realce de imagen (tecla 'e'); la LUT estimada se conserva entre activaciones
+        self.realce = RealceSubmarino()
+        self.etapa_realce = None
+        self.realce_inicial = realce
+
+        # Transmisión MJPEG para el resto de la tripulación
+        self.transmision = None
+        if transmision is not None:
+            self.transmision = ServidorMJPEG(puerto=transmision, calidad=calidad_transmision,
+                                             escala=escala_transmision, medidor=self.medidor)
+            print(f"Transmitiendo en {self.transmision.url}")
+
+        # Grabación de video (tecla 'g'), codificada en otro proceso
+        self.carpeta_grabacion = carpeta_grabacion
+        self.grabador = None
+
+        # Caja negra de telemetría
+        self.registro = RegistroTelemetria(registro) if registro else None
+
+        if replay:
+            # Telemetría desde un registro grabado, sin puerto serie
+            self.estado_conexion = "Conectado (replay)"
+            self.lector = FuenteReplay(replay, velocidad_replay)
+        else:
+            # Gestor de conexión: detecta caídas y reconecta con backoff
+            self.conexion = GestorConexion(puertos_candidatos(puerto, escanear_puertos),
+                                           baudrate, silencio_max, medidor=self.medidor)
+            self.conexion.iniciar()
+
+            # Hilo lector: toda la E/S serie fuera del bucle de video
+            self.lector = LectorTelemetria(self.conexion.obtener_puerto, formato_telemetria,
+                                           self.registro,
+                                           al_recibir=self.conexion.notificar_datos,
+                                           al_fallar=self.conexion.notificar_caida)
+        self.silencio_max = silencio_max
+        self.ultima_secuencia = None
+        self.lector.iniciar()
+
+    @property
+    def bt(self):
+        """Puerto serie abierto actual (None en replay o mientras se reconecta)."""
+        return None if self.conexion is None else self.conexion.puerto
 
     def calcular_fps(self):
         """Calcula los FPS del video."""
@@ -77,7 +160,7 @@ class BluetoothCameraOverlay:
             self.last_fps_time = current_time
 
     def leer_bluetooth(self):
-        """Lee datos del Bluetooth."""
+        """Aplica la última telemetría publicada por el hilo lector (sin E/S)."""
         if self.modo_prueba_bateria:
             # Forzar valores de prueba
             self.valores_actuales.update({
@@ -91,54 +174,74 @@ class BluetoothCameraOverlay:
                 "Seguridad": "Off"
             })
             self.alerta_bateria = True
+            self.ultima_secuencia = None
+            self.datos_vencidos = False
             return
             
-        if self.bt and self.bt.is_open:
-            try:
-                if self.bt.in_waiting:
-                    datos = self.bt.readline().decode('utf-8').strip()
-                    valores = datos.split(",")
-
-                    if len(valores) == 8:
-                        self.valores_actuales.update({
-                            "Profundidad": f"{valores[0]} cm",
-                            "Distancia": f"{valores[1]} cm",
-                            "Pitch": f"{valores[2]}",
-                            "Roll": f"{valores[3]}",
-                            "Bateria": f"{valores[4]}V",
-                            "Luces": "On" if valores[5] == "1" else "Off",
-                            "Velocidad": f"{valores[6]}%",
-                            "Seguridad": "On" if valores[7] == "1" else "Off"
-                        })
-
-                        # Control de batería
-                        try:
-                            voltaje = float(valores[4])
-                            self.alerta_bateria = voltaje < 9
-                        except:
-                            self.alerta_bateria = False
-            except Exception as e:
-                print(f"Error lectura BT: {e}")
-        else:
-            for key in self.valores_actuales:
-                self.valores_actuales[key] = "Sin Conexion"
+        snapshot = self.lector.snapshot
+        if self.lector.conectado:
+            if snapshot is not None and snapshot.secuencia != self.ultima_secuencia:
+                self.ultima_secuencia = snapshot.secuencia
+                self.valores_actuales.update(snapshot.como_textos())
+                self.historial["Profundidad"].agregar(snapshot.profundidad)
+                self.historial["Pitch"].agregar(snapshot.pitch)
+                self.historial["Roll"].agregar(snapshot.roll)
+                self.historial["Bateria"].agregar(snapshot.bateria)
+
+                # Control de batería
+                self.alerta_bateria = snapshot.bateria < 9
+
+        # Sin enlace o sin datos recientes: se conservan los últimos valores, marcados
+        edad = None if snapshot is None else time.monotonic() - snapshot.recibido
+        self.datos_vencidos = (not self.lector.conectado or edad is None
+                               or edad > self.silencio_max)
+        if self.conexion is not None:
+            self.estado_conexion = self.conexion.estado
+            if self.datos_vencidos and edad is not None:
+                self.estado_conexion += f" | datos de hace {edad:.0f} s"
+
+    def capa_hud(self, width, height):
+        """Devuelve la capa estática del HUD, prerenderizada una vez por resolución."""
+        if self.hud is None or self.hud.forma != (height, width):
+            datos_posiciones = [
+                ("Profundidad", (30, height-120)),
+                ("Distancia", (30, height-95)),
+                ("Pitch", (30, height-70)),
+                ("Roll", (30, height-45)),
+                ("Seguridad", (width//2 + 30, height-120)),
+                ("Velocidad", (width//2 + 30, height-95)),
+                ("Luces", (width//2 + 30, height-70)),
+                ("Bateria", (width//2 + 30, height-45))
+            ]
+            self.hud = CapaHUD(width, height, "NEPTUNE", (width//2 - 150, 50),
+                               datos_posiciones)
+
+            # Mini gráficos a la derecha de cada columna, si hay espacio
+            ancho = min(160, width//2 - 290)
+            self.graficos = {}
+            if ancho >= 40:
+                posiciones = dict(datos_posiciones)
+                for clave, x in (("Profundidad", width//2 - ancho - 30),
+                                 ("Pitch", width//2 - ancho - 30),
+                                 ("Roll", width//2 - ancho - 30),
+                                 ("Bateria", width - ancho - 30)):
+                    self.graficos[clave] = Sparkline((x, posiciones[clave][1] - 16), ancho)
+        return self.hud
 
     def dibujar_interfaz(self, frame):
         """Dibuja la interfaz en el frame."""
         height, width = frame.shape[:2]
+        hud = self.capa_hud(width, height)
         
         # Panel inferior
-        panel_inferior = np.zeros((150, width, 3), dtype=np.uint8)
-        cv2.rectangle(panel_inferior, (0, 0), (width, 150), (0, 0, 0), -1)
-        frame[height-150:height, 0:width] = cv2.addWeighted(
-            frame[height-150:height, 0:width], 0.3, panel_inferior, 0.7, 0)
+        hud.oscurecer_panel(frame)
 
         # Título
-        cv2.putText(frame, "NEPTUNE", (width//2 - 150, 50), 
-                   cv2.FONT_HERSHEY_COMPLEX, 1.5, (255, 255, 0), 3)
+        hud.dibujar_titulo(frame, (255, 255, 0))
 
         # Estado conexión
-        color_conexion = (0, 255, 0) if "Conectado" in self.estado_conexion else (0, 0, 255)
+        color_conexion = ((0, 255, 0) if "Conectado" in self.estado_conexion
+                          and not self.datos_vencidos else (0, 0, 255))
         cv2.putText(frame, f"BT: {self.estado_conexion}", (width - 300, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, color_conexion, 1)
 
@@ -152,29 +255,26 @@ class BluetoothCameraOverlay:
         cv2.putText(frame, hora_actual, (width - 120, 30),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1)
 
-        # Datos
-        datos_posiciones = [
-            ("Profundidad", (30, height-120)),
-            ("Distancia", (30, height-95)),
-            ("Pitch", (30, height-70)),
-            ("Roll", (30, height-45)),
-            ("Seguridad", (width//2 + 30, height-120)),
-            ("Velocidad", (width//2 + 30, height-95)),
-            ("Luces", (width//2 + 30, height-70)),
-            ("Bateria", (width//2 + 30, height-45))
-        ]
-
-        for key, pos in datos_posiciones:
+        # Datos: etiquetas prerenderizadas, valores con putText
+        hud.dibujar_etiquetas(frame)
+        for key in hud.pos_valores:
             color = (255, 255, 255)
-            if key == "Luces" and self.valores_actuales[key] == "On":
+            if self.datos_vencidos:
+                color = (128, 128, 128)  # Últimos valores conocidos, sin actualizar
+            elif key == "Luces" and self.valores_actuales[key] == "On":
                 color = (0, 255, 0)
             elif key == "Seguridad" and self.valores_actuales[key] == "On":
                 color = (0, 255, 255)
             elif key == "Bateria" and self.alerta_bateria:
                 color = (0, 0, 255)
                 
-            cv2.putText(frame, f"{key}: {self.valores_actuales[key]}",
-                       pos, cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 1)
+            hud.dibujar_dato(frame, key, self.valores_actuales[key], color)
+
+        # Tendencias: solo se vuelven a rasterizar cuando llega una muestra nueva
+        color_grafico = (128, 128, 128) if self.datos_vencidos else (255, 255, 0)
+        for key, grafico in self.graficos.items():
+            historial = self.historial[key]
+            grafico.dibujar(frame, historial.ultimos(), historial.total, color_grafico)
 
         # Alerta batería
         if self.alerta_bateria:
@@ -183,56 +283,134 @@ class BluetoothCameraOverlay:
                 self.ultimo_parpadeo = datetime.now()
             
             if self.mostrar_alerta:
-                self.dibujar_alerta_bateria(frame, width, height)
+                self.dibujar_alerta_bateria(frame)
+
+        # Línea de depuración: tiempos por etapa (se recalcula cada 0.5 s)
+        if self.mostrar_depuracion:
+            ahora = time.monotonic()
+            if ahora - self.ultima_depuracion >= 0.5:
+                self.ultima_depuracion = ahora
+                self.texto_depuracion = self.medidor.texto_hud(
+                    ("lectura_camara", "realce", "captura", "telemetria", "dibujo",
+                     "pantalla", "espera", "latencia", "edad_telemetria"))
+            cv2.putText(frame, self.texto_depuracion, (20, 85),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+
+        # Indicador de grabación
+        if self.grabador is not None:
+            cv2.putText(frame, "REC", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
         # FPS
         cv2.putText(frame, f"FPS: {int(self.fps)}", (width - 100, height - 20),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
 
-    def dibujar_alerta_bateria(self, frame, width, height):
-        """Dibuja alerta de batería baja."""
-        texto = "!ALERTA! BATERIA BAJA"
-        tamaño = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, 1, 2)[0]
-        
-        # Fondo
-        overlay = frame.copy()
-        cv2.rectangle(overlay, 
-                     (width//2 - tamaño[0]//2 - 10, height//2 - tamaño[1]//2 - 10),
-                     (width//2 + tamaño[0]//2 + 10, height//2 + tamaño[1]//2 + 10),
-                     (0, 0, 100), -1)
-        frame = cv2.addWeighted(overlay, 0.5, frame, 0.5, 0, frame)
-        
-        # Texto
-        cv2.putText(frame, texto,
-                   (width//2 - tamaño[0]//2, height//2 + tamaño[1]//2),
-                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-
-    def iniciar(self):
-        """Bucle principal."""
-        cv2.namedWindow("NEPTUNE - Control", cv2.WINDOW_NORMAL)
-        cv2.resizeWindow("NEPTUNE - Control", 1280, 720)
+    def dibujar_alerta_bateria(self, frame):
+        """Dibuja alerta de batería baja (solo sobre la región del aviso)."""
+        self.banner_bateria.dibujar(frame)
+
+    def alternar_realce(self):
+        """Activa o desactiva la etapa de realce entre la captura y el dibujo."""
+        if self.etapa_realce is None:
+            self.etapa_realce = EtapaRealce(self.captura, self.realce, self.medidor)
+            self.etapa_realce.iniciar()
+            print("Realce de imagen ACTIVADO")
+        else:
+            etapa, self.etapa_realce = self.etapa_realce, None
+            etapa.detener()
+            print("Realce de imagen DESACTIVADO")
+
+    def alternar_grabacion(self, frame):
+        """Inicia o detiene la grabación del video anotado."""
+        if self.grabador is None:
+            height, width = frame.shape[:2]
+            self.grabador = GrabadorVideo(self.carpeta_grabacion, width, height)
+            print(f"Grabación iniciada en {self.carpeta_grabacion}")
+        else:
+            grabador, self.grabador = self.grabador, None
+            grabador.cerrar()
+            print(f"Grabación detenida: {grabador.frames_grabados} frames grabados, "
+                  f"{grabador.frames_descartados} descartados")
+
+    def iniciar(self, grabar=False, max_frames=None, duracion=None):
+        """Bucle principal.
+
+        `max_frames` y `duracion` (segundos) acotan la ejecución, para pruebas y
+        benchmarks sin ventana.
+        """
+        if self.mostrar_ventana:
+            cv2.namedWindow("NEPTUNE - Control", cv2.WINDOW_NORMAL)
+            cv2.resizeWindow("NEPTUNE - Control", 1280, 720)
         
+        self.frames_mostrados = 0
+        fin = None if duracion is None else time.monotonic() + duracion
+        self.captura.iniciar()
+        if self.realce_inicial:
+            self.alternar_realce()
         try:
-            while True:
-                start_time = time.time()
-                
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("Error: Fallo en cámara")
+            while max_frames is None or self.frames_mostrados < max_frames:
+                if fin is not None and time.monotonic() >= fin:
                     break
+                inicio_frame = t = self.medidor.marca()
+                
+                # Con realce activo, los frames llegan ya procesados por su hilo
+                origen = self.etapa_realce or self.captura
+                frame, marca = origen.obtener_frame(timeout=1.0)
+                if frame is None:
+                    if origen.fallo or not origen.activo:
+                        print("Error: Fallo en cámara")
+                        break
+                    continue
+                t = inicio_trabajo = self.medidor.registrar("captura", t)
 
                 self.leer_bluetooth()
+                snapshot = self.lector.snapshot
+                if snapshot is not None:
+                    self.medidor.agregar("edad_telemetria",
+                                         (time.monotonic() - snapshot.recibido) * 1000)
+                t = self.medidor.registrar("telemetria", t)
+
                 self.calcular_fps()  # Ahora este método existe
                 self.dibujar_interfaz(frame)
+                t = self.medidor.registrar("dibujo", t)
+
+                # Grabación: copia al anillo compartido o descarte, nunca espera
+                if grabar:
+                    grabar = False
+                    self.alternar_grabacion(frame)
+                if self.grabador is not None:
+                    self.grabador.escribir(frame, marca)
+                    t = self.medidor.registrar("grabacion", t)
+
+                # Transmisión: una codificación compartida por todos los clientes
+                if self.transmision is not None and self.transmision.publicar(frame):
+                    t = self.medidor.registrar("transmision", t)
 
-                cv2.imshow("NEPTUNE - Control", frame)
+                key = 0xFF
+                if self.mostrar_ventana:
+                    cv2.imshow("NEPTUNE - Control", frame)
                 
-                # Control
-                key = cv2.waitKey(1) & 0xFF
+                    # Control
+                    key = cv2.waitKey(1) & 0xFF
+                t = self.medidor.registrar("pantalla", t)
+                self.frames_mostrados += 1
+                self.medidor.agregar("latencia", (time.monotonic() - marca) * 1000)
+
+                # Bajar/subir resolución según el tiempo de trabajo sostenido
+                if self.adaptativa is not None:
+                    nueva = self.adaptativa.actualizar((t - inicio_trabajo) / 1e6)
+                    if nueva is not None:
+                        print(f"Resolución de captura: {nueva[0]}x{nueva[1]}")
+                        self.captura.cambiar_resolucion(*nueva)
                 if key == ord('q'):
                     break
                 elif key == ord('f'):
                     print(f"FPS: {int(self.fps)}")
+                elif key == ord('g'):
+                    self.alternar_grabacion(frame)
+                elif key == ord('d'):
+                    self.mostrar_depuracion = not self.mostrar_depuracion
+                elif key == ord('e'):
+                    self.alternar_realce()
                 elif key == ord('t'):  # Tecla 't' para activar modo prueba
                     self.modo_prueba_bateria = not self.modo_prueba_bateria
                     estado = "ACTIVADO" if self.modo_prueba_bateria else "DESACTIVADO"
@@ -242,19 +420,108 @@ class BluetoothCameraOverlay:
                     else:
                         self.alerta_bateria = False
                 
-                # Limitar FPS
-                elapsed = time.time() - start_time
-                if elapsed < 0.033:
-                    time.sleep(0.033 - elapsed)
+                # Limitar FPS con plazos absolutos (salta frames si hay atraso)
+                self.marcapasos.esperar()
+                self.medidor.registrar("espera", t)
+                self.medidor.registrar("frame", inicio_frame)
                     
         finally:
-            self.conectando_bt = False
+            if self.grabador is not None:
+                self.alternar_grabacion(None)
+            self.lector.detener()
+            if self.conexion is not None:
+                self.conexion.detener()
+            if self.etapa_realce is not None:
+                self.etapa_realce.detener()
+            if self.transmision is not None:
+                print(f"Transmisión: {self.transmision.codificados} frames codificados, "
+                      f"{self.transmision.enviados} enviados, "
+                      f"{self.transmision.clientes_descartados} clientes lentos cortados")
+                self.transmision.cerrar()
+            self.captura.detener()
             self.cap.release()
-            if self.bt and self.bt.is_open:
-                self.bt.close()
-            cv2.destroyAllWindows()
+            if self.registro is not None:
+                print(f"Registro de telemetría: {self.registro.escritos} muestras en "
+                      f"{self.registro.ruta}")
+                self.registro.cerrar()
+            if self.reporte_rendimiento:
+                self.medidor.guardar_reporte(self.reporte_rendimiento, {
+                    "frames_capturados": self.captura.frames_capturados,
+                    "frames_descartados": self.captura.frames_descartados,
+                    "frames_saltados": self.marcapasos.frames_saltados,
+                    "lineas_validas": self.lector.lineas_validas,
+                    "errores_parseo": self.lector.errores_parseo,
+                    "conexion": None if self.conexion is None else self.conexion.metricas(),
+                })
+                print(f"Reporte de rendimiento: {self.reporte_rendimiento}.json/.csv")
+            if self.mostrar_ventana:
+                cv2.destroyAllWindows()
+            print(f"Frames capturados: {self.captura.frames_capturados}, "
+                  f"descartados: {self.captura.frames_descartados}")
+            print(f"Telemetría: {self.lector.lineas_validas} líneas válidas, "
+                  f"{self.lector.errores_parseo} errores de parseo, "
+                  f"{self.lector.lineas_descartadas} descartadas")
+            if self.lector.formato == "binario":
+                print(f"Tramas binarias: {self.lector.tramas_validas} válidas, "
+                      f"{self.lector.errores_crc} con CRC inválido, "
+                      f"{self.lector.tramas_perdidas} perdidas")
+            if self.conexion is not None:
+                m = self.conexion.metricas()
+                print(f"Enlace: {m['conexiones']} conexiones, {m['caidas_error']} caídas por "
+                      f"error, {m['caidas_silencio']} por silencio, "
+                      f"disponibilidad {m['disponibilidad']:.1%}")
             print("Sistema cerrado")
 
 if __name__ == "__main__":
-    sistema = BluetoothCameraOverlay(puerto="COM24")
-    sistema.iniciar()
+    parser = argparse.ArgumentParser(description="Interfaz de cámara NEPTUNE")
+    parser.add_argument("--puerto", default="COM24",
+                        help="uno o más puertos candidatos separados por comas")
+    parser.add_argument("--escanear", action="store_true",
+                        help="probar también los puertos serie detectados en el sistema")
+    parser.add_argument("--video", help="archivo de video en lugar de la cámara "
+                                        "('sintetico' para frames generados)")
+    parser.add_argument("--replay", help="reproducir un registro de telemetría")
+    parser.add_argument("--velocidad-replay", type=float, default=1.0,
+                        help="factor de velocidad del replay (0 = lo más rápido posible)")
+    parser.add_argument("--sin-registro", action="store_true",
+                        help="no grabar la telemetría en disco")
+    parser.add_argument("--grabar", action="store_true",
+                        help="grabar el video anotado desde el inicio (tecla 'g')")
+    parser.add_argument("--fps", type=int, default=30, help="FPS objetivo del bucle")
+    parser.add_argument("--transmitir", type=int, metavar="PUERTO",
+                        help="servir el video anotado por HTTP (MJPEG) en este puerto")
+    parser.add_argument("--calidad", type=int, default=70, help="calidad JPEG de la transmisión")
+    parser.add_argument("--escala-transmision", type=float, default=1.0,
+                        help="escala del video transmitido (p. ej. 0.5)")
+    parser.add_argument("--realce", action="store_true",
+                        help="realzar la imagen (balance de blancos, contraste, desempañado; tecla 'e')")
+    parser.add_argument("--adaptativa", action="store_true",
+                        help="bajar la resolución de captura si no se alcanza el FPS objetivo")
+    parser.add_argument("--reporte", default=time.strftime("reportes/rendimiento_%Y%m%d_%H%M%S"),
+                        help="ruta base del reporte de tiempos por etapa ('' para omitirlo)")
+    args = parser.parse_args()
+
+    registro = None if (args.sin_registro or args.replay) else ruta_registro_por_defecto()
+    if args.video == "sintetico":
+        fuente = FuenteSintetica(fps=args.fps)
+    elif args.video:
+        fuente = FuenteArchivo(args.video)
+    else:
+        fuente = None
+    try:
+        sistema = BluetoothCameraOverlay(puerto=args.puerto, registro=registro,
+                                         replay=args.replay,
+                                         velocidad_replay=args.velocidad_replay or None,
+                                         reporte_rendimiento=args.reporte,
+                                         fps_objetivo=args.fps,
+                                         resolucion_adaptativa=args.adaptativa,
+                                         fuente_video=fuente,
+                                         escanear_puertos=args.escanear,
+                                         realce=args.realce,
+                                         transmision=args.transmitir,
+                                         calidad_transmision=args.calidad,
+                                         escala_transmision=args.escala_transmision)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    sistema.iniciar(grabar=args.grabar)
@@ -0,0 +1,213 @@
+"""Mallas STL binarias del ROUV: propiedades de masa, hidrostática y mallas livianas.
+
+La lectura es sin copia (memmap con un dtype estructurado de 50 bytes por
+triángulo). Volumen, centroide y tensor de inercia salen de sumas vectorizadas
+sobre los tetraedros que cada triángulo forma con el origen, así que la malla
+tiene que ser cerrada. Las mallas diezmadas para dibujar se guardan en `.npz`
+según el hash del archivo.
+"""
+import argparse
+import hashlib
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+
+# Registro de un triángulo en un STL binario (después del encabezado de 84 bytes)
+DTYPE_STL = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)),
+                      ("atributo", "<u2")])
+ENCABEZADO = 84
+VERSION_CACHE = 1
+
+
+class PropiedadesMasa(NamedTuple):
+    volumen: float          # m³
+    centroide: np.ndarray   # (3,) m; con el cuerpo sumergido, centro de empuje
+    inercia: np.ndarray     # (3, 3) respecto del centroide, kg·m² con la densidad dada
+
+
+def leer_stl(ruta, memmap=True):
+    """Triángulos de un STL binario como arreglo estructurado (`DTYPE_STL`).
+
+    Con `memmap` no se copia nada: los campos son vistas del archivo."""
+    tamano = os.path.getsize(ruta)
+    with open(ruta, "rb") as archivo:
+        encabezado = archivo.read(ENCABEZADO)
+    if len(encabezado) < ENCABEZADO:
+        raise ValueError(f"{ruta}: archivo demasiado corto para un STL binario")
+    n = int(np.frombuffer(encabezado, "<u4", 1, 80)[0])
+    if tamano != ENCABEZADO + n * DTYPE_STL.itemsize:
+        # Un STL ASCII empieza con "solid" y no respeta el tamaño declarado
+        raise ValueError(f"{ruta}: no es un STL binario ({n} triángulos declarados, "
+                         f"{tamano} bytes)")
+    if memmap:
+        return np.memmap(ruta, DTYPE_STL, mode="r", offset=ENCABEZADO, shape=(n,))
+    return np.fromfile(ruta, DTYPE_STL, count=n, offset=ENCABEZADO)
+
+
+def _matriz_ejes(ejes):
+    """"x,y,z" -> identidad; "-y,x,z" pone el -y del STL como x del vehículo, etc."""
+    matriz = np.zeros((3, 3))
+    for fila, eje in enumerate(ejes.split(",")):
+        eje = eje.strip()
+        matriz[fila, "xyz".index(eje[-1])] = -1.0 if eje.startswith("-") else 1.0
+    if sorted(np.abs(matriz).argmax(axis=1)) != [0, 1, 2]:
+        raise ValueError(f"ejes inválidos: {ejes!r}")
+    return matriz
+
+
+def triangulos(ruta, escala=1e-3, ejes="x,y,z"):
+    """Vértices (n, 3, 3) en float64 y en el sistema del vehículo.
+
+    `escala` pasa las unidades del STL a metros (los de SolidWorks están en mm) y
+    `ejes` dice qué eje del STL es cada eje x, y, z del vehículo."""
+    vertices = leer_stl(ruta)["vertices"]
+    matriz = _matriz_ejes(ejes) * escala
+    return np.einsum("ntj,ij->nti", vertices, matriz, dtype=np.float64)
+
+
+def propiedades_masa(tri, densidad=1.0):
+    """Volumen, centroide e inercia de un sólido cerrado de densidad uniforme.
+
+    Cada triángulo (a, b, c) forma con el origen un tetraedro de volumen con signo
+    det[a b c] / 6; su segundo momento ∫ x xᵀ dV es det/120 · (Σ v vᵀ + s sᵀ) con
+    s = a + b + c. Sumando sobre todos se obtiene el del sólido."""
+    a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+    det = np.einsum("ij,ij->i", a, np.cross(b, c))
+    volumen = det.sum() / 6
+    signo = 1.0 if volumen >= 0 else -1.0   # normales hacia adentro
+    volumen *= signo
+    det = det * signo
+
+    s = a + b + c
+    centroide = (det @ s) / (24 * volumen)
+    segundo = (np.einsum("n,nti,ntj->ij", det, tri, tri)
+               + np.einsum("n,ni,nj->ij", det, s, s)) / 120
+    # Teorema de Steiner para pasar al centroide, y de segundo momento a inercia
+    segundo -= volumen * np.outer(centroide, centroide)
+    inercia = (np.trace(segundo) * np.eye(3) - segundo) * densidad
+    return PropiedadesMasa(float(volumen), centroide, inercia)
+
+
+def hidrostatica(propiedades, masa=None, densidad_agua=1025.0, g=9.81):
+    """Parámetros del modelo derivados de la geometría, con masa uniforme.
+
+    Sin `masa` se supone el vehículo lastrado a flotabilidad neutra (m = ρ V).
+    Devuelve m, Iy, Iz (respecto del centroide), el empuje `b_neutral` = ρ g V y
+    la flotabilidad neta `buoyancy_offset` = ρ g V - m g."""
+    empuje = densidad_agua * g * propiedades.volumen
+    if masa is None:
+        masa = densidad_agua * propiedades.volumen
+    inercia = propiedades.inercia * (masa / propiedades.volumen)
+    return {"m": masa, "Iy": float(inercia[1, 1]), "Iz": float(inercia[2, 2]),
+            "b_neutral": empuje, "buoyancy_offset": empuje - masa * g}
+
+
+def malla_indexada(tri):
+    """Triángulos sueltos (n, 3, 3) -> vértices únicos (m, 3) y caras (n, 3)."""
+    vertices, inverso = np.unique(tri.reshape(-1, 3), axis=0, return_inverse=True)
+    return vertices, inverso.reshape(-1, 3).astype(np.int32)
+
+
+def _agrupar(vertices, caras, celdas):
+    """Agrupamiento en grilla: los vértices de cada celda se funden en su promedio."""
+    minimo = vertices.min(axis=0)
+    lado = np.ptp(vertices, axis=0).max() / celdas
+    q = np.floor((vertices - minimo) / lado).astype(np.int64)
+    ids = (q[:, 0] * (celdas + 1) + q[:, 1]) * (celdas + 1) + q[:, 2]
+    unicos, nuevo = np.unique(ids, return_inverse=True)
+    cuenta = np.bincount(nuevo)
+    agrupados = np.column_stack([np.bincount(nuevo, vertices[:, i]) for i in range(3)])
+    agrupados /= cuenta[:, None]
+
+    f = nuevo[caras]
+    f = f[(f[:, 0] != f[:, 1]) & (f[:, 1] != f[:, 2]) & (f[:, 0] != f[:, 2])]
+    _, primeras = np.unique(np.sort(f, axis=1), axis=0, return_index=True)
+    f = f[np.sort(primeras)]
+    usados, f = np.unique(f, return_inverse=True)
+    return agrupados[usados], f.reshape(-1, 3).astype(np.int32)
+
+
+def diezmar(vertices, caras, objetivo):
+    """Malla de a lo sumo `objetivo` caras por agrupamiento de vértices, con la
+    grilla más fina que lo cumpla (búsqueda binaria en su resolución)."""
+    if len(caras) <= objetivo:
+        return vertices, caras
+    bajo, alto = 2, 1024
+    mejor = _agrupar(vertices, caras, bajo)
+    while alto - bajo > 1:
+        medio = (bajo + alto) // 2
+        candidato = _agrupar(vertices, caras, medio)
+        if len(candidato[1]) <= objetivo:
+            bajo, mejor = medio, candidato
+        else:
+            alto = medio
+    return mejor
+
+
+def hash_archivo(ruta):
+    with open(ruta, "rb") as archivo:
+        return hashlib.sha256(archivo.read()).hexdigest()
+
+
+def malla_visual(ruta, objetivo=2000, escala=1e-3, ejes="x,y,z",
+                 carpeta_cache="cache_mallas"):
+    """Malla diezmada para dibujar: vértices (m, 3) en metros centrados en el
+    centroide (el centro de empuje) y caras (k, 3). Se guarda en `carpeta_cache`
+    con el hash del archivo, así solo se recalcula si el STL cambia."""
+    clave = f"{hash_archivo(ruta)[:16]}_{objetivo}_{escala:g}_{ejes.replace(',', '')}"
+    ruta_cache = os.path.join(carpeta_cache, f"{clave}_v{VERSION_CACHE}.npz") \
+        if carpeta_cache else None
+    if ruta_cache and os.path.exists(ruta_cache):
+        with np.load(ruta_cache) as datos:
+            return datos["vertices"], datos["caras"]
+
+    tri = triangulos(ruta, escala, ejes)
+    centroide = propiedades_masa(tri).centroide
+    vertices, caras = diezmar(*malla_indexada(tri), objetivo)
+    vertices = (vertices - centroide).astype(np.float32)
+    if ruta_cache:
+        os.makedirs(carpeta_cache, exist_ok=True)
+        temporal = ruta_cache + ".tmp.npz"
+        np.savez_compressed(temporal, vertices=vertices, caras=caras)
+        os.replace(temporal, ruta_cache)
+    return vertices, caras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("stl")
+    parser.add_argument("--escala", type=float, default=1e-3, help="unidades del STL -> m")
+    parser.add_argument("--ejes", default="x,y,z",
+                        help="eje del STL para x, y, z del vehículo, p. ej. -y,x,z")
+    parser.add_argument("--masa", type=float, help="kg (por defecto, flotabilidad neutra)")
+    parser.add_argument("--caras", type=int, default=2000, help="caras de la malla visual")
+    parser.add_argument("--cache", default="cache_mallas")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tri = triangulos(args.stl, args.escala, args.ejes)
+    lectura = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    propiedades = propiedades_masa(tri)
+    calculo = time.perf_counter() - inicio
+    print(f"{len(tri)} triángulos leídos en {lectura * 1000:.1f} ms, "
+          f"propiedades en {calculo * 1000:.1f} ms")
+    print(f"Volumen: {propiedades.volumen * 1000:.3f} L")
+    print(f"Centroide: {np.round(propiedades.centroide, 4)} m")
+
+    h = hidrostatica(propiedades, args.masa)
+    print(f"Empuje: {h['b_neutral']:.1f} N; masa {h['m']:.2f} kg; "
+          f"flotabilidad neta {h['buoyancy_offset']:+.1f} N")
+    print(f"Inercia: Iy={h['Iy']:.4f} kg·m², Iz={h['Iz']:.4f} kg·m²")
+
+    inicio = time.perf_counter()
+    vertices, caras = malla_visual(args.stl, args.caras, args.escala, args.ejes, args.cache)
+    print(f"Malla visual: {len(caras)} caras, {len(vertices)} vértices "
+          f"({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
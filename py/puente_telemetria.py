@@ -0,0 +1,500 @@
+"""Puente simulador -> telemetría: el overlay recibe datos del ROUV simulado.
+
+Corre la física del ROUV (una patrulla con piloto automático, o una trayectoria
+grabada) y escribe a una tasa fija las mismas líneas que `mostrarDatos` en el
+firmware (o sus tramas binarias) en un pseudo-terminal o en un servidor TCP. El
+overlay se conecta como si fuera el puerto Bluetooth:
+
+    python puente_telemetria.py --tasa 200            # imprime /dev/pts/N
+    python interfaz_bonita.py --puerto /dev/pts/N
+
+    python puente_telemetria.py --tcp 7000
+    python interfaz_bonita.py --puerto socket://localhost:7000
+
+Opcionalmente simula la caída de tensión de la batería con la carga de los
+propulsores, cortes del enlace, líneas corruptas y el límite de un puerto serie
+a `--baudios`. Con `--medir` lee el enlace con el mismo lector y gestor de
+conexión que el overlay e informa throughput, pérdidas y latencia.
+"""
+import argparse
+import math
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from conexion import GestorConexion
+from dinamica_rouv import (BETA, F1, F2, F3, F4, STATE_SIZE, THETA, Z, FixedStepSimulation,
+                           HoldController, DEFAULT_DEPTH_GAINS, DEFAULT_HEADING_GAINS,
+                           initial_state, make_inputs)
+from telemetria import DTYPE_TRAMA, LectorTelemetria, crc16_filas
+
+
+MAX_DISTANCIA_CM = 400   # alcance del HC-SR04; fuera de rango `pulseIn` da 0
+MAX_THRUST = 20.0        # N, el de `HoldController`
+
+
+def _redondear(valor):
+    """`round()` de C (mitades lejos del cero), no el de Python."""
+    return int(math.copysign(math.floor(abs(valor) + 0.5), valor))
+
+
+class Bateria:
+    """Batería 3S con caída resistiva: la tensión baja con la carga consumida y con
+    la corriente instantánea de los propulsores."""
+
+    def __init__(self, capacidad_ah=5.0, v_llena=12.6, v_vacia=10.5, resistencia=0.08,
+                 corriente_base=0.6, amperes_por_newton=0.35):
+        self.capacidad_ah = capacidad_ah
+        self.v_llena = v_llena
+        self.v_vacia = v_vacia
+        self.resistencia = resistencia
+        self.corriente_base = corriente_base
+        self.amperes_por_newton = amperes_por_newton
+        self.consumido_ah = 0.0
+
+    def tension(self, empuje_total, dt):
+        """Descuenta `dt` segundos con `empuje_total` (Σ|F| en N) y devuelve la tensión."""
+        corriente = self.corriente_base + self.amperes_por_newton * empuje_total
+        self.consumido_ah = min(self.consumido_ah + corriente * dt / 3600, self.capacidad_ah)
+        carga = 1.0 - self.consumido_ah / self.capacidad_ah
+        return self.v_vacia + (self.v_llena - self.v_vacia) * carga - self.resistencia * corriente
+
+
+class MisionPatrulla:
+    """Entradas `inputs(t, state)` de una patrulla: cada `periodo` segundos elige una
+    profundidad, un rumbo y un avance al azar, que sigue el piloto automático."""
+
+    def __init__(self, dt, periodo=15.0, profundidades=(0.5, 4.0), avance=(0.0, 15.0),
+                 semilla=None):
+        self.controlador = HoldController(dt, DEFAULT_DEPTH_GAINS, DEFAULT_HEADING_GAINS,
+                                          max_thrust=MAX_THRUST)
+        self.periodo = periodo
+        self.profundidades = profundidades
+        self.avance = avance
+        self.rng = np.random.default_rng(semilla)
+        self._tramo = -1
+
+    @property
+    def last_inputs(self):
+        return self.controlador.last_inputs
+
+    def __call__(self, t, state):
+        tramo = int(t / self.periodo)
+        if tramo != self._tramo:
+            self._tramo = tramo
+            self.controlador.depth_ref = self.rng.uniform(*self.profundidades)
+            self.controlador.heading_ref = state[BETA] + self.rng.uniform(-math.pi, math.pi)
+            self.controlador.forward = self.rng.uniform(*self.avance)
+        return self.controlador(t, state)
+
+
+class FuenteSimulada:
+    """Estado del ROUV en el tiempo simulado `t`, avanzando la física hasta ahí."""
+
+    def __init__(self, dt=0.03, entradas=None, semilla=None):
+        self.sim = FixedStepSimulation(initial_state(z=-1.0), dt, max_substeps=10**9)
+        self.entradas = entradas if entradas is not None else MisionPatrulla(dt, semilla=semilla)
+
+    def __call__(self, t):
+        self.sim.advance(t - self.sim.t - self.sim.accumulator, self.entradas)
+        entradas = self.entradas
+        if callable(entradas):
+            entradas = entradas.last_inputs
+            if entradas is None:
+                entradas = make_inputs()
+        return self.sim.state, entradas
+
+
+class FuenteTrayectoria:
+    """Estado interpolado de una trayectoria grabada (`trayectoria.py`), en bucle."""
+
+    def __init__(self, ruta, vehiculo=0):
+        from trayectoria import Reproductor, Trayectoria
+        self.reproductor = Reproductor(Trayectoria(ruta), vehiculo)
+
+    def __call__(self, t):
+        r = self.reproductor
+        v = r.en(r.t[0] + t % max(r.duracion, 1e-9))
+        state = np.array([v[c] for c in ("x", "y", "z", "vx", "vy", "vz", "pitch", "yaw",
+                                         "omega_pitch", "omega_yaw")])
+        return state, make_inputs(v["F1"], v["F2"], v["F3"], v["F4"])
+
+
+def campos(state, inputs, tension, luces=False, seguridad=False, fondo=6.0):
+    """Los 8 valores de `mostrarDatos` (sin redondear) a partir del estado simulado.
+
+    El sensor de distancia mira al fondo, a `fondo` m de profundidad; `velocidad`
+    es el pulso de los motores verticales (1000-2000 µs) y el campo de luces va
+    invertido, como en el firmware (el relé es activo en bajo)."""
+    profundidad = -state[Z] * 100
+    distancia = (fondo + state[Z]) * 100
+    if not 0 <= distancia <= MAX_DISTANCIA_CM:
+        distancia = 0
+    vertical = abs(inputs[F3] + inputs[F4]) / (2 * MAX_THRUST)
+    velocidad = 1000 + 1000 * min(vertical, 1.0)
+    return (profundidad, int(distancia), math.degrees(state[THETA]), 0.0, tension,
+            0 if luces else 1, int(velocidad), 1 if seguridad else 0)
+
+
+def linea_csv(valores):
+    """Línea idéntica a la de `mostrarDatos` (enteros, CRLF de `Serial.println`)."""
+    profundidad, distancia, pitch, roll, bateria, luces, velocidad, seguridad = valores
+    return (f"{_redondear(profundidad)},{distancia},{_redondear(pitch)},{_redondear(roll)},"
+            f"{_redondear(bateria)},{luces},{velocidad},{seguridad}\r\n").encode("ascii")
+
+
+def trama_binaria(valores, secuencia, tiempo_ms):
+    """Trama de `enviarTramaBinaria`, con su CRC."""
+    profundidad, distancia, pitch, roll, bateria, luces, velocidad, seguridad = valores
+    trama = np.zeros(1, dtype=DTYPE_TRAMA)
+    trama["sync"] = 0x55AA
+    trama["secuencia"] = secuencia & 0xFFFF
+    trama["tiempo_ms"] = tiempo_ms & 0xFFFFFFFF
+    trama["profundidad_mm"] = np.clip(_redondear(profundidad * 10), -32768, 32767)
+    trama["distancia_cm"] = distancia
+    trama["pitch_cd"] = _redondear(pitch * 100)
+    trama["roll_cd"] = _redondear(roll * 100)
+    trama["bateria_mv"] = np.clip(_redondear(bateria * 1000), 0, 65535)
+    trama["velocidad"] = velocidad
+    trama["flags"] = luces | (seguridad << 1)
+    crudo = trama.view(np.uint8).reshape(1, -1)
+    trama["crc"] = crc16_filas(crudo[:, 2:-2])[0]
+    return trama.tobytes()
+
+
+class SalidaPty:
+    """Pseudo-terminal: el overlay abre `nombre` como un puerto serie.
+
+    El maestro no bloquea: si nadie lee y el buffer del pty se llena, lo escrito
+    se pierde, como en una UART sin receptor."""
+
+    def __init__(self):
+        import tty
+        self.maestro, self.esclavo = os.openpty()
+        tty.setraw(self.esclavo)
+        os.set_blocking(self.maestro, False)
+        self.nombre = os.ttyname(self.esclavo)
+
+    def escribir(self, datos):
+        try:
+            return os.write(self.maestro, datos) == len(datos)
+        except BlockingIOError:
+            return False
+
+    def cerrar(self):
+        os.close(self.maestro)
+        os.close(self.esclavo)
+
+
+class SalidaTcp:
+    """Servidor TCP para `socket://host:puerto` de pyserial; un cliente a la vez
+    (uno nuevo reemplaza al anterior, como al reconectar el overlay)."""
+
+    def __init__(self, puerto, host="127.0.0.1"):
+        self.servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.servidor.bind((host, puerto))
+        self.servidor.listen(1)
+        self.servidor.setblocking(False)
+        self.cliente = None
+        self.nombre = f"socket://{'localhost' if host == '127.0.0.1' else host}:{puerto}"
+
+    def escribir(self, datos):
+        try:
+            cliente, _ = self.servidor.accept()
+        except BlockingIOError:
+            pass
+        else:
+            if self.cliente is not None:
+                self.cliente.close()
+            cliente.setblocking(False)
+            cliente.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.cliente = cliente
+        if self.cliente is None:
+            return False
+        try:
+            return self.cliente.send(datos) == len(datos)
+        except BlockingIOError:
+            return False
+        except OSError:
+            self.cliente.close()
+            self.cliente = None
+            return False
+
+    def cerrar(self):
+        if self.cliente is not None:
+            self.cliente.close()
+        self.servidor.close()
+
+
+class PuenteTelemetria:
+    """Hilo que escribe telemetría del ROUV simulado a `tasa_hz` (plazos absolutos).
+
+    `fuente(t)` devuelve (estado, entradas) en el tiempo simulado `t`, que avanza
+    `velocidad` veces el reloj real. Con `cortes` > 0 el enlace se corta en
+    promedio esa cantidad de veces por minuto durante `duracion_corte` segundos (al
+    azar entre los dos valores); `corrupcion` es la fracción de mensajes que salen
+    dañados (una línea sin su último campo, o una trama con un byte cambiado).
+    `baudios` limita los bytes por segundo como un puerto serie real: cada mensaje
+    se escribe cuando terminaría de transmitirse detrás de los anteriores, y
+    mientras tanto el bucle espera, como `Serial.print` en el Arduino. Con `medir`
+    se guarda el instante en que se tomó cada mensaje sano, así la latencia
+    incluye esa cola.
+    """
+
+    def __init__(self, salida, fuente, tasa_hz=50.0, formato="csv", velocidad=1.0,
+                 bateria=None, cortes=0.0, duracion_corte=(0.5, 3.0), corrupcion=0.0,
+                 baudios=None, luces=False, seguridad=False, fondo=6.0, ruido=1.0,
+                 semilla=None, medir=False):
+        self.salida = salida
+        self.fuente = fuente
+        self.periodo = 1.0 / tasa_hz
+        self.formato = formato
+        self.velocidad = velocidad
+        self.bateria = bateria
+        self.cortes = cortes
+        self.duracion_corte = duracion_corte
+        self.corrupcion = corrupcion
+        self.segundos_por_byte = 10.0 / baudios if baudios else 0.0
+        self.luces = luces
+        self.seguridad = seguridad
+        self.fondo = fondo
+        self.ruido = ruido
+        self.rng = np.random.default_rng(semilla)
+        self.envios = [] if medir else None
+        self.activo = False
+        self.hilo = None
+        self.ultimo = None   # últimos valores enviados, para mostrarlos
+
+        # Contadores
+        self.enviadas = 0
+        self.bytes_enviados = 0
+        self.cortadas = 0      # no enviadas por un corte simulado
+        self.corruptas = 0
+        self.bloqueadas = 0    # la salida no aceptó el mensaje (nadie leyendo)
+        self.en_corte = False
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle, daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        self.activo = False
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
+
+    def _mensaje(self, t, dt):
+        state, entradas = self.fuente(t)
+        tension = 12.0
+        if self.bateria is not None:
+            empuje = float(np.abs(np.asarray(entradas)[[F1, F2, F3, F4]]).sum())
+            tension = self.bateria.tension(empuje, dt)
+        if self.ruido:
+            state = np.array(state[:STATE_SIZE], dtype=np.float64)
+            state[Z] += self.rng.normal(0, 0.02 * self.ruido)
+            state[THETA] += self.rng.normal(0, math.radians(0.5) * self.ruido)
+        valores = campos(state, entradas, tension, self.luces, self.seguridad, self.fondo)
+        if self.ruido:
+            valores = (*valores[:3], self.rng.normal(0, 0.5 * self.ruido), *valores[4:])
+        self.ultimo = valores
+        if self.formato == "binario":
+            return trama_binaria(valores, self.enviadas + self.cortadas,
+                                 int(t / self.velocidad * 1000))
+        return linea_csv(valores)
+
+    def _bucle(self):
+        inicio = proximo = libre = time.monotonic()
+        fin_corte = 0.0
+        anterior = 0.0
+        while self.activo:
+            ahora = time.monotonic()
+            t = (ahora - inicio) * self.velocidad
+            mensaje = self._mensaje(t, t - anterior)
+            anterior = t
+
+            # Cortes: llegada de Poisson con `cortes` por minuto
+            if self.cortes and not self.en_corte and \
+                    self.rng.random() < self.cortes / 60 * self.periodo:
+                self.en_corte = True
+                fin_corte = ahora + self.rng.uniform(*self.duracion_corte)
+            if self.en_corte and ahora >= fin_corte:
+                self.en_corte = False
+
+            if self.en_corte:
+                self.cortadas += 1
+            else:
+                sano = True
+                if self.corrupcion and self.rng.random() < self.corrupcion:
+                    sano = False
+                    self.corruptas += 1
+                    if self.formato == "binario":
+                        danado = bytearray(mensaje)
+                        danado[int(self.rng.integers(2, len(mensaje)))] ^= 0xFF
+                        mensaje = bytes(danado)
+                    else:
+                        mensaje = mensaje[:mensaje.rfind(b",")] + b"\r\n"
+                if self.segundos_por_byte:
+                    # Detrás de lo que el puerto todavía está transmitiendo
+                    libre = max(libre, time.monotonic()) + len(mensaje) * self.segundos_por_byte
+                    espera = libre - time.monotonic()
+                    if espera > 0:
+                        time.sleep(espera)
+                if self.salida.escribir(mensaje):
+                    self.enviadas += 1
+                    self.bytes_enviados += len(mensaje)
+                    if sano and self.envios is not None:
+                        self.envios.append(ahora)
+                else:
+                    self.bloqueadas += 1
+
+            proximo += self.periodo
+            espera = proximo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            else:
+                proximo = time.monotonic()
+
+
+class _Latencias:
+    """Hace de `registro` del lector: empareja cada muestra válida con su envío."""
+
+    def __init__(self, envios):
+        self.envios = envios
+        self.recibidas = 0
+        self.latencias = []
+
+    def agregar(self, muestra):
+        if self.recibidas < len(self.envios):
+            self.latencias.append(muestra.recibido - self.envios[self.recibidas])
+        self.recibidas += 1
+
+    def agregar_lote(self, columnas):
+        # Tramas leídas juntas: la última llegó en `recibido` (columnas["t"][-1])
+        ultima = self.recibidas + len(columnas["t"]) - 1
+        if ultima < len(self.envios):
+            self.latencias.append(columnas["t"][-1] - self.envios[ultima])
+        self.recibidas += len(columnas["t"])
+
+
+def medir(args, tasa_hz):
+    """Corre el puente sobre un pty y lo lee con el gestor de conexión y el lector
+    del overlay durante `args.medir` segundos."""
+    salida = SalidaPty()
+    puente = crear_puente(args, salida, tasa_hz, medir=True)
+    conexion = GestorConexion(salida.nombre, silencio_max=args.silencio_max)
+    latencias = _Latencias(puente.envios)
+    lector = LectorTelemetria(conexion.obtener_puerto, "auto", latencias,
+                              al_recibir=conexion.notificar_datos,
+                              al_fallar=conexion.notificar_caida)
+    conexion.iniciar()
+    lector.iniciar()
+    limite = time.monotonic() + 5.0
+    while not lector.conectado and time.monotonic() < limite:
+        time.sleep(0.01)
+
+    inicio = time.monotonic()
+    puente.iniciar()
+    time.sleep(args.medir)
+    puente.detener()
+    time.sleep(0.2)   # lo que quedó en camino
+    transcurrido = time.monotonic() - inicio
+    lector.detener()
+    conexion.detener()
+    salida.cerrar()
+
+    validas = lector.lineas_validas
+    resultado = {"tasa_hz": tasa_hz, "enviadas": puente.enviadas, "validas": validas,
+                 "mensajes_por_s": validas / transcurrido,
+                 "bytes_por_s": lector.bytes_recibidos / transcurrido,
+                 "errores_parseo": lector.errores_parseo, "errores_crc": lector.errores_crc,
+                 "cortadas": puente.cortadas, "bloqueadas": puente.bloqueadas,
+                 **conexion.metricas()}
+    # Tras una reconexión pyserial vacía el buffer de entrada: el emparejamiento
+    # por orden deja de valer, así que solo se informa latencia sin pérdidas
+    if latencias.latencias and conexion.conexiones == 1 and not puente.bloqueadas:
+        ms = np.array(latencias.latencias) * 1000
+        resultado.update({f"latencia_p{p}_ms": float(np.percentile(ms, p)) for p in (50, 95, 99)})
+    return resultado
+
+
+def crear_puente(args, salida, tasa_hz, medir=False):
+    if args.trayectoria:
+        fuente = FuenteTrayectoria(args.trayectoria)
+    else:
+        fuente = FuenteSimulada(args.dt, semilla=args.semilla)
+    bateria = Bateria(capacidad_ah=args.capacidad) if args.bateria else None
+    return PuenteTelemetria(salida, fuente, tasa_hz, args.formato, args.velocidad, bateria,
+                            args.cortes, (args.corte_min, args.corte_max), args.corrupcion,
+                            args.baudios, args.luces, args.seguridad, args.fondo,
+                            0.0 if args.sin_ruido else 1.0, args.semilla, medir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasa", default="50",
+                        help="mensajes por segundo (con --medir, varias separadas por comas)")
+    parser.add_argument("--formato", choices=("csv", "binario"), default="csv")
+    parser.add_argument("--tcp", type=int, metavar="PUERTO",
+                        help="servir en socket://localhost:PUERTO en lugar de un pty")
+    parser.add_argument("--velocidad", type=float, default=1.0,
+                        help="segundos simulados por segundo real")
+    parser.add_argument("--dt", type=float, default=0.03, help="paso de la física (s)")
+    parser.add_argument("--trayectoria", help="reproducir una trayectoria grabada en bucle")
+    parser.add_argument("--bateria", action="store_true", help="simular la caída de tensión")
+    parser.add_argument("--capacidad", type=float, default=5.0, help="Ah de la batería")
+    parser.add_argument("--cortes", type=float, default=0.0, help="cortes del enlace por minuto")
+    parser.add_argument("--corte-min", type=float, default=0.5, help="s")
+    parser.add_argument("--corte-max", type=float, default=3.0, help="s")
+    parser.add_argument("--corrupcion", type=float, default=0.0,
+                        help="fracción de mensajes dañados")
+    parser.add_argument("--baudios", type=int, help="limitar como un puerto serie (p. ej. 9600)")
+    parser.add_argument("--luces", action="store_true")
+    parser.add_argument("--seguridad", action="store_true")
+    parser.add_argument("--fondo", type=float, default=6.0, help="profundidad del fondo (m)")
+    parser.add_argument("--sin-ruido", action="store_true", help="sensores sin ruido")
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--medir", type=float, metavar="SEGUNDOS",
+                        help="leer el enlace con el lector del overlay y medir")
+    parser.add_argument("--silencio-max", type=float, default=1.5,
+                        help="con --medir, como el overlay: s sin datos antes de reconectar")
+    args = parser.parse_args()
+
+    if args.medir:
+        for tasa in (float(t) for t in args.tasa.split(",")):
+            r = medir(args, tasa)
+            latencia = (f"latencia p50 {r['latencia_p50_ms']:.2f} ms, "
+                        f"p99 {r['latencia_p99_ms']:.2f} ms" if "latencia_p50_ms" in r
+                        else "latencia no medida (hubo pérdidas o reconexiones)")
+            print(f"{tasa:6g} Hz: {r['validas']}/{r['enviadas']} válidas "
+                  f"({r['mensajes_por_s']:.0f}/s, {r['bytes_por_s']:.0f} B/s), "
+                  f"errores {r['errores_parseo'] + r['errores_crc']}, "
+                  f"cortadas {r['cortadas']}, reconexiones {r['conexiones'] - 1}; {latencia}")
+        return
+
+    salida = SalidaTcp(args.tcp) if args.tcp else SalidaPty()
+    puente = crear_puente(args, salida, float(args.tasa))
+    puente.iniciar()
+    print(f"Telemetría simulada en {salida.nombre} a {float(args.tasa):g} Hz")
+    print(f"  python interfaz_bonita.py --puerto {salida.nombre}")
+    try:
+        while True:
+            time.sleep(1.0)
+            if puente.ultimo is not None:
+                p = puente.ultimo
+                print(f"\r{puente.enviadas} enviadas, {puente.cortadas} cortadas | "
+                      f"prof {p[0]:.0f} cm, dist {p[1]} cm, pitch {p[2]:.0f}°, "
+                      f"bat {p[4]:.2f} V{' (corte)' if puente.en_corte else ''}    ",
+                      end="", flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        puente.detener()
+        salida.cerrar()
+
+
+if __name__ == "__main__":
+    main()
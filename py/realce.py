@@ -0,0 +1,181 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from captura import BufferUltimoFrame
+
+
+IDENTIDAD = np.arange(256, dtype=np.float32)
+
+
+def _lut_uint8(curvas):
+    """(3, 256) en float -> LUT de OpenCV (1, 256, 3) uint8."""
+    return np.ascontiguousarray(np.rint(curvas).astype(np.uint8).T[None])
+
+
+def _percentiles_histograma(histograma, fracciones):
+    """Niveles (0-255) en los que el histograma acumulado alcanza cada fracción."""
+    acumulado = np.cumsum(histograma)
+    return np.searchsorted(acumulado, np.asarray(fracciones) * acumulado[-1])
+
+
+def curva_balance_blancos(muestra, percentil=1.0):
+    """Por canal, estira [p, 100 - p] a [0, 255] ("simple color balance").
+
+    Compensa la absorción del rojo: el canal más débil se estira más."""
+    curvas = np.empty((3, 256), dtype=np.float32)
+    for c in range(3):
+        histograma = np.bincount(muestra[..., c].ravel(), minlength=256)
+        bajo, alto = _percentiles_histograma(histograma, (percentil / 100, 1 - percentil / 100))
+        alto = max(alto, bajo + 1)
+        curvas[c] = (IDENTIDAD - bajo) * (255.0 / (alto - bajo))
+    return np.clip(curvas, 0, 255)
+
+
+def curva_desempanado(muestra, omega=0.8, t_min=0.4, parche=7):
+    """Dark channel prior con transmisión global: J = (I - A) / t + A por canal.
+
+    A (luz del agua) es el promedio de los píxeles más brillantes del canal oscuro;
+    t se estima una sola vez para el cuadro, así que la corrección cabe en una LUT."""
+    oscuro = cv2.erode(muestra.min(axis=2), np.ones((parche, parche), np.uint8))
+    n = max(oscuro.size // 1000, 1)
+    brillantes = np.argpartition(oscuro.ravel(), -n)[-n:]
+    luz = muestra.reshape(-1, 3)[brillantes].mean(axis=0).astype(np.float32)
+    luz = np.maximum(luz, 1.0)
+
+    normalizado = (muestra / luz).min(axis=2)
+    t = max(1.0 - omega * float(np.mean(normalizado)), t_min)
+    curvas = (IDENTIDAD[None, :] - luz[:, None]) / t + luz[:, None]
+    return np.clip(curvas, 0, 255)
+
+
+def curva_contraste(luminancia, limite=2.0):
+    """Ecualización con límite de contraste (CLAHE de un solo bloque) de la luminancia."""
+    histograma = np.bincount(luminancia.ravel(), minlength=256).astype(np.float64)
+    tope = limite * luminancia.size / 256
+    exceso = np.sum(np.maximum(histograma - tope, 0))
+    histograma = np.minimum(histograma, tope) + exceso / 256
+    acumulado = np.cumsum(histograma)
+    return (255.0 * (acumulado - acumulado[0]) / max(acumulado[-1] - acumulado[0], 1)
+            ).astype(np.float32)
+
+
+class RealceSubmarino:
+    """Balance de blancos, desempañado y contraste para video submarino.
+
+    Los parámetros se estiman sobre una versión submuestreada del frame cada
+    `cada_n` frames y se combinan en una sola LUT por canal, que es lo único que se
+    aplica a resolución completa. Con `clahe_local` se agrega además CLAHE por
+    bloques sobre la luminancia (más caro: se calcula en cada frame).
+    """
+
+    def __init__(self, cada_n=15, submuestreo=4, percentil=1.0, omega=0.8, t_min=0.4,
+                 limite_contraste=2.0, clahe_local=False, suavizado=0.5):
+        self.cada_n = cada_n
+        self.submuestreo = submuestreo
+        self.percentil = percentil
+        self.omega = omega
+        self.t_min = t_min
+        self.limite_contraste = limite_contraste
+        self.suavizado = suavizado
+        self.clahe = cv2.createCLAHE(limite_contraste, (8, 8)) if clahe_local else None
+
+        self.curvas = None
+        self.lut = None
+        self.frames = 0
+        self.estimaciones = 0
+
+    def estimar(self, frame):
+        """Recalcula la LUT combinada a partir del frame submuestreado."""
+        paso = self.submuestreo
+        muestra = np.ascontiguousarray(frame[::paso, ::paso])
+
+        balance = curva_balance_blancos(muestra, self.percentil)
+        muestra = cv2.LUT(muestra, _lut_uint8(balance))
+        desempanado = curva_desempanado(muestra, self.omega, self.t_min)
+        muestra = cv2.LUT(muestra, _lut_uint8(desempanado))
+        contraste = curva_contraste(cv2.cvtColor(muestra, cv2.COLOR_BGR2GRAY),
+                                    self.limite_contraste)
+
+        # Composición: contraste(desempañado(balance(x))) por canal
+        curvas = np.empty((3, 256), dtype=np.float32)
+        for c in range(3):
+            intermedia = np.interp(balance[c], IDENTIDAD, desempanado[c])
+            curvas[c] = np.interp(intermedia, IDENTIDAD, contraste)
+
+        # Suavizado temporal para que la imagen no parpadee entre estimaciones
+        if self.curvas is None:
+            self.curvas = curvas
+        else:
+            self.curvas += self.suavizado * (curvas - self.curvas)
+        self.lut = _lut_uint8(self.curvas)
+        self.estimaciones += 1
+
+    def procesar(self, frame, medidor=None):
+        """Aplica el realce en el lugar; reestima la LUT cada `cada_n` frames."""
+        if self.lut is None or self.frames % self.cada_n == 0:
+            t = time.perf_counter_ns()
+            self.estimar(frame)
+            if medidor is not None:
+                medidor.registrar("realce_estimacion", t)
+        self.frames += 1
+
+        cv2.LUT(frame, self.lut, dst=frame)
+        if self.clahe is not None:
+            ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+            y = ycrcb[..., 0].copy()
+            ycrcb[..., 0] = self.clahe.apply(y)
+            cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR, dst=frame)
+        return frame
+
+
+class EtapaRealce:
+    """Hilo que realza los frames de la captura mientras el bucle principal dibuja.
+
+    Ofrece la misma interfaz de consumo que `CapturaCamara` (`obtener_frame`,
+    `activo`, `fallo`) y, como ella, conserva solo el último frame procesado.
+    """
+
+    def __init__(self, captura, realce=None, medidor=None):
+        self.captura = captura
+        self.realce = realce if realce is not None else RealceSubmarino()
+        self.medidor = medidor
+        self.buffer = BufferUltimoFrame()
+        self.activo = False
+        self.hilo = None
+
+    @property
+    def fallo(self):
+        return self.captura.fallo
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle_realce, daemon=True)
+        self.hilo.start()
+
+    def _bucle_realce(self):
+        try:
+            while self.activo:
+                frame, marca = self.captura.obtener_frame(timeout=0.1)
+                if frame is None:
+                    if not self.captura.activo:
+                        break
+                    continue
+                inicio = time.perf_counter_ns()
+                self.realce.procesar(frame, self.medidor)
+                if self.medidor is not None:
+                    self.medidor.registrar("realce", inicio)
+                self.buffer.publicar(frame, marca)
+        finally:
+            self.activo = False
+            self.buffer.cerrar()
+
+    def obtener_frame(self, timeout=None):
+        return self.buffer.tomar(timeout)
+
+    def detener(self):
+        self.activo = False
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
@@ -0,0 +1,258 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from telemetria import Telemetria
+
+
+MAGIA = b"NEPTLOG1"
+
+# Columnas del registro (una región contigua por columna)
+COLUMNAS = (
+    ("t", "<f8"),             # time.monotonic() de recepción
+    ("profundidad", "<f4"),
+    ("distancia", "<f4"),
+    ("pitch", "<f4"),
+    ("roll", "<f4"),
+    ("bateria", "<f4"),
+    ("luces", "u1"),
+    ("velocidad", "<f4"),
+    ("seguridad", "u1"),
+)
+
+DTYPE_CABECERA = np.dtype([
+    ("magia", "S8"),
+    ("capacidad", "<u8"),
+    ("escritos", "<u8"),          # total de muestras escritas (no se reinicia al dar la vuelta)
+    ("inicio_unix", "<f8"),       # time.time() al crear el archivo
+    ("inicio_monotonic", "<f8"),  # time.monotonic() en el mismo instante
+])
+TAMANO_CABECERA = 64
+
+
+def _desplazamientos(capacidad):
+    """Posición de cada columna en el archivo (alineadas a 8 bytes) y tamaño total."""
+    desplazamientos = {}
+    posicion = TAMANO_CABECERA
+    for nombre, tipo in COLUMNAS:
+        desplazamientos[nombre] = posicion
+        posicion += capacidad * np.dtype(tipo).itemsize
+        posicion = (posicion + 7) // 8 * 8
+    return desplazamientos, posicion
+
+
+def _mapear_columnas(mapa, capacidad):
+    desplazamientos, _ = _desplazamientos(capacidad)
+    return {nombre: np.ndarray((capacidad,), dtype=tipo, buffer=mapa,
+                               offset=desplazamientos[nombre])
+            for nombre, tipo in COLUMNAS}
+
+
+class RegistroTelemetria:
+    """Caja negra: registro columnar en un archivo mapeado en memoria, de tamaño fijo.
+
+    Al llenarse sobrescribe las muestras más antiguas. Cada muestra se escribe antes
+    de incrementar `escritos` en la cabecera, así que otro proceso puede leer el
+    archivo mientras se graba (ver `LectorRegistro`).
+    """
+
+    def __init__(self, ruta, capacidad=1_000_000, intervalo_flush=1.0):
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.intervalo_flush = intervalo_flush
+        _, tamano = _desplazamientos(capacidad)
+
+        self.mapa = np.memmap(ruta, dtype=np.uint8, mode="w+", shape=(tamano,))
+        self.cabecera = np.ndarray((1,), dtype=DTYPE_CABECERA, buffer=self.mapa)
+        self.cabecera["magia"] = MAGIA
+        self.cabecera["capacidad"] = capacidad
+        self.cabecera["escritos"] = 0
+        self.cabecera["inicio_unix"] = time.time()
+        self.cabecera["inicio_monotonic"] = time.monotonic()
+        self.columnas = _mapear_columnas(self.mapa, capacidad)
+
+        self.escritos = 0
+        self._ultimo_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.cerrado = False
+
+    def agregar(self, muestra):
+        """Agrega una `Telemetria`; después de `cerrar` no hace nada."""
+        with self._lock:
+            if self.cerrado:
+                return
+            i = self.escritos % self.capacidad
+            columnas = self.columnas
+            columnas["t"][i] = muestra.recibido
+            columnas["profundidad"][i] = muestra.profundidad
+            columnas["distancia"][i] = muestra.distancia
+            columnas["pitch"][i] = muestra.pitch
+            columnas["roll"][i] = muestra.roll
+            columnas["bateria"][i] = muestra.bateria
+            columnas["luces"][i] = muestra.luces
+            columnas["velocidad"][i] = muestra.velocidad
+            columnas["seguridad"][i] = muestra.seguridad
+            self._confirmar(1)
+
+    def agregar_lote(self, valores):
+        """Agrega varias muestras de una vez; `valores` es {columna: arreglo}."""
+        n = len(valores["t"])
+        if n == 0:
+            return
+        with self._lock:
+            if self.cerrado:
+                return
+            # Si el lote es mayor que el archivo, solo caben las últimas muestras
+            omitidas = max(n - self.capacidad, 0)
+            inicio = (self.escritos + omitidas) % self.capacidad
+            primera = min(n - omitidas, self.capacidad - inicio)
+            for nombre, _ in COLUMNAS:
+                datos = np.asarray(valores[nombre])[omitidas:]
+                columna = self.columnas[nombre]
+                columna[inicio:inicio + primera] = datos[:primera]
+                columna[:len(datos) - primera] = datos[primera:]
+            self._confirmar(n)
+
+    def _confirmar(self, n):
+        """Publica las muestras nuevas en la cabecera y hace flush cada tanto."""
+        self.escritos += n
+        self.cabecera["escritos"] = self.escritos
+        ahora = time.monotonic()
+        if ahora - self._ultimo_flush >= self.intervalo_flush:
+            self._ultimo_flush = ahora
+            self.mapa.flush()
+
+    def cerrar(self):
+        """Cierra el archivo. El hilo lector puede seguir vivo un momento después
+        de `detener`, así que las escrituras posteriores (y un segundo cierre) se
+        ignoran."""
+        with self._lock:
+            if self.cerrado:
+                return
+            self.cerrado = True
+            self.mapa.flush()
+            self.columnas = None
+            self.cabecera = None
+            self.mapa = None
+
+
+class LectorRegistro:
+    """Lee un registro de telemetría (también mientras se está grabando)."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.mapa = np.memmap(ruta, dtype=np.uint8, mode="r")
+        if len(self.mapa) < TAMANO_CABECERA:
+            raise ValueError(f"{ruta} no es un registro de telemetría")
+        self.cabecera = np.ndarray((1,), dtype=DTYPE_CABECERA, buffer=self.mapa)
+        if self.cabecera["magia"][0] != MAGIA:
+            raise ValueError(f"{ruta} no es un registro de telemetría")
+        self.capacidad = int(self.cabecera["capacidad"][0])
+        if len(self.mapa) < _desplazamientos(self.capacidad)[1]:
+            raise ValueError(f"{ruta}: registro truncado")
+        self.inicio_unix = float(self.cabecera["inicio_unix"][0])
+        self.inicio_monotonic = float(self.cabecera["inicio_monotonic"][0])
+        self.columnas = _mapear_columnas(self.mapa, self.capacidad)
+
+    def __len__(self):
+        return min(int(self.cabecera["escritos"][0]), self.capacidad)
+
+    def muestras(self, copiar=True):
+        """Devuelve {columna: arreglo} en orden cronológico.
+
+        Las muestras que el escritor sobrescribió durante la lectura se descartan.
+        Con `copiar=False`, si el búfer no dio la vuelta (o `escritos` es múltiplo
+        exacto de la capacidad) se devuelven vistas del mapa sin copiar: solo son
+        estables si el registro ya está cerrado, porque un escritor activo las
+        sigue sobrescribiendo después de esta llamada.
+        """
+        escritos = int(self.cabecera["escritos"][0])
+        n = min(escritos, self.capacidad)
+        inicio = escritos % self.capacidad if escritos > self.capacidad else 0
+
+        if inicio == 0:
+            resultado = {nombre: np.array(columna[:n]) if copiar else columna[:n]
+                         for nombre, columna in self.columnas.items()}
+        else:
+            resultado = {nombre: np.concatenate((columna[inicio:], columna[:inicio]))
+                         for nombre, columna in self.columnas.items()}
+
+        # Lo que se sobrescribió mientras copiábamos ya no es válido
+        despues = int(self.cabecera["escritos"][0])
+        invalidas = min(max(despues - self.capacidad - (escritos - n), 0), n)
+        if invalidas:
+            resultado = {nombre: columna[invalidas:] for nombre, columna in resultado.items()}
+        return resultado
+
+
+class FuenteReplay:
+    """Reproduce un registro como si fuera el lector serie (misma interfaz que
+    `LectorTelemetria`), a velocidad real o acelerada. `velocidad=None` reproduce
+    lo más rápido posible.
+    """
+
+    def __init__(self, ruta, velocidad=1.0, repetir=False):
+        self.ruta = ruta
+        # Se abre acá y no en el hilo: un archivo inválido falla en quien lo pide
+        self.registro = LectorRegistro(ruta)
+        self.velocidad = velocidad
+        self.repetir = repetir
+        self.formato = "replay"
+        self.snapshot = None
+        self.activo = False
+        self.hilo = None
+
+        # Mismos contadores que LectorTelemetria
+        self.lineas_validas = 0
+        self.errores_parseo = 0
+        self.lineas_descartadas = 0
+
+    @property
+    def conectado(self):
+        return self.activo
+
+    def iniciar(self):
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle_replay, daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        self.activo = False
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
+
+    def _bucle_replay(self):
+        datos = self.registro.muestras()
+        tiempos = datos["t"]
+        valores = [datos[nombre] for nombre, _ in COLUMNAS[1:]]
+        if not len(tiempos):
+            self.activo = False
+            return
+
+        while self.activo:
+            inicio_real = time.monotonic()
+            for i in range(len(tiempos)):
+                if not self.activo:
+                    return
+                if self.velocidad:
+                    espera = (tiempos[i] - tiempos[0]) / self.velocidad - (time.monotonic() - inicio_real)
+                    if espera > 0:
+                        time.sleep(espera)
+                profundidad, distancia, pitch, roll, bateria, luces, velocidad, seguridad = (
+                    columna[i] for columna in valores)
+                self.lineas_validas += 1
+                self.snapshot = Telemetria(
+                    float(profundidad), float(distancia), float(pitch), float(roll),
+                    float(bateria), bool(luces), float(velocidad), bool(seguridad),
+                    time.monotonic(), self.lineas_validas)
+            if not self.repetir:
+                break
+        self.activo = False
+
+
+def ruta_registro_por_defecto(carpeta="registros"):
+    """Ruta con fecha y hora para un registro nuevo."""
+    os.makedirs(carpeta, exist_ok=True)
+    return os.path.join(carpeta, time.strftime("telemetria_%Y%m%d_%H%M%S.npl"))
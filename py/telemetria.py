@@ -0,0 +1,376 @@
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+
+CAMPOS_TELEMETRIA = ("profundidad", "distancia", "pitch", "roll",
+                     "bateria", "luces", "velocidad", "seguridad")
+
+# Una línea más larga que esto no es telemetría válida (ruido o baudrate incorrecto)
+MAX_LONGITUD_LINEA = 256
+
+# Trama binaria de `enviarTramaBinaria` (little-endian, sin relleno)
+SYNC_TRAMA = b"\xaa\x55"
+DTYPE_TRAMA = np.dtype([
+    ("sync", "<u2"),
+    ("secuencia", "<u2"),
+    ("tiempo_ms", "<u4"),
+    ("profundidad_mm", "<i2"),
+    ("distancia_cm", "<u2"),
+    ("pitch_cd", "<i2"),      # centésimas de grado
+    ("roll_cd", "<i2"),
+    ("bateria_mv", "<u2"),
+    ("velocidad", "<u2"),
+    ("flags", "u1"),          # bit 0: luces, bit 1: seguridad
+    ("crc", "<u2"),           # CRC-16/CCITT de secuencia..flags
+])
+TAMANO_TRAMA = DTYPE_TRAMA.itemsize
+MAX_BUFFER_BINARIO = 64 * TAMANO_TRAMA
+# En "auto", líneas CSV válidas seguidas (sin tramas) para dejar el modo binario
+LINEAS_PARA_VOLVER_A_CSV = 3
+
+
+def _tabla_crc16():
+    tabla = np.zeros(256, dtype=np.uint16)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        tabla[i] = crc & 0xFFFF
+    return tabla
+
+
+_TABLA_CRC16 = _tabla_crc16()
+
+
+def crc16_filas(bytes_filas):
+    """CRC-16/CCITT-FALSE de cada fila de una matriz (N, L) de uint8, vectorizado en N."""
+    crc = np.full(bytes_filas.shape[0], 0xFFFF, dtype=np.uint16)
+    for columna in bytes_filas.T:
+        crc = (crc << np.uint16(8)) ^ _TABLA_CRC16[(crc >> np.uint16(8)) ^ columna]
+    return crc
+
+
+class Telemetria(NamedTuple):
+    """Muestra inmutable de telemetría tal como la envía `mostrarDatos`."""
+    profundidad: float
+    distancia: float
+    pitch: float
+    roll: float
+    bateria: float
+    luces: bool
+    velocidad: float
+    seguridad: bool
+    recibido: float   # time.monotonic() de llegada
+    secuencia: int    # contador local de muestras válidas
+
+    def como_textos(self):
+        """Convierte la muestra al formato de texto que muestra el HUD."""
+        return {
+            "Profundidad": f"{_numero(self.profundidad)} cm",
+            "Distancia": f"{_numero(self.distancia)} cm",
+            "Pitch": f"{_numero(self.pitch)}",
+            "Roll": f"{_numero(self.roll)}",
+            "Bateria": f"{_numero(self.bateria)}V",
+            "Luces": "On" if self.luces else "Off",
+            "Velocidad": f"{_numero(self.velocidad)}%",
+            "Seguridad": "On" if self.seguridad else "Off"
+        }
+
+
+def _numero(valor):
+    """Muestra enteros sin decimales y el resto con uno."""
+    return str(int(valor)) if float(valor).is_integer() else f"{valor:.1f}"
+
+
+def analizar_linea(linea, secuencia=0, recibido=None):
+    """Convierte una línea CSV de 8 campos en `Telemetria`. Lanza ValueError si es inválida."""
+    valores = linea.decode('ascii').strip().split(",")
+    if len(valores) != len(CAMPOS_TELEMETRIA):
+        raise ValueError(f"Se esperaban 8 campos, llegaron {len(valores)}")
+
+    profundidad, distancia, pitch, roll, bateria, luces, velocidad, seguridad = valores
+    return Telemetria(
+        float(profundidad), float(distancia), float(pitch), float(roll),
+        float(bateria), luces.strip() == "1", float(velocidad), seguridad.strip() == "1",
+        time.monotonic() if recibido is None else recibido, secuencia)
+
+
+def decodificar_tramas(datos):
+    """Busca y valida todas las tramas binarias de `datos` de una sola vez.
+
+    Devuelve (tramas, consumidos, errores_crc): `tramas` es un arreglo estructurado
+    con DTYPE_TRAMA y `consumidos` cuántos bytes del inicio ya no hacen falta.
+    """
+    buffer = np.frombuffer(datos, dtype=np.uint8)
+    n = len(buffer)
+    vacio = np.empty(0, dtype=DTYPE_TRAMA)
+    if n < 2:
+        return vacio, 0, 0
+
+    candidatos = np.flatnonzero((buffer[:-1] == 0xAA) & (buffer[1:] == 0x55))
+    completos = candidatos[candidatos + TAMANO_TRAMA <= n]
+
+    validos = np.empty(0, dtype=np.intp)
+    errores_crc = 0
+    if len(completos):
+        filas = buffer[completos[:, None] + np.arange(TAMANO_TRAMA)]
+        crc_recibido = filas[:, -2].astype(np.uint16) | (filas[:, -1].astype(np.uint16) << 8)
+        correctos = crc16_filas(filas[:, 2:-2]) == crc_recibido
+
+        validos = completos[correctos]
+        # Una trama válida no puede empezar dentro de la última aceptada. Comparar
+        # solo vecinos no alcanza (si B cae dentro de A y C dentro de B pero no de A,
+        # C es válida), así que cuando hay solapes se eligen en orden
+        if len(validos) > 1 and (np.diff(validos) < TAMANO_TRAMA).any():
+            elegidos = []
+            fin_ultimo = 0
+            for inicio in validos.tolist():
+                if inicio >= fin_ultimo:
+                    elegidos.append(inicio)
+                    fin_ultimo = inicio + TAMANO_TRAMA
+            validos = np.array(elegidos, dtype=np.intp)
+
+        # Los sync falsos dentro de tramas válidas no cuentan como error
+        fallidos = completos[~correctos]
+        if len(fallidos) and len(validos):
+            j = np.searchsorted(validos, fallidos, side="right") - 1
+            dentro = (j >= 0) & (fallidos < validos[np.maximum(j, 0)] + TAMANO_TRAMA)
+            fallidos = fallidos[~dentro]
+        errores_crc = len(fallidos)
+
+    fin = validos[-1] + TAMANO_TRAMA if len(validos) else 0
+
+    # Conservar desde la primera trama incompleta posterior; si no, solo un posible 0xAA final
+    pendientes = candidatos[(candidatos >= fin) & (candidatos + TAMANO_TRAMA > n)]
+    if len(pendientes):
+        consumidos = int(pendientes[0])
+    elif buffer[-1] == 0xAA:
+        consumidos = n - 1
+    else:
+        consumidos = n
+
+    if not len(validos):
+        return vacio, consumidos, errores_crc
+    filas = buffer[validos[:, None] + np.arange(TAMANO_TRAMA)]
+    return filas.view(DTYPE_TRAMA).ravel(), consumidos, errores_crc
+
+
+def telemetria_de_trama(trama, secuencia=0, recibido=None):
+    """Convierte una trama binaria decodificada en `Telemetria`."""
+    flags = int(trama["flags"])
+    return Telemetria(
+        float(trama["profundidad_mm"]) / 10.0, float(trama["distancia_cm"]),
+        float(trama["pitch_cd"]) / 100.0, float(trama["roll_cd"]) / 100.0,
+        float(trama["bateria_mv"]) / 1000.0, bool(flags & 0x01),
+        float(trama["velocidad"]), bool(flags & 0x02),
+        time.monotonic() if recibido is None else recibido, secuencia)
+
+
+def columnas_de_tramas(tramas, recibido=None):
+    """Convierte un lote de tramas en columnas numéricas (mismos nombres que `Telemetria`).
+
+    El tiempo de cada trama se reconstruye con su `tiempo_ms` relativo a la última,
+    que se toma como recibida en `recibido`.
+    """
+    recibido = time.monotonic() if recibido is None else recibido
+    atraso_ms = (tramas["tiempo_ms"][-1] - tramas["tiempo_ms"]).astype(np.uint32)
+    flags = tramas["flags"]
+    return {
+        "t": recibido - atraso_ms / 1000.0,
+        "profundidad": tramas["profundidad_mm"] / 10.0,
+        "distancia": tramas["distancia_cm"].astype(np.float32),
+        "pitch": tramas["pitch_cd"] / 100.0,
+        "roll": tramas["roll_cd"] / 100.0,
+        "bateria": tramas["bateria_mv"] / 1000.0,
+        "luces": (flags & 0x01) != 0,
+        "velocidad": tramas["velocidad"].astype(np.float32),
+        "seguridad": (flags & 0x02) != 0,
+    }
+
+
+class LectorTelemetria:
+    """Hilo que vacía el puerto serie en bloque y publica la última muestra válida.
+
+    `snapshot` se reemplaza atómicamente (asignación de referencia), por lo que el
+    hilo de render puede leerlo sin bloqueos. `formato` puede ser "csv", "binario"
+    o "auto": lee CSV y pasa a binario recién cuando llega una trama con CRC
+    válido (el ruido al conectar puede traer la palabra de sincronía); vuelve a
+    "auto" al reconectar o si llegan `LINEAS_PARA_VOLVER_A_CSV` líneas CSV
+    válidas seguidas. Si se da un `registro`, cada muestra válida se guarda.
+    `al_recibir()` se llama al llegar bytes y `al_fallar(puerto, error)` ante un
+    error de lectura, para que el gestor de conexión detecte caídas al instante.
+    """
+
+    def __init__(self, obtener_puerto, formato="auto", registro=None,
+                 al_recibir=None, al_fallar=None):
+        self.obtener_puerto = obtener_puerto
+        self.formato_pedido = formato
+        self.formato = formato
+        self.registro = registro
+        self.al_recibir = al_recibir
+        self.al_fallar = al_fallar
+        self.snapshot = None
+        self.activo = False
+        self.hilo = None
+        self._buffer = bytearray()
+
+        # Contadores
+        self.bytes_recibidos = 0
+        self.lineas_validas = 0
+        self.errores_parseo = 0
+        self.lineas_descartadas = 0
+        self.errores_lectura = 0
+        self.tramas_validas = 0
+        self.errores_crc = 0
+        self.tramas_perdidas = 0
+        self._ultima_secuencia_trama = None
+        self._puerto = None
+        self._csv_en_binario = 0
+
+    @property
+    def conectado(self):
+        puerto = self.obtener_puerto()
+        return puerto is not None and puerto.is_open
+
+    def iniciar(self):
+        """Arranca el hilo lector."""
+        self.activo = True
+        self.hilo = threading.Thread(target=self._bucle_lectura, daemon=True)
+        self.hilo.start()
+
+    def detener(self):
+        self.activo = False
+        if self.hilo is not None:
+            self.hilo.join(timeout=1.0)
+
+    def _bucle_lectura(self):
+        """Lee todo lo disponible; bloquea como mucho el timeout del puerto."""
+        while self.activo:
+            puerto = self.obtener_puerto()
+            if puerto is None or not puerto.is_open:
+                self._reiniciar()
+                time.sleep(0.05)
+                continue
+            if puerto is not self._puerto:
+                # Enlace nuevo: puede venir otro firmware, volver a detectar el formato
+                self._reiniciar()
+                self._puerto = puerto
+
+            try:
+                datos = puerto.read(puerto.in_waiting or 1)
+            except Exception as e:
+                self.errores_lectura += 1
+                print(f"Error lectura BT: {e}")
+                # Cerrar para que el gestor de conexión reconecte
+                try:
+                    puerto.close()
+                except Exception:
+                    pass
+                self._reiniciar()
+                if self.al_fallar is not None:
+                    self.al_fallar(puerto, e)
+                continue
+
+            if datos:
+                if self.al_recibir is not None:
+                    self.al_recibir()
+                self.procesar_bytes(datos)
+
+    def _reiniciar(self):
+        """Descarta lo acumulado y, en modo automático, vuelve a detectar el formato."""
+        self._buffer.clear()
+        self._puerto = None
+        self._csv_en_binario = 0
+        if self.formato_pedido == "auto":
+            self.formato = "auto"
+            self._ultima_secuencia_trama = None
+
+    def procesar_bytes(self, datos):
+        """Separa líneas completas del buffer reutilizable y publica cada muestra."""
+        self.bytes_recibidos += len(datos)
+        buffer = self._buffer
+        buffer.extend(datos)
+
+        # Solo una trama con CRC válido confirma el modo binario
+        if self.formato == "auto" and SYNC_TRAMA in buffer and len(decodificar_tramas(buffer)[0]):
+            self.formato = "binario"
+            self._csv_en_binario = 0
+        if self.formato == "binario":
+            if self.formato_pedido == "auto" and self._vuelve_a_csv(datos):
+                self.formato = "auto"
+                buffer[:] = datos
+            else:
+                self._procesar_binario()
+                return
+
+        inicio = 0
+        while True:
+            fin = buffer.find(b"\n", inicio)
+            if fin < 0:
+                break
+            self._procesar_linea(buffer[inicio:fin])
+            inicio = fin + 1
+        del buffer[:inicio]
+
+        # Sin salto de línea en demasiado tiempo: descartar lo acumulado
+        if len(buffer) > MAX_LONGITUD_LINEA:
+            self.lineas_descartadas += 1
+            buffer.clear()
+
+    def _vuelve_a_csv(self, datos):
+        """Cuenta las líneas CSV válidas seguidas que llegan en modo binario."""
+        for linea in datos.split(b"\n")[:-1]:
+            try:
+                analizar_linea(linea)
+            except (ValueError, UnicodeDecodeError):
+                continue
+            self._csv_en_binario += 1
+        return self._csv_en_binario >= LINEAS_PARA_VOLVER_A_CSV
+
+    def _procesar_linea(self, linea):
+        if not linea.strip():
+            return
+        if len(linea) > MAX_LONGITUD_LINEA:
+            self.lineas_descartadas += 1
+            return
+        try:
+            muestra = analizar_linea(bytes(linea), self.lineas_validas + 1)
+        except (ValueError, UnicodeDecodeError):
+            self.errores_parseo += 1
+            return
+        self.lineas_validas += 1
+        self.snapshot = muestra
+        if self.registro is not None:
+            self.registro.agregar(muestra)
+
+    def _procesar_binario(self):
+        """Decodifica todas las tramas del buffer de una vez y publica la última."""
+        buffer = self._buffer
+        tramas, consumidos, errores_crc = decodificar_tramas(buffer)
+        del buffer[:consumidos]
+        self.errores_crc += errores_crc
+
+        if len(buffer) > MAX_BUFFER_BINARIO:
+            self.lineas_descartadas += 1
+            del buffer[:-(TAMANO_TRAMA - 1)]
+
+        if not len(tramas):
+            return
+        self._csv_en_binario = 0
+
+        # Huecos en el número de secuencia = tramas perdidas en el enlace
+        secuencias = tramas["secuencia"].astype(np.int64)
+        if self._ultima_secuencia_trama is not None:
+            secuencias = np.concatenate(([self._ultima_secuencia_trama], secuencias))
+        self.tramas_perdidas += int(np.sum((np.diff(secuencias) - 1) % 65536))
+        self._ultima_secuencia_trama = int(secuencias[-1])
+
+        recibido = time.monotonic()
+        self.tramas_validas += len(tramas)
+        self.lineas_validas += len(tramas)
+        self.snapshot = telemetria_de_trama(tramas[-1], self.lineas_validas, recibido)
+        if self.registro is not None:
+            self.registro.agregar_lote(columnas_de_tramas(tramas, recibido))
@@ -0,0 +1,201 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+
+LIMITE = b"frame"
+PAGINA = """<!doctype html>
+<html><head><title>NEPTUNE</title>
+<style>body{margin:0;background:#000}img{width:100vw;height:100vh;object-fit:contain}</style>
+</head><body><img src="/stream"></body></html>
+"""
+
+
+class _ManejadorMJPEG(BaseHTTPRequestHandler):
+    """Sirve la página, el flujo MJPEG y una instantánea; cada cliente en su hilo."""
+
+    def do_GET(self):
+        servidor = self.server.transmision
+        ruta = self.path.split("?")[0]
+        if ruta == "/":
+            cuerpo = PAGINA.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+        elif ruta == "/snapshot.jpg":
+            # Un frame nuevo, no el último que quedó codificado
+            servidor.cliente_conectado()
+            try:
+                _, jpeg = servidor.esperar_jpeg(servidor.secuencia, timeout=2.0)
+            finally:
+                servidor.cliente_desconectado()
+            if jpeg is None:
+                self.send_error(503, "Sin video")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.end_headers()
+            self.wfile.write(jpeg)
+        elif ruta == "/stream":
+            self._transmitir(servidor)
+        else:
+            self.send_error(404)
+
+    def _transmitir(self, servidor):
+        """Envía siempre el último JPEG; un cliente lento se salta frames o se corta."""
+        self.send_response(200)
+        self.send_header("Content-Type",
+                         "multipart/x-mixed-replace; boundary=" + LIMITE.decode())
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, servidor.buffer_envio)
+        self.connection.settimeout(servidor.timeout_envio)
+
+        servidor.cliente_conectado()
+        secuencia = 0
+        try:
+            while servidor.activo:
+                secuencia, jpeg = servidor.esperar_jpeg(secuencia, timeout=1.0)
+                if jpeg is None:
+                    continue
+                self.wfile.write(b"--" + LIMITE + b"\r\nContent-Type: image/jpeg\r\n"
+                                 b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n")
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+                servidor.enviados += 1
+        except socket.timeout:
+            # No vació su buffer a tiempo: se corta en lugar de acumular frames
+            servidor.clientes_descartados += 1
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            servidor.cliente_desconectado()
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorMJPEG:
+    """Transmite el video anotado por HTTP (MJPEG) a los equipos de la red local.
+
+    Cada frame se codifica una sola vez en un pool de hilos y el mismo JPEG se
+    comparte con todos los clientes; sin clientes no se codifica nada. `publicar`
+    nunca bloquea: si el pool está ocupado, el frame no se transmite. Los clientes
+    reciben siempre el JPEG más reciente, y uno que tarde más de `timeout_envio` en
+    aceptar un frame se desconecta.
+    """
+
+    def __init__(self, host="0.0.0.0", puerto=8080, calidad=70, escala=1.0, hilos=2,
+                 timeout_envio=2.0, buffer_envio=256 * 1024, medidor=None):
+        self.calidad = calidad
+        self.escala = escala
+        self.hilos = hilos
+        self.timeout_envio = timeout_envio
+        self.buffer_envio = buffer_envio
+        self.medidor = medidor
+
+        self._condicion = threading.Condition()
+        self._jpeg = None
+        self._secuencia = 0
+        self._publicado = 0
+        self._en_curso = 0
+        self._lock_medidor = threading.Lock()
+        self.pool = ThreadPoolExecutor(hilos, thread_name_prefix="jpeg")
+
+        # Contadores
+        self.clientes = 0
+        self.codificados = 0
+        self.omitidos = 0
+        self.enviados = 0
+        self.clientes_descartados = 0
+
+        self.activo = True
+        self.http = ThreadingHTTPServer((host, puerto), _ManejadorMJPEG)
+        self.http.daemon_threads = True
+        self.http.transmision = self
+        self.direccion = self.http.server_address
+        self.hilo = threading.Thread(target=self.http.serve_forever, daemon=True)
+        self.hilo.start()
+
+    def publicar(self, frame):
+        """Encola la codificación del frame si hay clientes y un hilo libre.
+
+        El frame no debe modificarse después de publicarlo."""
+        if not self.clientes:
+            return False
+        with self._condicion:
+            if self._en_curso >= self.hilos:
+                self.omitidos += 1
+                return False
+            self._en_curso += 1
+            self._publicado += 1
+            secuencia = self._publicado
+        self.pool.submit(self._codificar, frame, secuencia)
+        return True
+
+    def _codificar(self, frame, secuencia):
+        inicio = time.perf_counter_ns()
+        try:
+            if self.escala != 1.0:
+                frame = cv2.resize(frame, None, fx=self.escala, fy=self.escala,
+                                   interpolation=cv2.INTER_AREA)
+            ok, jpeg = cv2.imencode(".jpg", frame, (cv2.IMWRITE_JPEG_QUALITY, self.calidad))
+        finally:
+            with self._condicion:
+                self._en_curso -= 1
+        if self.medidor is not None:
+            with self._lock_medidor:
+                self.medidor.registrar("codificacion_jpeg", inicio)
+        if not ok:
+            return
+
+        with self._condicion:
+            # Con varios hilos un frame viejo puede terminar después que uno nuevo
+            if secuencia > self._secuencia:
+                self._secuencia = secuencia
+                self._jpeg = jpeg.tobytes()
+                self.codificados += 1
+                self._condicion.notify_all()
+
+    def esperar_jpeg(self, ultima_secuencia, timeout=None):
+        """Bloquea hasta que haya un JPEG más nuevo que `ultima_secuencia`."""
+        with self._condicion:
+            self._condicion.wait_for(
+                lambda: self._secuencia > ultima_secuencia or not self.activo, timeout)
+            if self._secuencia > ultima_secuencia:
+                return self._secuencia, self._jpeg
+            return ultima_secuencia, None
+
+    @property
+    def secuencia(self):
+        return self._secuencia
+
+    def cliente_conectado(self):
+        with self._condicion:
+            self.clientes += 1
+
+    def cliente_desconectado(self):
+        with self._condicion:
+            self.clientes -= 1
+
+    @property
+    def url(self):
+        host, puerto = self.direccion[:2]
+        if host == "0.0.0.0":
+            host = socket.gethostname()
+        return f"http://{host}:{puerto}/"
+
+    def cerrar(self):
+        self.activo = False
+        with self._condicion:
+            self._condicion.notify_all()
+        self.http.shutdown()
+        self.http.server_close()
+        self.pool.shutdown(wait=True)
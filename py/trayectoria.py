@@ -0,0 +1,431 @@
+"""Trayectorias del simulador en un archivo columnar por bloques, y su reproducción.
+
+Cada paso de la física es una fila (una por vehículo en los lotes) con el tiempo,
+la posición, las velocidades locales, pitch/yaw, sus velocidades angulares y
+F1-F4. Las filas se juntan en memoria y se agregan al archivo en bloques; dentro
+de cada bloque cada columna es una región contigua, opcionalmente comprimida con
+zlib. Los bloques sin comprimir se leen mapeados en memoria, sin copia, y
+recorrer una columna solo toca sus bytes.
+
+    cabecera (32 B) | metadatos JSON | bloque | bloque | ...
+    bloque = cabecera del bloque | columna 0 | columna 1 | ...  (alineadas a 8 B)
+
+Un bloque cortado por un corte de luz simplemente no se lee.
+"""
+import argparse
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from dinamica_rouv import INPUT_SIZE, STATE_SIZE
+
+
+MAGIA = b"NEPTRAY1"
+MAGIA_BLOQUE = b"BLQ1"
+
+# Las 10 primeras columnas de estado siguen el orden del vector de estado
+COLUMNAS = (
+    ("t", "<f8"),             # tiempo simulado (s)
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("z", "<f4"),
+    ("vx", "<f4"),            # velocidades en ejes locales (m/s)
+    ("vy", "<f4"),
+    ("vz", "<f4"),
+    ("pitch", "<f4"),         # rad
+    ("yaw", "<f4"),           # rad, sin envolver
+    ("omega_pitch", "<f4"),   # rad/s
+    ("omega_yaw", "<f4"),
+    ("F1", "<f4"),            # N
+    ("F2", "<f4"),
+    ("F3", "<f4"),
+    ("F4", "<f4"),
+)
+NOMBRES = tuple(nombre for nombre, _ in COLUMNAS)
+_INDICES = {nombre: i for i, nombre in enumerate(NOMBRES)}
+
+DTYPE_CABECERA = np.dtype([
+    ("magia", "S8"),
+    ("columnas", "<u4"),
+    ("vehiculos", "<u4"),         # filas por paso
+    ("largo_metadatos", "<u4"),
+    ("reservado", "<u4"),
+    ("inicio_unix", "<f8"),
+])
+DTYPE_BLOQUE = np.dtype([
+    ("magia", "S4"),
+    ("comprimido", "<u4"),
+    ("filas", "<u8"),
+    ("bytes", "<u8", (len(COLUMNAS),)),   # tamaño de cada columna en el archivo
+])
+
+
+def _alinear(n):
+    return (n + 7) // 8 * 8
+
+
+class EscritorTrayectoria:
+    """Graba una trayectoria por bloques de `filas_por_bloque` filas.
+
+    Con `comprimir` cada columna de cada bloque pasa por zlib después de agrupar
+    los bytes por significancia (todos los primeros bytes, luego los segundos...),
+    que en datos que cambian poco de fila en fila comprime bastante mejor.
+
+    Con `intervalo_vaciado` (segundos reales) el bloque pendiente también se
+    escribe cuando pasa ese tiempo desde el último, para que una grabación lenta
+    (la interfaz en tiempo real) no quede solo en memoria.
+    """
+
+    def __init__(self, ruta, vehiculos=1, comprimir=False, filas_por_bloque=65536,
+                 metadatos=None, nivel=1, intervalo_vaciado=None):
+        self.ruta = ruta
+        self.vehiculos = vehiculos
+        self.comprimir = comprimir
+        self.nivel = nivel
+        self.capacidad = max(filas_por_bloque // vehiculos, 1) * vehiculos
+        self.intervalo_vaciado = intervalo_vaciado
+        self.filas = 0
+        self.bytes_escritos = 0
+
+        metadatos = json.dumps(metadatos or {}).encode("utf-8")
+        cabecera = np.zeros((), dtype=DTYPE_CABECERA)
+        cabecera["magia"] = MAGIA
+        cabecera["columnas"] = len(COLUMNAS)
+        cabecera["vehiculos"] = vehiculos
+        cabecera["largo_metadatos"] = len(metadatos)
+        cabecera["inicio_unix"] = time.time()
+        self.archivo = open(ruta, "wb")
+        self._escribir(cabecera.tobytes() + metadatos.ljust(_alinear(len(metadatos)), b"\0"))
+
+        # Filas pendientes: el tiempo aparte (f8) y el resto en una sola matriz
+        self._t = np.empty(self.capacidad)
+        self._datos = np.empty((self.capacidad, len(COLUMNAS) - 1), dtype=np.float32)
+        self._n = 0
+        self._ultimo_vaciado = time.monotonic()
+
+    def agregar(self, t, state, inputs=None):
+        """Agrega un paso: `state` (10,) o (vehiculos, 10) y, si se da, `inputs` (6,)
+        común a todos o (vehiculos, 6)."""
+        if self._n + self.vehiculos > self.capacidad:
+            self.vaciar()
+        i, j = self._n, self._n + self.vehiculos
+        self._t[i:j] = t
+        self._datos[i:j, :STATE_SIZE] = np.reshape(state, (-1, STATE_SIZE))
+        if inputs is None:
+            self._datos[i:j, STATE_SIZE:] = 0.0
+        else:
+            self._datos[i:j, STATE_SIZE:] = np.reshape(inputs, (-1, INPUT_SIZE))[:, :4]
+        self._n = j
+        if (self.intervalo_vaciado is not None
+                and time.monotonic() - self._ultimo_vaciado >= self.intervalo_vaciado):
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe las filas pendientes como un bloque."""
+        n = self._n
+        if n == 0:
+            return
+        columnas = [self._t[:n]] + [self._datos[:n, c] for c in range(self._datos.shape[1])]
+        partes = []
+        for (_, tipo), columna in zip(COLUMNAS, columnas):
+            crudo = np.ascontiguousarray(columna, dtype=tipo)
+            if self.comprimir:
+                agrupado = crudo.view(np.uint8).reshape(n, crudo.itemsize).T.tobytes()
+                partes.append(zlib.compress(agrupado, self.nivel))
+            else:
+                partes.append(crudo.tobytes())
+
+        bloque = np.zeros((), dtype=DTYPE_BLOQUE)
+        bloque["magia"] = MAGIA_BLOQUE
+        bloque["comprimido"] = int(self.comprimir)
+        bloque["filas"] = n
+        bloque["bytes"] = [len(parte) for parte in partes]
+        self._escribir(bloque.tobytes() + b"".join(
+            parte.ljust(_alinear(len(parte)), b"\0") for parte in partes))
+        self.archivo.flush()
+        self.filas += n
+        self._n = 0
+        self._ultimo_vaciado = time.monotonic()
+
+    def _escribir(self, datos):
+        self.archivo.write(datos)
+        self.bytes_escritos += len(datos)
+
+    def cerrar(self):
+        if self.archivo is None:
+            return
+        self.vaciar()
+        self.archivo.close()
+        self.archivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def registrador(escritor, inputs=None):
+    """`on_step(t, state)` para `FixedStepSimulation.advance` que graba cada paso.
+
+    Si `inputs` es un controlador (p. ej. `HoldController`) se graba su
+    `last_inputs`; si es un vector, ese vector."""
+    def on_step(t, state):
+        u = getattr(inputs, "last_inputs", None) if callable(inputs) else inputs
+        escritor.agregar(t, state, u)
+    return on_step
+
+
+class Trayectoria:
+    """Lee una trayectoria grabada (también mientras se sigue grabando: se ven los
+    bloques completos que había al abrirla)."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.mapa = np.memmap(ruta, dtype=np.uint8, mode="r")
+        fin = DTYPE_CABECERA.itemsize
+        cabecera = self.mapa[:fin].view(DTYPE_CABECERA)[0]
+        if cabecera["magia"] != MAGIA:
+            raise ValueError(f"{ruta} no es una trayectoria")
+        if cabecera["columnas"] != len(COLUMNAS):
+            raise ValueError(f"{ruta}: {cabecera['columnas']} columnas, se esperaban "
+                             f"{len(COLUMNAS)}")
+        self.vehiculos = int(cabecera["vehiculos"])
+        self.inicio_unix = float(cabecera["inicio_unix"])
+        largo = int(cabecera["largo_metadatos"])
+        self.metadatos = json.loads(bytes(self.mapa[fin:fin + largo]) or b"{}")
+
+        # Índice de bloques: (filas, comprimido, [(desplazamiento, bytes) por columna])
+        self.bloques = []
+        posicion = fin + _alinear(largo)
+        while posicion + DTYPE_BLOQUE.itemsize <= len(self.mapa):
+            bloque = self.mapa[posicion:posicion + DTYPE_BLOQUE.itemsize].view(DTYPE_BLOQUE)[0]
+            if bloque["magia"] != MAGIA_BLOQUE:
+                break
+            tramos = []
+            inicio = posicion + DTYPE_BLOQUE.itemsize
+            for tamano in bloque["bytes"].tolist():
+                tramos.append((inicio, tamano))
+                inicio += _alinear(tamano)
+            if inicio > len(self.mapa):
+                break   # bloque cortado
+            self.bloques.append((int(bloque["filas"]), bool(bloque["comprimido"]), tramos))
+            posicion = inicio
+        self.filas = sum(bloque[0] for bloque in self.bloques)
+
+    def __len__(self):
+        """Pasos grabados."""
+        return self.filas // self.vehiculos
+
+    def _leer(self, bloque, indice):
+        filas, comprimido, tramos = bloque
+        inicio, tamano = tramos[indice]
+        tipo = np.dtype(COLUMNAS[indice][1])
+        if not comprimido:
+            return self.mapa[inicio:inicio + tamano].view(tipo)
+        agrupado = np.frombuffer(zlib.decompress(self.mapa[inicio:inicio + tamano]), np.uint8)
+        return agrupado.reshape(tipo.itemsize, filas).T.copy().view(tipo).reshape(filas)
+
+    def recorrer(self, nombres=NOMBRES, vehiculo=None):
+        """Genera {columna: arreglo} bloque a bloque, sin cargar el archivo entero.
+
+        Sin comprimir son vistas del mapa; con `vehiculo` solo las filas de ese
+        vehículo (una vista con salto, también sin copia)."""
+        indices = [_INDICES[nombre] for nombre in nombres]
+        for bloque in self.bloques:
+            columnas = {}
+            for nombre, indice in zip(nombres, indices):
+                datos = self._leer(bloque, indice)
+                columnas[nombre] = datos if vehiculo is None else datos[vehiculo::self.vehiculos]
+            yield columnas
+
+    def columnas(self, nombres=NOMBRES, vehiculo=None):
+        """{columna: arreglo} de toda la trayectoria (copia solo si hay varios bloques
+        o compresión)."""
+        partes = {nombre: [] for nombre in nombres}
+        for bloque in self.recorrer(nombres, vehiculo):
+            for nombre, datos in bloque.items():
+                partes[nombre].append(datos)
+        resultado = {}
+        for nombre, lista in partes.items():
+            if len(lista) == 1:
+                resultado[nombre] = lista[0]
+            elif lista:
+                resultado[nombre] = np.concatenate(lista)
+            else:
+                resultado[nombre] = np.empty(0, dtype=COLUMNAS[_INDICES[nombre]][1])
+        return resultado
+
+    def columna(self, nombre, vehiculo=None):
+        return self.columnas((nombre,), vehiculo)[nombre]
+
+
+class Reproductor:
+    """Reproduce una trayectoria grabada sin volver a correr la física: el estado
+    en cualquier instante sale de interpolar las columnas."""
+
+    def __init__(self, trayectoria, vehiculo=0):
+        self.datos = trayectoria.columnas(vehiculo=vehiculo if trayectoria.vehiculos > 1 else None)
+        self.t = np.asarray(self.datos["t"], dtype=np.float64)
+        if len(self.t) == 0:
+            raise ValueError(f"{trayectoria.ruta}: trayectoria vacía")
+
+    @property
+    def duracion(self):
+        return float(self.t[-1] - self.t[0])
+
+    def en(self, t):
+        """{columna: valor} interpolado en `t` (escalar o arreglo de tiempos)."""
+        return {nombre: np.interp(t, self.t, columna) for nombre, columna in self.datos.items()}
+
+    def indice(self, t):
+        """Última fila grabada en o antes de `t`."""
+        return max(int(np.searchsorted(self.t, t, side="right")) - 1, 0)
+
+    def frames(self, fps=30.0, velocidad=1.0, tiempo_real=True):
+        """Genera tiempos de reproducción a `fps`, avanzando `velocidad` segundos
+        simulados por segundo. Con `tiempo_real` espera entre frames; sin él genera
+        todos de una vez (para exportar un video)."""
+        periodo = 1.0 / fps
+        cantidad = int(self.duracion / (velocidad * periodo)) + 1
+        inicio = time.monotonic()
+        for i in range(cantidad):
+            if tiempo_real:
+                espera = inicio + i * periodo - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+            yield self.t[0] + min(i * periodo * velocidad, self.duracion)
+
+
+def ruta_trayectoria_por_defecto(carpeta="trayectorias"):
+    """Ruta con fecha y hora para una trayectoria nueva."""
+    os.makedirs(carpeta, exist_ok=True)
+    return os.path.join(carpeta, time.strftime("trayectoria_%Y%m%d_%H%M%S.ntr"))
+
+
+def _info(args):
+    inicio = time.perf_counter()
+    trayectoria = Trayectoria(args.archivo)
+    tamano = os.path.getsize(args.archivo)
+    crudo = trayectoria.filas * sum(np.dtype(tipo).itemsize for _, tipo in COLUMNAS)
+    print(f"{len(trayectoria)} pasos x {trayectoria.vehiculos} vehículo(s), "
+          f"{len(trayectoria.bloques)} bloques")
+    print(f"{tamano / 1e6:.1f} MB en disco ({crudo / max(tamano, 1):.2f}x respecto de "
+          f"las columnas sin comprimir)")
+    if trayectoria.metadatos:
+        print(f"Metadatos: {json.dumps(trayectoria.metadatos)}")
+
+    # Recorrido de todo el archivo leyendo solo cuatro columnas
+    t_max, z_min, v_max = -np.inf, np.inf, 0.0
+    for bloque in trayectoria.recorrer(("t", "z", "vx", "vy")):
+        if len(bloque["t"]):
+            t_max = max(t_max, float(bloque["t"].max()))
+            z_min = min(z_min, float(bloque["z"].min()))
+            v_max = max(v_max, float(np.hypot(bloque["vx"], bloque["vy"]).max()))
+    segundos = time.perf_counter() - inicio
+    print(f"Tiempo final {t_max:.1f} s, profundidad máxima {-z_min:.2f} m, "
+          f"rapidez horizontal máxima {v_max:.2f} m/s")
+    print(f"Recorrido en {segundos * 1000:.0f} ms")
+
+
+def _reproducir(args):
+    import matplotlib
+    if args.salida:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    reproductor = Reproductor(Trayectoria(args.archivo), args.vehiculo)
+    x, y, z = (reproductor.datos[c] for c in ("x", "y", "z"))
+    fig = plt.figure(figsize=(9, 7))
+    ax = fig.add_subplot(111, projection="3d")
+    margen = 1.0
+    ax.set_xlim(x.min() - margen, x.max() + margen)
+    ax.set_ylim(y.min() - margen, y.max() + margen)
+    ax.set_zlim(z.min() - margen, max(z.max(), 0.0) + margen)
+    ax.set_xlabel("X Global")
+    ax.set_ylabel("Y Global")
+    ax.set_zlabel("Z Global")
+    ax.plot(x, y, z, color="lightgray", lw=0.8)
+    estela, = ax.plot([], [], [], "g-", alpha=0.7)
+    punto, = ax.plot([], [], [], "o", color="red", markersize=8)
+    texto = ax.text2D(0.02, 0.95, "", transform=ax.transAxes,
+                      bbox=dict(facecolor="white", alpha=0.85), fontsize=8)
+    animados = (estela, punto, texto)
+
+    def mostrar(t):
+        i = reproductor.indice(t)
+        v = reproductor.en(t)
+        desde = reproductor.indice(t - args.estela)
+        estela.set_data_3d(x[desde:i + 1], y[desde:i + 1], z[desde:i + 1])
+        punto.set_data_3d([v["x"]], [v["y"]], [v["z"]])
+        texto.set_text(f"t = {t:.1f} s (x{args.velocidad:g})\n"
+                       f"Profundidad: {-v['z']:.2f} m\n"
+                       f"Pitch: {np.degrees(v['pitch']):.1f}°  Yaw: {np.degrees(v['yaw']):.1f}°\n"
+                       f"F1={v['F1']:.1f} N  F2={v['F2']:.1f} N  F3+F4={v['F3'] + v['F4']:.1f} N")
+
+    if args.salida:
+        from matplotlib.animation import FFMpegWriter, PillowWriter
+        escritor = PillowWriter(fps=args.fps) if args.salida.endswith(".gif") \
+            else FFMpegWriter(fps=args.fps)
+        with escritor.saving(fig, args.salida, dpi=80):
+            for t in reproductor.frames(args.fps, args.velocidad, tiempo_real=False):
+                mostrar(t)
+                escritor.grab_frame()
+        return
+
+    # Igual que el simulador: fondo guardado y solo lo animado por frame
+    estado = {"fondo": None, "frames": reproductor.frames(args.fps, args.velocidad)}
+    for artista in animados:
+        artista.set_animated(True)
+
+    def al_dibujar(evento):
+        estado["fondo"] = fig.canvas.copy_from_bbox(fig.bbox)
+        for artista in animados:
+            ax.draw_artist(artista)
+
+    def frame():
+        t = next(estado["frames"], None)
+        if t is None:
+            temporizador.stop()
+            return
+        mostrar(t)
+        if estado["fondo"] is None:
+            fig.canvas.draw_idle()
+            return
+        fig.canvas.restore_region(estado["fondo"])
+        for artista in animados:
+            ax.draw_artist(artista)
+        fig.canvas.blit(fig.bbox)
+
+    fig.canvas.mpl_connect("draw_event", al_dibujar)
+    temporizador = fig.canvas.new_timer(interval=1000 / args.fps)
+    temporizador.add_callback(frame)
+    temporizador.start()
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+    info = sub.add_parser("info", help="resumen y recorrido completo del archivo")
+    info.add_argument("archivo")
+    reproducir = sub.add_parser("reproducir", help="animar la trayectoria grabada")
+    reproducir.add_argument("archivo")
+    reproducir.add_argument("--velocidad", type=float, default=1.0,
+                            help="segundos simulados por segundo real")
+    reproducir.add_argument("--fps", type=float, default=30.0)
+    reproducir.add_argument("--vehiculo", type=int, default=0, help="en grabaciones de lotes")
+    reproducir.add_argument("--estela", type=float, default=30.0, help="segundos de estela")
+    reproducir.add_argument("--salida", help="exportar a .gif o .mp4 en lugar de mostrar")
+    args = parser.parse_args()
+    if args.comando == "info":
+        _info(args)
+    else:
+        _reproducir(args)
+
+
+if __name__ == "__main__":
+    main()